@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# lifespan startup 이벤트에서 DB/외부 API 연결을 열고 위험 구조물 데이터 불러오기
+from navigation.warmup import with_warm_up  # noqa: E402
+
+application = with_warm_up(django_application)
@@ -31,8 +31,189 @@ SECRET_KEY = os.environ.get("SECRET_KEY")
 TMAP = {
     "API_URL": os.environ.get("TMAP_API_URL"),
     "APP_KEY": os.environ.get("TMAP_APP_KEY"),
+    # 동시에 보낼 수 있는 TMap 요청 수 (워커 프로세스 당)
+    "MAX_WORKERS": int(os.environ.get("TMAP_MAX_WORKERS", 8)),
+    # 최근 응답 시간의 이 백분위수보다 오래 걸리는 요청은 같은 요청을 한 번 더 보냄
+    # (hedged request, 0이면 사용 안 함)
+    "HEDGE_PERCENTILE": float(os.environ.get("TMAP_HEDGE_PERCENTILE", 95)),
+    # 다시 보내기 전 최소 대기 시간 (초)과 백분위수 계산에 필요한 최소 응답 수
+    "HEDGE_MIN_DELAY": float(os.environ.get("TMAP_HEDGE_MIN_DELAY", 0.1)),
+    "HEDGE_MIN_SAMPLES": int(os.environ.get("TMAP_HEDGE_MIN_SAMPLES", 20)),
+    # 초당 최대 TMap 요청 수와 연속으로 보낼 수 있는 요청 수 (워커 프로세스 당, 0이면 제한 없음)
+    # (1초 동안 최대 RATE_LIMIT + BURST개 전송, 합이 앱 키의 초당 한도 / 워커 수 이하가 되도록 설정)
+    # (한도를 넘는 요청은 대기하고 최단 경로 요청부터 차례로 전송)
+    "RATE_LIMIT": float(os.environ.get("TMAP_RATE_LIMIT", 0)),
+    "BURST": int(os.environ.get("TMAP_BURST", 10)),
+    # 전송 대기 시간 상한 (초, 0이면 제한 없음)
+    "QUEUE_TIMEOUT": float(os.environ.get("TMAP_QUEUE_TIMEOUT", 3.0)),
 }
 AI_URL = os.environ.get("AI_URL")
+# 외부 HTTP 클라이언트 (워커 프로세스 당 keep-alive 연결 풀)
+HTTP_CLIENTS = {
+    "tmap": {
+        "POOL_CONNECTIONS": 1,
+        "POOL_MAXSIZE": int(os.environ.get("TMAP_POOL_MAXSIZE", TMAP["MAX_WORKERS"])),
+        "CONNECT_TIMEOUT": float(os.environ.get("TMAP_CONNECT_TIMEOUT", 3.05)),
+        "READ_TIMEOUT": float(os.environ.get("TMAP_TIMEOUT", 5.0)),
+        # 연결 실패 시 재시도 횟수 (비동기 클라이언트와 같음)
+        "RETRIES": int(os.environ.get("TMAP_RETRIES", 2)),
+        "BACKOFF_FACTOR": float(os.environ.get("TMAP_BACKOFF_FACTOR", 0.2)),
+        # 응답 대기 시간 초과, 502/503/504일 때도 재시도할 메서드 (동기 클라이언트만)
+        # (느린 요청은 hedged request와 ROUTING["DEADLINE"]으로 처리하므로 사용 안 함)
+        "RETRY_METHODS": (),
+        # 비동기(ASGI) 뷰의 이벤트 루프 당 최대 연결 수
+        "ASYNC_POOL_MAXSIZE": int(os.environ.get("TMAP_ASYNC_POOL_MAXSIZE", 100)),
+        # 연속 실패 횟수가 BREAKER_FAILURES 이상이면 BREAKER_RECOVERY초 동안 요청하지 않음
+        # (circuit breaker, 0이면 사용 안 함)
+        "BREAKER_FAILURES": int(os.environ.get("TMAP_BREAKER_FAILURES", 5)),
+        "BREAKER_RECOVERY": float(os.environ.get("TMAP_BREAKER_RECOVERY", 10.0)),
+    },
+    "ai": {
+        "POOL_CONNECTIONS": 1,
+        "POOL_MAXSIZE": int(os.environ.get("AI_POOL_MAXSIZE", 4)),
+        "CONNECT_TIMEOUT": float(os.environ.get("AI_CONNECT_TIMEOUT", 3.05)),
+        "READ_TIMEOUT": float(os.environ.get("AI_TIMEOUT", 30.0)),
+        "RETRIES": int(os.environ.get("AI_RETRIES", 1)),
+        "BACKOFF_FACTOR": float(os.environ.get("AI_BACKOFF_FACTOR", 0.5)),
+        # 캡션 생성(GPU 작업)이 두 번 실행되지 않도록 응답을 기다리다 실패하면 재시도 안 함
+        "RETRY_METHODS": (),
+        "ASYNC_POOL_MAXSIZE": int(os.environ.get("AI_ASYNC_POOL_MAXSIZE", 20)),
+        "BREAKER_FAILURES": int(os.environ.get("AI_BREAKER_FAILURES", 5)),
+        "BREAKER_RECOVERY": float(os.environ.get("AI_BREAKER_RECOVERY", 30.0)),
+    },
+}
+# TMap 경로 응답 캐시
+ROUTE_CACHE = {
+    # local: 워커 프로세스 내부 캐시, django: CACHES 설정의 캐시 (워커 간 공유)
+    "BACKEND": os.environ.get("ROUTE_CACHE_BACKEND", "local"),
+    # 다른 용도와 같은 캐시를 사용해도 됨 (키 접두사 "route:",
+    # route_cache.clear()는 해당 워커가 저장한 경로 키만 삭제)
+    "DJANGO_CACHE": os.environ.get("ROUTE_CACHE_DJANGO_CACHE", "default"),
+    # 캐시 키 좌표의 소수점 자릿수 (4자리 ≒ 11m)
+    "PRECISION": int(os.environ.get("ROUTE_CACHE_PRECISION", 4)),
+    "TIMEOUT": int(os.environ.get("ROUTE_CACHE_TIMEOUT", 600)),
+    "MAX_ENTRIES": int(os.environ.get("ROUTE_CACHE_MAX_ENTRIES", 1024)),
+}
+# 경로 탐색 엔진
+ROUTING = {
+    # tmap: TMap API, local: 로컬 보행자 그래프 (경로를 찾지 못하면 TMap 사용)
+    "BACKEND": os.environ.get("ROUTING_BACKEND", "tmap"),
+    # 보행자 그래프 파일 (.npz, .geojson, .osm)
+    "GRAPH_PATH": os.environ.get("ROUTING_GRAPH_PATH"),
+    # 보행 속도 (m/s)
+    "WALKING_SPEED": float(os.environ.get("ROUTING_WALKING_SPEED", 1.1)),
+    # 출발지/목적지에서 가장 가까운 보행로 노드까지 허용 거리 (m)
+    "SNAP_DISTANCE": float(os.environ.get("ROUTING_SNAP_DISTANCE", 200)),
+    # 위험 구조물이 영향을 주는 노드 반경 (m)
+    "HAZARD_RADIUS": float(os.environ.get("ROUTING_HAZARD_RADIUS", 30)),
+    # 위험 구조물 속성 별 비용 계수 (간선 비용 = 거리 × (1 + 양 끝 노드 비용 평균))
+    "COSTS": {
+        "weight": 0.2,  # 위험도 1 당
+        "braille_block": 0.3,  # 점자블록 미흡 1, 미설치 2
+        "audio_signal": 0.3,  # 음향신호기 미설치 1
+        "bollard": 0.3,  # 볼라드 잘못된 설치
+    },
+    # 위험 구조물 변경분을 간선 비용에 다시 반영하는 최소 주기 (초)
+    "COST_REFRESH_INTERVAL": float(os.environ.get("ROUTING_COST_REFRESH", 10)),
+    # 일괄 경로 탐색 요청 1건 당 최대 (출발지, 목적지) 쌍 개수
+    "BATCH_MAX_SIZE": int(os.environ.get("ROUTING_BATCH_MAX_SIZE", 100)),
+    # 경유지 후보로 고르는 안전도 상위 점 개수
+    "WAYPOINT_CANDIDATES": int(os.environ.get("ROUTING_WAYPOINT_CANDIDATES", 4)),
+    # 경로 1개 당 최대 경유지 수 (TMap 최대 5개)
+    "MAX_WAYPOINTS": int(os.environ.get("ROUTING_MAX_WAYPOINTS", 2)),
+    # 요청 1건 당 TMap에 요청하는 최대 경유지 경로 수 (최단 경로 제외)
+    "MAX_PLANS": int(os.environ.get("ROUTING_MAX_PLANS", 4)),
+    # 최단 보행 거리 / 직선 거리 추정 상한 (경유지 경로를 미리 걸러낼 때 사용)
+    "CIRCUITY": float(os.environ.get("ROUTING_CIRCUITY", 1.4)),
+    # 경로 탐색 요청 1건의 TMap 응답 대기 시간 상한 (초, 지나면 그때까지 받은 경로 중 선택)
+    "DEADLINE": float(os.environ.get("ROUTING_DEADLINE", 3.0)),
+}
+# 위험 구조물 공간 인덱스 (워커 프로세스 당 메모리 스냅샷)
+SPATIAL_INDEX = {
+    # 격자 셀 크기 (단위: 도)
+    "CELL_SIZE": float(os.environ.get("SPATIAL_INDEX_CELL_SIZE", 0.005)),
+    # 다른 워커의 변경분을 DB에서 확인하는 주기 (초)
+    "POLL_INTERVAL": float(os.environ.get("SPATIAL_INDEX_POLL_INTERVAL", 2.0)),
+    # 변경 이력 보관 기간 (초)
+    "CHANGE_RETENTION": int(os.environ.get("SPATIAL_INDEX_CHANGE_RETENTION", 3600)),
+}
+# 자주 요청되는 출발지/목적지 구간(역, 병원, 복지관 등)의 미리 계산된 경로
+CORRIDORS = {
+    # 미리 계산할 구간 목록 CSV (start_x, start_y, end_x, end_y 열)
+    "FILE": os.environ.get("CORRIDORS_FILE"),
+    # 요청 로그에서 찾을 구간 수와 최소 요청 수
+    "TOP": int(os.environ.get("CORRIDORS_TOP", 100)),
+    "MIN_COUNT": int(os.environ.get("CORRIDORS_MIN_COUNT", 10)),
+    # 구간 좌표의 소수점 자릿수 (4자리 ≒ 11m)
+    "PRECISION": int(os.environ.get("CORRIDORS_PRECISION", 4)),
+    # 미리 계산된 경로의 최대 사용 기간 (초)
+    "MAX_AGE": int(os.environ.get("CORRIDORS_MAX_AGE", 24 * 3600)),
+    # 각 워커가 DB에서 새로 계산된 경로를 확인하는 주기 (초, 0이면 사용 안 함)
+    "POLL_INTERVAL": float(os.environ.get("CORRIDORS_POLL_INTERVAL", 30.0)),
+}
+# 위험 구조물 제보
+REPORT = {
+    # 제보 1건 당 위험도(제보 점수) 증가량
+    "WEIGHT_INCREMENT": float(os.environ.get("REPORT_WEIGHT_INCREMENT", 0.5)),
+    # 제보 점수가 절반으로 줄어드는 기간 (초, 0이면 감쇠하지 않음)
+    "SCORE_HALF_LIFE": float(os.environ.get("REPORT_SCORE_HALF_LIFE", 30 * 24 * 3600)),
+    # 제보를 모아 두었다가 FLUSH_INTERVAL마다 한 번에 반영 (write-behind)
+    "BUFFER": os.environ.get("REPORT_BUFFER", "false").lower() == "true",
+    "FLUSH_INTERVAL": float(os.environ.get("REPORT_FLUSH_INTERVAL", 1.0)),
+    # 모아 둔 위치가 이 개수를 넘으면 주기와 관계없이 바로 반영
+    "BUFFER_MAX_SIZE": int(os.environ.get("REPORT_BUFFER_MAX_SIZE", 1000)),
+    # 이 거리(m) 이내의 기존 위험 구조물에 제보를 합침 (GPS 오차 보정, 0이면 같은 좌표만)
+    "MERGE_RADIUS": float(os.environ.get("REPORT_MERGE_RADIUS", 10.0)),
+}
+# 이미지 캡션 캐시 (같은 이미지/비슷한 이미지의 캡션 재사용)
+CAPTION_CACHE = {
+    # local: 워커 프로세스 내부 캐시, django: CACHES 설정의 캐시 (워커 간 공유)
+    "BACKEND": os.environ.get("CAPTION_CACHE_BACKEND", "local"),
+    "DJANGO_CACHE": os.environ.get("CAPTION_CACHE_DJANGO_CACHE", "default"),
+    "TIMEOUT": int(os.environ.get("CAPTION_CACHE_TIMEOUT", 24 * 60 * 60)),
+    # 이미지 1개 당 내용 해시 1개 + 지각 해시 구간 MAX_DISTANCE + 1개를 저장
+    "MAX_ENTRIES": int(os.environ.get("CAPTION_CACHE_MAX_ENTRIES", 8192)),
+    # 비슷한 이미지로 판단하는 지각 해시(64비트)의 최대 해밍 거리 (-1: 같은 이미지만)
+    "MAX_DISTANCE": int(os.environ.get("CAPTION_CACHE_MAX_DISTANCE", 4)),
+}
+# 요청 처리 시간 측정
+METRICS = {
+    # /api/metrics/에 접근할 수 있는 클라이언트 주소 (쉼표로 구분, 192.168.0.0/24 같은 대역 가능)
+    # (프록시의 X-Forwarded-For는 사용하지 않고 REMOTE_ADDR로 확인)
+    "ALLOWED_IPS": [
+        address.strip()
+        for address in os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+        if address.strip()
+    ],
+    # 응답에 Server-Timing 헤더 추가 (구간 별 처리 시간)
+    "SERVER_TIMING": os.environ.get("METRICS_SERVER_TIMING", "true").lower() == "true",
+    # navigation.requests 로거로 요청 별 처리 시간을 JSON 로그로 기록
+    "LOG_REQUESTS": os.environ.get("METRICS_LOG_REQUESTS", "true").lower() == "true",
+}
+# 이미지 캡션 생성 요청의 업로드 이미지 처리
+IMAGE_CAPTION = {
+    # 업로드 파일 최대 크기 (바이트)
+    "MAX_UPLOAD_SIZE": int(os.environ.get("IMAGE_MAX_UPLOAD_SIZE", 20 * 1024 * 1024)),
+    # 최대 픽셀 수 (가로 × 세로, 디코딩 전에 헤더로 확인)
+    "MAX_PIXELS": int(os.environ.get("IMAGE_MAX_PIXELS", 50_000_000)),
+    # AI 모델 입력 크기 (긴 변 기준 픽셀, 더 크면 축소해서 전송)
+    "MAX_SIDE": int(os.environ.get("IMAGE_MAX_SIDE", 384)),
+    # 축소한 이미지의 JPEG 품질
+    "JPEG_QUALITY": int(os.environ.get("IMAGE_JPEG_QUALITY", 90)),
+    # 크기가 MAX_SIDE 이하이면 원본 그대로 전송하는 형식 (그 외 형식은 JPEG로 변환)
+    "PASSTHROUGH_FORMATS": ("JPEG", "PNG", "GIF", "WEBP"),
+}
+# 워커 시작 (자동 확장으로 새로 뜬 워커의 첫 요청 지연 단축)
+STARTUP = {
+    # 요청을 받기 전에 DB/외부 API 연결을 열고 위험 구조물 데이터를 불러옴
+    # (backend.wsgi는 모듈을 불러올 때, backend.asgi는 lifespan startup 이벤트에서 실행)
+    # (gunicorn은 --preload 없이 실행해야 워커 프로세스마다 실행됨)
+    "WARMUP": os.environ.get("STARTUP_WARMUP", "true").lower() == "true",
+    # 미리 생성한 OpenAPI 스키마 파일 (manage.py generate_swagger로 생성, 없으면 요청 시 생성)
+    "OPENAPI_SCHEMA": os.environ.get(
+        "OPENAPI_SCHEMA_PATH", os.path.join(BASE_DIRNAME, "openapi.json")
+    ),
+}
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -57,8 +238,22 @@ INSTALLED_APPS = [
     "drf_yasg",  # Swagger
 ]
 
+SWAGGER_SETTINGS = {
+    # manage.py generate_swagger가 사용하는 API 정보
+    "DEFAULT_INFO": "backend.urls.api_info",
+    # Swagger UI가 미리 생성한 스키마 파일(STARTUP["OPENAPI_SCHEMA"])을 읽도록 지정
+    "SPEC_URL": ("schema-json", {"format": ".json"}),
+}
+REDOC_SETTINGS = {
+    "SPEC_URL": ("schema-json", {"format": ".json"}),
+}
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # 요청 처리 시간 측정 (Server-Timing 헤더, 요청 로그, /api/metrics/)
+    "navigation.metrics.RequestMetricsMiddleware",
+    # Accept-Encoding: gzip 요청의 응답 압축 (경로 응답 등)
+    "django.middleware.gzip.GZipMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -105,6 +300,11 @@ DATABASES = {
         "PASSWORD": os.environ.get("DB_PASSWD"),
         "HOST": os.environ.get("DB_HOST"),
         "PORT": os.environ.get("DB_PORT"),
+        # 연결 유지 시간 (초, 0이면 요청마다 새로 연결)
+        # WSGI 워커는 60 정도로 설정해야 워커 시작 시 연 연결을 요청에서 재사용
+        # (ASGI는 요청마다 다른 스레드에서 연결하므로 0으로 유지)
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -149,3 +349,22 @@ STATIC_URL = "static/"
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # 요청 별 처리 시간 JSON 로그 (METRICS["LOG_REQUESTS"])
+        "navigation.requests": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
@@ -23,20 +23,25 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from navigation.views import schema_file_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("navigation.urls")),
 ]
 
+# API 정보 (manage.py generate_swagger도 사용, SWAGGER_SETTINGS["DEFAULT_INFO"])
+api_info = openapi.Info(
+    title="On The Lamp",
+    default_version="1.0.0",
+    description="Navigation for the visually impaired",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contact@snippets.local"),
+    license=openapi.License(name="BSD License"),
+)
+
 schema_view = get_schema_view(
-    openapi.Info(
-        title="On The Lamp",
-        default_version="1.0.0",
-        description="Navigation for the visually impaired",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@snippets.local"),
-        license=openapi.License(name="BSD License"),
-    ),
+    api_info,
     public=True,
     permission_classes=[permissions.AllowAny],
 )
@@ -45,7 +50,11 @@ if settings.DEBUG:
     urlpatterns += [
         re_path(  # http://127.0.0.1:8000/swagger/
             r"^swagger(?P<format>\.json|\.yaml)$",
-            schema_view.without_ui(cache_timeout=0),
+            # 미리 생성한 스키마 파일 (없으면 요청 시 생성)
+            schema_file_view(
+                settings.STARTUP["OPENAPI_SCHEMA"],
+                schema_view.without_ui(cache_timeout=0),
+            ),
             name="schema-json",
         ),
         re_path(  # http://127.0.0.1:8000/redoc/
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_wsgi_application()
+
+# 요청을 받기 전에 DB/외부 API 연결을 열고 위험 구조물 데이터 불러오기 (워커 프로세스마다)
+from backend.settings import STARTUP  # noqa: E402
+
+if STARTUP["WARMUP"]:
+    from navigation.warmup import warm_up
+
+    warm_up()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class NavigationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "navigation"
+
+    def ready(self):
+        # RoadStructure 변경 시그널 등록
+        from . import signals  # noqa: F401
@@ -0,0 +1,138 @@
+import asyncio
+
+from django.http import JsonResponse
+from django.http.multipartparser import MultiPartParser, MultiPartParserError
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from backend.settings import AI_URL
+from .client import CircuitOpenError, get_async_client
+from .compact import compact_route, parse_fields
+from .corridors import get_corridor_routes
+from .function import afind_optimal_route, aiter_optimal_route
+from .imaging import ImageRejected, caption_cache, check_content_length, lookup_caption
+from .metrics import timer
+from .snapshot import aget_snapshot
+from .streaming import STREAM_CONTENT_TYPES, astream_route, streaming_response
+from .views import ROUTE_ALPHA, FindRouteView, parse_caption
+
+
+def error_response(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncFindRouteView(View):
+    """
+    FindRouteView의 비동기(ASGI) 버전
+    TMap API 응답을 기다리는 동안 워커를 점유하지 않습니다.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            start = (float(request.GET["start_x"]), float(request.GET["start_y"]))
+            end = (float(request.GET["end_x"]), float(request.GET["end_y"]))
+            fields = parse_fields(request.GET.get("format"), request.GET.get("fields"))
+            stream = request.GET.get("stream")
+            if stream is not None and stream not in STREAM_CONTENT_TYPES:
+                raise ValueError(f"알 수 없는 스트리밍 형식입니다: {stream}")
+        except (KeyError, ValueError):
+            return error_response("Invalid input arguments", 400)
+
+        # 스냅샷은 최초 1회만 DB에서 불러오고 이후에는 메모리에서 조회
+        await aget_snapshot()
+        # 자주 요청되는 구간은 미리 계산된 경로 사용
+        with timer("corridor"):
+            route = get_corridor_routes().get(start, end, FindRouteView.find_candidates)
+        if stream:
+            # 최단 경로를 먼저 보내고 최적 경로를 이어서 전송
+            if route:
+                steps = self.precomputed_steps(route)
+            else:
+                candidates = FindRouteView.find_candidates(start, end)
+                steps = self.with_fallback(
+                    aiter_optimal_route(start, end, candidates, alpha=ROUTE_ALPHA),
+                    start,
+                    end,
+                )
+            return streaming_response(
+                request, astream_route(steps, stream, fields), stream
+            )
+        if not route:
+            candidates = FindRouteView.find_candidates(start, end)
+            route = await afind_optimal_route(start, end, candidates, alpha=ROUTE_ALPHA)
+            # TMap 장애 시 위험 구조물이 바뀌기 전에 계산된 구간 경로라도 반환
+            route = route or get_corridor_routes().fallback(start, end)
+        if not route:
+            return error_response("Route not found", 404)
+        if fields:
+            route = compact_route(route, fields)
+        return JsonResponse(route, json_dumps_params={"ensure_ascii": False})
+
+    @staticmethod
+    async def precomputed_steps(route):
+        # 미리 계산된 구간 경로는 최적 경로이므로 바로 반환
+        yield "optimal", route
+
+    @staticmethod
+    async def with_fallback(steps, start, end):
+        # FindRouteView.with_fallback의 비동기 버전
+        async for step, route in steps:
+            if step == "optimal" and not route:
+                route = get_corridor_routes().fallback(start, end)
+            yield step, route
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncCallImageCaptionView(View):
+    """
+    CallImageCaptionView의 비동기(ASGI) 버전
+    """
+
+    async def patch(self, request, *args, **kwargs):
+        try:
+            check_content_length(request.META)
+        except ImageRejected as e:
+            return error_response(str(e), e.status_code)
+
+        try:
+            # Django는 PATCH 요청의 multipart 본문을 자동으로 해석하지 않음
+            # (본문 전체를 메모리에 올리지 않도록 request를 스트림으로 전달)
+            _, files = MultiPartParser(
+                request.META, request, request.upload_handlers
+            ).parse()
+            image = files["image"]
+        # multipart 본문이 아니거나 이미지 파일이 없는 경우
+        except (MultiPartParserError, KeyError):
+            return error_response("Invalid input arguments", 400)
+
+        try:
+            # 이미지 변환/해시 계산은 CPU 작업이므로 스레드에서 실행
+            with timer("image"):
+                caption, prepared, keys = await asyncio.to_thread(lookup_caption, image)
+            if caption is None:
+                # AI 서버로 이미지 전송 (httpx는 파일을 나누어 읽으면서 전송)
+                with timer("ai"):
+                    response = await get_async_client("ai").post(
+                        AI_URL, files={"image": prepared}
+                    )
+                if response.status_code != 200:
+                    return error_response("Failed to generate caption", 404)
+                response.encoding = "utf-8"
+                caption = parse_caption(response.text)
+                if caption:
+                    await asyncio.to_thread(caption_cache.set, *keys, caption)
+            return JsonResponse(
+                caption, safe=False, json_dumps_params={"ensure_ascii": False}
+            )
+
+        except ImageRejected as e:
+            return error_response(str(e), e.status_code)
+
+        except CircuitOpenError as e:
+            return error_response(str(e), 503)
+
+        # AI Image Captioning 서버와 통신 실패
+        except Exception as e:
+            return error_response(str(e), 500)
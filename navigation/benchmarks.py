@@ -0,0 +1,1372 @@
+import asyncio
+import ctypes
+import gzip
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from statistics import mean
+
+import httpx
+import numpy as np
+import requests
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F, Sum
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+
+from backend.settings import BASE_DIR, HTTP_CLIENTS, METRICS, REPORT, ROUTING, TMAP
+from . import client
+from .engine import LocalRouter, PedestrianGraph
+from .compact import COMPACT_FIELDS, compact_route
+from .corridors import corridor_key, get_corridor_routes, precompute_routes
+from .fakes import (
+    FakeCaptionServer,
+    FakeTMapServer,
+    fake_route_response,
+    fake_tmap,
+)
+from .models import PrecomputedRoute, RoadStructure
+from .reports import ReportBuffer, add_weights
+from .scheduler import RequestScheduler
+from . import async_views, views
+from .ingest import import_hazards, write_batch
+from .snapshot import get_snapshot, peek_snapshot
+from .spatial import METERS_PER_DEGREE, GridIndex
+from .imaging import MultipartBody, caption_cache, prepare_caption_image
+from . import function
+from .function import (
+    CIRCLE_RADIUS_FACTOR,
+    as_point_arrays,
+    calculate_midpoint_and_circle,
+    calculate_path_response,
+    circle_mask,
+    detour_distance,
+    distance_m,
+    fetch_path_responses,
+    find_optimal_route,
+    plan_pass_lists,
+    points_within_distance,
+    route_cache,
+    route_cache_key,
+    select_highest_safety_points,
+    select_optimal_route,
+    top_k_indices,
+)
+
+
+@contextmanager
+def test_database():
+    """
+    벤치마크 동안 테스트 DB(test_ 접두사)를 새로 만들어 사용하고 끝나면 삭제합니다.
+    (벤치마크는 위험 구조물을 추가/삭제하고 변경 이력(RELOAD 포함)을 기록하므로
+    운영 DB에서 실행하면 모든 워커가 스냅샷을 다시 불러옴)
+    """
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def fake_ai(**kwargs):
+    """
+    로컬 AI Image Captioning 서버를 띄우고 캡션 뷰의 AI 서버 주소를 임시로 교체합니다.
+    """
+    ai_url = views.AI_URL
+    with FakeCaptionServer(**kwargs) as server:
+        views.AI_URL = async_views.AI_URL = server.url
+        try:
+            yield server
+        finally:
+            views.AI_URL = async_views.AI_URL = ai_url
+
+
+def timed(func, repeat, setup=None):
+    """
+    func를 repeat번 실행한 시간(초) 목록을 반환합니다.
+    :param setup: 매 실행 전에 호출할 함수 (시간 측정에서 제외)
+    """
+    elapsed = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - started)
+    return elapsed
+
+
+def bench_fanout(repeat=5, latency=0.2, **kwargs):
+    """
+    최단 경로 + 경유지 4개 조합의 TMap 요청을 순차 실행할 때와 동시 실행할 때를 비교합니다.
+    """
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+    a, b = (126.9850, 37.5690, 1.0), (126.9880, 37.5672, 0.5)
+
+    def sequential():
+        calculate_path_response(start, end)
+        for pass_list in ([a], [b], [a, b], [b, a]):
+            calculate_path_response(start, end, passList=pass_list)
+
+    with fake_tmap(latency=latency):
+        return {
+            "sequential": timed(sequential, repeat, setup=route_cache.clear),
+            "concurrent": timed(
+                lambda: find_optimal_route(start, end, [a, b]),
+                repeat,
+                setup=route_cache.clear,
+            ),
+            "cached": timed(lambda: find_optimal_route(start, end, [a, b]), repeat),
+        }
+
+
+def random_points(n, seed=0):
+    """
+    서울 도심 영역 안의 무작위 위험 구조물 좌표를 생성합니다.
+    :return: [(x, y, weight), ...]
+    """
+    rng = random.Random(seed)
+    return [
+        (
+            126.90 + rng.random() * 0.15,
+            37.50 + rng.random() * 0.10,
+            rng.choice((0.0, 0.5, 1.0, 1.5, 2.0)),
+        )
+        for _ in range(n)
+    ]
+
+
+def _filter_loop(points, center, radius):
+    # 기존 순수 파이썬 구현 (비교 기준)
+    filtered = []
+    for point in points:
+        distance = ((point[0] - center[0]) ** 2 + (point[1] - center[1]) ** 2) ** 0.5
+        if distance <= radius * CIRCLE_RADIUS_FACTOR:
+            filtered.append(point)
+    return sorted(filtered, key=lambda p: p[2], reverse=True)[:2]
+
+
+def _filter_vectorized(points, center, radius):
+    xs, ys, ws = as_point_arrays(points)
+    return _filter_arrays(xs, ys, ws, center, radius)
+
+
+def _filter_arrays(xs, ys, ws, center, radius):
+    ids = np.flatnonzero(circle_mask(xs, ys, center, radius * CIRCLE_RADIUS_FACTOR))
+    return ids[top_k_indices(ws[ids], 2)]
+
+
+def bench_filter(repeat=5, sizes=(10_000, 100_000, 1_000_000), **kwargs):
+    """
+    후보 점 필터링 + 상위 2개 선택을 순수 파이썬 반복문과 NumPy 벡터 연산으로 비교합니다.
+    (list: 튜플 리스트를 매번 배열로 변환, arrays: 미리 만든 배열 사용)
+    """
+    center, radius = calculate_midpoint_and_circle((126.95, 37.53), (126.99, 37.56))
+    results = {}
+    for n in sizes:
+        points = random_points(n)
+        xs, ys, ws = as_point_arrays(points)
+        results[f"loop {n}"] = timed(
+            lambda: _filter_loop(points, center, radius), repeat
+        )
+        results[f"numpy(list) {n}"] = timed(
+            lambda: _filter_vectorized(points, center, radius), repeat
+        )
+        results[f"numpy(arrays) {n}"] = timed(
+            lambda: _filter_arrays(xs, ys, ws, center, radius), repeat
+        )
+    return results
+
+
+def bench_prefilter(repeat=5, hazards=200_000, trips=20, **kwargs):
+    """
+    경유지 후보 필터링을 중점 원(기존)과 우회 거리 타원으로 비교합니다. (이동 거리 별)
+    - circle/ellipse N km: 조회 시간
+    - circle/ellipse N km count: 평균 후보 수 (타원 밖 후보는 plan_pass_lists가 모두 제외)
+    """
+    index = GridIndex.from_points(random_points(hazards))
+    rng = random.Random(5)
+    results = {}
+    for km in (0.5, 2, 5):
+        pairs = []
+        for _ in range(trips):
+            start = (126.93 + rng.random() * 0.09, 37.52 + rng.random() * 0.06)
+            angle = rng.random() * 2 * math.pi
+            step = km * 1000 / METERS_PER_DEGREE
+            end = (
+                start[0] + step * math.cos(angle) / math.cos(math.radians(start[1])),
+                start[1] + step * math.sin(angle),
+            )
+            pairs.append((start, end))
+
+        def circle():
+            counts = []
+            for start, end in pairs:
+                center, radius = calculate_midpoint_and_circle(start, end)
+                counts.append(
+                    len(index.query_circle(center, radius * CIRCLE_RADIUS_FACTOR))
+                )
+            return counts
+
+        def ellipse():
+            return [
+                len(index.query_ellipse(start, end, detour_distance(start, end, 1.5)))
+                for start, end in pairs
+            ]
+
+        results[f"circle {km} km"] = [t / trips for t in timed(circle, repeat)]
+        results[f"ellipse {km} km"] = [t / trips for t in timed(ellipse, repeat)]
+        results[f"circle {km} km count"] = round(mean(circle()))
+        results[f"ellipse {km} km count"] = round(mean(ellipse()))
+    return results
+
+
+def grid_graph(size, spacing=0.0005, origin=(126.95, 37.53)):
+    """
+    size × size 격자 모양의 보행로 그래프를 생성합니다.
+    """
+    x0, y0 = origin
+    lines = [
+        [(x0 + i * spacing, y0 + j * spacing) for i in range(size)] for j in range(size)
+    ] + [
+        [(x0 + i * spacing, y0 + j * spacing) for j in range(size)] for i in range(size)
+    ]
+    return PedestrianGraph.from_lines(lines)
+
+
+class _StaticSnapshot:
+    # 벤치마크용 고정 위험 구조물 스냅샷
+    revision = 1
+
+    def __init__(self, points):
+        xs, ys, ws = as_point_arrays(points)
+        rng = np.random.default_rng(0)
+        self._arrays = {
+            "xs": xs,
+            "ys": ys,
+            "weights": ws,
+            "braille_block": rng.integers(0, 3, len(xs)),
+            "audio_signal": rng.integers(0, 2, len(xs)),
+            "bollard": rng.integers(0, 3, len(xs)),
+        }
+
+    def arrays(self):
+        return self._arrays
+
+
+def bench_local_route(repeat=5, size=300, hazards=10_000, **kwargs):
+    """
+    로컬 경로 탐색 엔진으로 약 3km 거리의 경로를 탐색하는 시간을 측정합니다.
+    (size × size 격자 그래프, 위험 구조물 hazards개)
+    """
+    graph = grid_graph(size)
+    span = (size - 1) * 0.0005
+    rng = random.Random(1)
+    points = [
+        (126.95 + rng.random() * span, 37.53 + rng.random() * span, rng.random() * 2)
+        for _ in range(hazards)
+    ]
+    started = time.perf_counter()
+    router = LocalRouter(graph, snapshot=_StaticSnapshot(points))
+    router.refresh_costs(force=True)
+    build = time.perf_counter() - started
+
+    start, end = (126.952, 37.532), (126.952 + span * 0.15, 37.532 + span * 0.12)
+    return {
+        "graph+costs": [build],
+        "route": timed(lambda: router.route(start, end), repeat),
+    }
+
+
+@contextmanager
+def asgi_server(host="127.0.0.1"):
+    """
+    uvicorn으로 ASGI 애플리케이션(backend.asgi)을 띄우고 주소를 반환합니다.
+    """
+    import uvicorn
+    from backend.asgi import application
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            application, host=host, port=0, log_level="warning", lifespan="off"
+        )
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def load_test(method, url, requests_kwargs, concurrency):
+    """
+    concurrency개의 클라이언트가 requests_kwargs의 요청을 나누어 차례로 보냅니다.
+    :param requests_kwargs: 요청 별 httpx 요청 인자 [{"params": ...}, {"json": ...}, ...]
+    :return: (요청 별 응답 시간(초) 목록, 요청 별 상태 코드 목록, 전체 소요 시간(초))
+    """
+
+    async def run():
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            pending = iter(enumerate(requests_kwargs))
+            elapsed = [0.0] * len(requests_kwargs)
+            statuses = [0] * len(requests_kwargs)
+
+            async def worker():
+                for i, kwargs in pending:
+                    started = time.perf_counter()
+                    response = await client.request(method, url, **kwargs)
+                    elapsed[i] = time.perf_counter() - started
+                    statuses[i] = response.status_code
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return elapsed, statuses, time.perf_counter() - started
+
+    return asyncio.run(run())
+
+
+@contextmanager
+def wsgi_server(host="127.0.0.1"):
+    """
+    멀티스레드 WSGI 서버(runserver와 같은 서버)로 애플리케이션을 띄우고 주소를 반환합니다.
+    """
+    from django.core.servers.basehttp import (
+        ThreadedWSGIServer,
+        WSGIRequestHandler,
+        get_internal_wsgi_application,
+    )
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadedWSGIServer):
+        request_queue_size = 1024
+
+    httpd = Server((host, 0), QuietHandler)
+    httpd.set_app(get_internal_wsgi_application())
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def concurrent_get(url, params_list, concurrency):
+    """
+    params_list의 요청을 concurrency개씩 동시에 보내고 요청 별 응답 시간(초)을 반환합니다.
+    """
+    elapsed, statuses, _ = load_test(
+        "GET", url, [{"params": params} for params in params_list], concurrency
+    )
+    failed = [status for status in statuses if status != 200]
+    if failed:
+        raise RuntimeError(f"{len(failed)} requests failed: {failed[:5]}")
+    return elapsed
+
+
+def bench_asgi(repeat=5, latency=0.2, concurrency=50, **kwargs):
+    """
+    uvicorn에서 동기 경로 탐색 뷰와 비동기 경로 탐색 뷰의 동시 요청 처리 시간을 비교합니다.
+    (요청마다 출발지를 달리하여 캐시를 사용하지 않음)
+    """
+    results = {}
+    with fake_tmap(latency=latency), asgi_server() as base_url:
+        for label, path in (
+            ("sync", "/api/find_path/"),
+            ("async", "/api/async/find_path/"),
+        ):
+            route_cache.clear()
+            params_list = [
+                {
+                    "start_x": 126.97 + i * 0.0001,
+                    "start_y": 37.56,
+                    "end_x": 126.99,
+                    "end_y": 37.57,
+                }
+                for i in range(concurrency * repeat)
+            ]
+            results[label] = concurrent_get(base_url + path, params_list, concurrency)
+    return results
+
+
+def _proc_status(*fields):
+    # /proc/self/status의 메모리 항목 (KB)
+    with open("/proc/self/status") as f:
+        values = dict(line.split(":", 1) for line in f)
+    return [int(values[field].split()[0]) for field in fields]
+
+
+def peak_memory(func):
+    """
+    func를 별도 프로세스(fork)에서 실행하는 동안 늘어난 최대 메모리(MB)를 반환합니다.
+    (Linux 전용, 실행 직전 RSS 대비 최대 RSS 증가량)
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            # 부모 프로세스에서 해제된 힙 메모리를 반환하고 최대 RSS 기록을 초기화
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            (rss,) = _proc_status("VmRSS")
+            func()
+            (peak,) = _proc_status("VmHWM")
+            os.write(write_fd, str(max(peak - rss, 0) / 1024).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        result = f.read()
+    os.waitpid(pid, 0)
+    return float(result)
+
+
+def sample_image(size, format, seed=0):
+    """
+    부드러운 그라데이션에 잡음을 더한 휴대폰 사진 비슷한 이미지 파일을 생성합니다.
+    :return: 이미지 파일 데이터 (bytes)
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 200, width, dtype=np.float32)[None, :, None]
+    pixels = gradient + rng.normal(0, 12, (height, width, 3)).astype(np.float32)
+    pixels = np.clip(pixels + np.arange(3) * 20, 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def _prepare_legacy(image):
+    # 기존 구현 (비교 기준): 모든 이미지를 원본 크기로 디코딩 후 재인코딩
+    image_file = Image.open(image)
+    buffer = io.BytesIO()
+    if image_file.format == "BMP":
+        image_file = image_file.convert("RGB")
+        image_file.save(buffer, format="JPEG")
+        mime_type = "image/jpeg"
+    else:
+        image_file.save(buffer, format=image_file.format)
+        mime_type = image.content_type
+    buffer.seek(0)
+    return image.name, buffer, mime_type
+
+
+def bench_image(repeat=5, **kwargs):
+    """
+    캡션 생성 요청의 이미지 처리 + AI 서버 전송용 본문 생성 시간과 최대 메모리를 비교합니다.
+    (legacy: 원본 크기 재인코딩 후 multipart 본문 전체를 메모리에 생성,
+    pipeline: 원본 그대로 전달하거나 축소 후 본문을 나누어 전송)
+    """
+    samples = {
+        "photo 12MP": ("photo.jpg", sample_image((4032, 3024), "JPEG"), "image/jpeg"),
+        "png 3MP": ("screen.png", sample_image((2000, 1500), "PNG"), "image/png"),
+        "bmp 0.8MP": ("scan.bmp", sample_image((1024, 768), "BMP"), "image/bmp"),
+        "small jpeg": ("small.jpg", sample_image((320, 240), "JPEG"), "image/jpeg"),
+    }
+
+    def legacy(name, data, content_type):
+        image = SimpleUploadedFile(name, data, content_type)
+        files = {"image": _prepare_legacy(image)}
+        requests.Request("POST", "http://ai/", files=files).prepare()
+
+    def pipeline(name, data, content_type):
+        image = SimpleUploadedFile(name, data, content_type)
+        body = MultipartBody("image", *prepare_caption_image(image))
+        for _ in body:  # 전송 대신 본문을 끝까지 읽기
+            pass
+
+    results = {}
+    for label, sample in samples.items():
+        for variant, func in (("legacy", legacy), ("pipeline", pipeline)):
+            results[f"{label} {variant}"] = timed(lambda: func(*sample), repeat)
+            results[f"{label} {variant} MB"] = peak_memory(lambda: func(*sample))
+    return results
+
+
+def bench_caption(repeat=5, latency=0.2, **kwargs):
+    """
+    캡션 생성 요청에서 캐시를 사용하지 않을 때(miss), 같은 이미지(hit),
+    다시 압축한 비슷한 이미지(near hit)의 응답 시간을 비교합니다.
+    """
+    from django.test import Client
+    from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+    photo = sample_image((4032, 3024), "JPEG")
+    with Image.open(io.BytesIO(photo)) as image:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=70)
+        recompressed = buffer.getvalue()
+
+    client = Client()
+
+    def upload(data):
+        image = io.BytesIO(data)
+        image.name = "photo.jpg"
+        response = client.patch(
+            "/api/call_image_caption/",
+            encode_multipart(BOUNDARY, {"image": image}),
+            content_type=MULTIPART_CONTENT,
+        )
+        assert response.status_code == 200, response.content
+
+    with fake_ai(latency=latency) as server:
+        results = {
+            "miss": timed(lambda: upload(photo), repeat, setup=caption_cache.clear),
+            "hit": timed(lambda: upload(photo), repeat),
+            "near hit": timed(lambda: upload(recompressed), repeat),
+        }
+        results["ai requests"] = server.request_count
+    return results
+
+
+# 벤치마크용 제보 위치의 위도 (실제 데이터와 겹치지 않도록 남극 좌표 사용)
+BENCH_LATITUDE = -89.0
+
+
+def _report_legacy(latitude, longitude):
+    # 기존 구현 (비교 기준): 읽기-수정-쓰기
+    try:
+        road_structure = RoadStructure.objects.get(
+            latitude=latitude, longitude=longitude
+        )
+        road_structure.weight += 0.5
+        road_structure.save()
+    except RoadStructure.DoesNotExist:
+        RoadStructure.objects.create(latitude=latitude, longitude=longitude, weight=0.5)
+
+
+def bench_report(repeat=5, concurrency=50, reports=20, spots=5, **kwargs):
+    """
+    concurrency개 스레드가 spots개 위치에 reports건씩 동시에 제보할 때의 처리 시간과
+    유실된 제보 수(lost, 1회 평균)를 비교합니다.
+    (legacy: 읽기-수정-쓰기, upsert: 단일 upsert 쿼리, buffer: write-behind 버퍼)
+    """
+    locations = [(BENCH_LATITUDE + i * 0.001, 0.0) for i in range(spots)]
+    bench_rows = RoadStructure.objects.filter(
+        latitude__gte=BENCH_LATITUDE, latitude__lt=BENCH_LATITUDE + 0.5
+    )
+    buffer = ReportBuffer(flush_interval=0.05).start()
+    variants = {
+        "legacy": (_report_legacy, None),
+        "upsert": (lambda lat, lon: add_weights({(lat, lon): 0.5}), None),
+        "buffer": (lambda lat, lon: buffer.add(lat, lon, 0.5), buffer.flush),
+    }
+
+    def run(submit, after):
+        def worker(n):
+            try:
+                for i in range(reports):
+                    try:
+                        submit(*locations[(n + i) % spots])
+                    # 동시에 같은 위치를 추가하다 실패한 경우 등 (유실로 집계)
+                    except Exception:
+                        pass
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(n,)) for n in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if after:
+            after()
+        # legacy는 weight, upsert/buffer는 제보 점수(score)를 증가시키므로 현재 위험도로 합산
+        rows = bench_rows.with_current_weight()
+        weight = rows.aggregate(total=Sum("current_weight"))["total"] or 0.0
+        lost.append(concurrency * reports - round(weight / 0.5))
+
+    results = {}
+    try:
+        for label, (submit, after) in variants.items():
+            lost = []
+            results[label] = timed(
+                lambda: run(submit, after), repeat, setup=bench_rows.delete
+            )
+            results[f"{label} lost"] = sum(lost) / len(lost)
+    finally:
+        bench_rows.delete()
+    return results
+
+
+def bench_import(repeat=1, rows=100_000, legacy_rows=2_000, **kwargs):
+    """
+    CSV 위험 구조물 데이터를 일괄로 가져오는 시간과 처리량(rows/s)을
+    기존 행 단위 저장(RoadStructure.create_table)과 비교합니다.
+    """
+    rng = random.Random(2)
+    bench_rows = RoadStructure.objects.filter(
+        latitude__gte=BENCH_LATITUDE, latitude__lt=BENCH_LATITUDE + 0.5
+    )
+    records = [
+        (
+            BENCH_LATITUDE + i * 1e-6,
+            rng.random() * 0.2,
+            rng.choice((0.0, 0.5, 1.0)),
+            rng.randint(0, 2),
+            rng.randint(0, 1),
+            rng.randint(0, 2),
+        )
+        for i in range(rows)
+    ]
+
+    def legacy():
+        for (
+            latitude,
+            longitude,
+            weight,
+            braille_block,
+            audio_signal,
+            bollard,
+        ) in records[:legacy_rows]:
+            RoadStructure.create_table(
+                latitude=latitude,
+                longitude=longitude,
+                weight=weight,
+                braille_block=braille_block,
+                audio_signal=audio_signal,
+                bollard=bollard,
+            )
+
+    results = {}
+    with tempfile.TemporaryFile("w+", newline="") as file:
+        file.write("latitude,longitude,weight,braille_block,audio_signal,bollard\n")
+        file.writelines(",".join(map(str, record)) + "\n" for record in records)
+
+        def bulk():
+            file.seek(0)
+            import_hazards(file, "csv")
+
+        try:
+            results[f"legacy {legacy_rows}"] = timed(
+                legacy, repeat, setup=bench_rows.delete
+            )
+            results[f"import {rows}"] = timed(bulk, repeat, setup=bench_rows.delete)
+            results["import (update)"] = timed(bulk, repeat)
+        finally:
+            bench_rows.delete()
+
+    results["legacy rows/s"] = legacy_rows / min(results[f"legacy {legacy_rows}"])
+    results["import rows/s"] = rows / min(results[f"import {rows}"])
+    return results
+
+
+def _route_legacy(start, end, candidates, alpha):
+    # 기존 구현: 안전도 상위 2개 후보의 4가지 경유지 조합을 모두 요청 (비교 기준)
+    if len(candidates) >= 2:
+        a, b = candidates[:2]
+        pass_lists = [[a], [b], [a, b], [b, a]]
+    else:
+        pass_lists = [[c] for c in candidates]
+    shortest_response, *paths = fetch_path_responses(start, end, [None] + pass_lists)
+    return select_optimal_route(shortest_response, paths, alpha)
+
+
+def bench_waypoints(repeat=5, latency=0.05, trips=50, hazards=20_000, **kwargs):
+    """
+    요청 1건 당 TMap 요청 수와 선택된 경로의 안전도 합(경유지 weight 합)을
+    기존 방식(상위 2개 후보, 4가지 조합)과 경유지 조합 탐색 방식으로 비교합니다.
+    """
+    points = random_points(hazards, seed=1)
+    xs, ys, ws = as_point_arrays(points)
+    weights = {(x, y): w for x, y, w in points}
+    rng = random.Random(2)
+    samples = []
+    for _ in range(trips):
+        start = (126.92 + rng.random() * 0.1, 37.52 + rng.random() * 0.06)
+        angle, length = rng.random() * 2 * np.pi, 0.003 + rng.random() * 0.012
+        end = (start[0] + length * np.cos(angle), start[1] + length * np.sin(angle))
+        midpoint, radius = calculate_midpoint_and_circle(start, end)
+        mask = circle_mask(xs, ys, midpoint, radius * CIRCLE_RADIUS_FACTOR)
+        inside = np.flatnonzero(mask)
+        samples.append((start, end, [points[i] for i in inside], ws[inside]))
+
+    def safety(route):
+        # 선택된 경로가 지나는 경유지의 weight 합
+        return sum(
+            weights.get(tuple(f["geometry"]["coordinates"]), 0.0)
+            for f in route["features"]
+            if f["properties"].get("pointType") == "PP"
+        )
+
+    alpha = views.ROUTE_ALPHA
+    methods = {
+        "legacy": lambda s, e, c, w: _route_legacy(
+            s, e, [c[i] for i in top_k_indices(w, 2)], alpha
+        ),
+        "waypoints": lambda s, e, c, w: find_optimal_route(
+            s,
+            e,
+            [c[i] for i in top_k_indices(w, ROUTING["WAYPOINT_CANDIDATES"])],
+            alpha,
+        ),
+    }
+    results = {}
+    with fake_tmap(latency=latency) as server:
+        for name, method in methods.items():
+            calls, scores = [], []
+
+            def run():
+                for start, end, candidates, candidate_weights in samples:
+                    route_cache.clear()
+                    count = server.request_count
+                    route = method(start, end, candidates, candidate_weights)
+                    calls.append(server.request_count - count)
+                    scores.append(safety(route))
+
+            results[name] = timed(run, repeat)
+            results[f"{name} calls/request"] = mean(calls)
+            results[f"{name} safety"] = mean(scores)
+    return results
+
+
+def bench_compact(repeat=5, vertices=300, hazards=100_000, **kwargs):
+    """
+    경로 응답(GeoJSON 원본)과 ?format=compact 간략 형식의 크기(KB)와 직렬화 시간을 비교합니다.
+    """
+    # 경유지 vertices개를 지나는 무작위 보행 경로 (약 vertices × 2개의 Feature)
+    rng = random.Random(3)
+    x, y, points = 126.95, 37.53, []
+    for _ in range(vertices):
+        x += (rng.random() - 0.3) * 0.0004
+        y += (rng.random() - 0.3) * 0.0004
+        points.append(f"{x:.7f},{y:.7f}")
+    route = fake_route_response(
+        {
+            "startX": 126.95,
+            "startY": 37.53,
+            "endX": x,
+            "endY": y,
+            "passList": "_".join(points),
+        }
+    )
+    index = GridIndex.from_points(random_points(hazards))
+    renderer = JSONRenderer()
+
+    raw = renderer.render(route)
+    compact = renderer.render(compact_route(route, index=index))
+    return {
+        "geojson": timed(lambda: renderer.render(route), repeat),
+        "compact": timed(
+            lambda: renderer.render(compact_route(route, index=index)), repeat
+        ),
+        "compact (no hazards)": timed(
+            lambda: renderer.render(compact_route(route, COMPACT_FIELDS[:-1])),
+            repeat,
+        ),
+        "geojson KB": len(raw) / 1024,
+        "geojson gzip KB": len(gzip.compress(raw)) / 1024,
+        "compact KB": len(compact) / 1024,
+        "compact gzip KB": len(gzip.compress(compact)) / 1024,
+    }
+
+
+# 벤치마크용 위험 구조물 데이터셋 영역 (실제 데이터와 겹치지 않도록 남대서양 좌표 사용)
+# (최소 경도, 최소 위도, 최대 경도, 최대 위도, 약 10km × 11km)
+BENCH_AREA = (0.0, -30.0, 0.1, -29.9)
+
+
+def bench_area_rows():
+    """
+    벤치마크용 데이터셋 영역의 RoadStructure 쿼리셋
+    """
+    min_x, min_y, max_x, max_y = BENCH_AREA
+    return RoadStructure.objects.filter(
+        longitude__gte=min_x,
+        longitude__lte=max_x,
+        latitude__gte=min_y,
+        latitude__lte=max_y,
+    )
+
+
+def reload_snapshot():
+    # DB를 직접 변경한 뒤 이 프로세스의 스냅샷에 반영
+    snapshot = peek_snapshot()
+    if snapshot is not None:
+        snapshot.load()
+
+
+def seed_dataset(size, seed=0):
+    """
+    BENCH_AREA 안에 무작위 위험 구조물 size개를 저장합니다. (기존 데이터셋은 삭제)
+    :return: [(x, y, weight), ...]
+    """
+    min_x, min_y, max_x, max_y = BENCH_AREA
+    rng = random.Random(seed)
+    points = [
+        (
+            round(min_x + rng.random() * (max_x - min_x), 7),
+            round(min_y + rng.random() * (max_y - min_y), 7),
+            rng.choice((0.0, 0.5, 1.0, 1.5, 2.0)),
+        )
+        for _ in range(size)
+    ]
+    bench_area_rows().delete()
+    for i in range(0, size, 5000):
+        write_batch({(y, x): {"weight": w} for x, y, w in points[i : i + 5000]})
+    reload_snapshot()
+    return points
+
+
+def bench_helpers(repeat=5, calls=1000, **kwargs):
+    """
+    navigation/function.py 경로 탐색 보조 함수들의 1회 호출 시간을 측정합니다.
+    """
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+    points = random_points(100_000)
+    xs, ys, _ = as_point_arrays(points)
+    midpoint, radius = calculate_midpoint_and_circle(start, end)
+    inside = points_within_distance(points, midpoint, 1000)
+    candidates = select_highest_safety_points(inside, k=ROUTING["WAYPOINT_CANDIDATES"])
+    route = fake_route_response(
+        {"startX": start[0], "startY": start[1], "endX": end[0], "endY": end[1]}
+    )
+    helpers = {
+        "route_cache_key": lambda: route_cache_key(start, end, candidates[:2]),
+        "midpoint_and_circle": lambda: calculate_midpoint_and_circle(start, end),
+        "distance_m 100k": lambda: distance_m(xs, ys, midpoint),
+        "within_distance 100k": lambda: points_within_distance(points, midpoint, 1000),
+        "highest_safety": lambda: select_highest_safety_points(
+            inside, k=ROUTING["WAYPOINT_CANDIDATES"]
+        ),
+        "plan_pass_lists": lambda: plan_pass_lists(start, end, candidates, 1.5),
+        "select_optimal": lambda: select_optimal_route(
+            route, [route] * 4, 1.5, [1.0, 2.0, 3.0, 4.0]
+        ),
+    }
+    results = {}
+    for label, func in helpers.items():
+        # 반복 횟수는 1회 호출이 대략 1ms 이하가 되도록 조정
+        started = time.perf_counter()
+        func()
+        n = max(1, min(calls, int(1e-3 / max(time.perf_counter() - started, 1e-9))))
+        results[label] = [
+            elapsed / n for elapsed in timed(lambda: [func() for _ in range(n)], repeat)
+        ]
+    return results
+
+
+def bench_load(
+    repeat=5,
+    latency=0.2,
+    concurrency=50,
+    error_rate=0.0,
+    sizes=(1_000, 10_000, 100_000),
+    **kwargs,
+):
+    """
+    멀티스레드 WSGI 서버에 동시 요청을 보내 API 별 응답 시간 분포(p50/p95/p99)와
+    처리량(req/s)을 측정합니다. (TMap, AI 서버는 로컬 서버로 대체)
+    - find_path: 위험 구조물 데이터셋 크기(sizes) 별로 측정 (출발지-목적지 거리 1.5km 이내)
+    - report, call_image_caption: 요청마다 다른 위치/이미지 사용
+    요청 수는 API 별 concurrency × repeat개입니다.
+    """
+    count = concurrency * repeat
+    min_x, min_y, max_x, max_y = BENCH_AREA
+    rng = random.Random(4)
+
+    def point():
+        return (
+            min_x + rng.random() * (max_x - min_x),
+            min_y + rng.random() * (max_y - min_y),
+        )
+
+    results = {}
+
+    def record(label, method, url, requests_kwargs):
+        elapsed, statuses, total = load_test(method, url, requests_kwargs, concurrency)
+        results[label] = elapsed
+        results[f"{label} req/s"] = len(elapsed) / total
+        results[f"{label} errors"] = sum(status >= 400 for status in statuses)
+
+    # 요청 별 로그는 출력하지 않음
+    log_requests, METRICS["LOG_REQUESTS"] = METRICS["LOG_REQUESTS"], False
+    with fake_tmap(latency=latency, error_rate=error_rate), fake_ai(
+        latency=latency, error_rate=error_rate
+    ), wsgi_server() as base_url:
+        try:
+            for size in sizes:
+                seed_dataset(size)
+                route_cache.clear()
+                trips = []
+                for _ in range(count):
+                    start_x, start_y = point()
+                    end_x = start_x + (rng.random() - 0.5) * 0.02
+                    end_y = start_y + (rng.random() - 0.5) * 0.02
+                    trips.append(
+                        {
+                            "params": {
+                                "start_x": start_x,
+                                "start_y": start_y,
+                                "end_x": end_x,
+                                "end_y": end_y,
+                            }
+                        }
+                    )
+                record(f"find_path {size}", "GET", base_url + "/api/find_path/", trips)
+
+            reports = []
+            for _ in range(count):
+                x, y = point()
+                reports.append({"json": {"latitude": y, "longitude": x}})
+            record("report", "PATCH", base_url + "/api/report/", reports)
+
+            caption_cache.clear()
+            images = [
+                {"files": {"image": ("photo.png", sample_image((64, 48), "PNG", i))}}
+                for i in range(count)
+            ]
+            record(
+                "call_image_caption",
+                "PATCH",
+                base_url + "/api/call_image_caption/",
+                images,
+            )
+        finally:
+            METRICS["LOG_REQUESTS"] = log_requests
+            bench_area_rows().delete()
+            reload_snapshot()
+    return results
+
+
+def bench_stream(repeat=5, latency=0.2, concurrency=50, size=10_000, **kwargs):
+    """
+    경로 탐색 응답 시간을 일반 응답과 스트리밍 응답(?stream=ndjson)으로 비교합니다.
+    스트리밍은 첫 이벤트(최단 경로)와 마지막 이벤트(최적 경로)까지의 시간을 측정합니다.
+    (TMap 경로 캐시는 매번 비우고, 동시 요청이 많으면 TMap 요청은 스레드 풀에서 대기)
+    """
+    count = concurrency * repeat
+    min_x, min_y, max_x, max_y = BENCH_AREA
+    rng = random.Random(7)
+    trips = []
+    for _ in range(count):
+        start_x = min_x + rng.random() * (max_x - min_x)
+        start_y = min_y + rng.random() * (max_y - min_y)
+        trips.append(
+            {
+                "start_x": start_x,
+                "start_y": start_y,
+                "end_x": start_x + (rng.random() - 0.5) * 0.02,
+                "end_y": start_y + (rng.random() - 0.5) * 0.02,
+            }
+        )
+
+    async def run(url):
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            pending = iter(trips)
+            first, last = [], []
+
+            async def worker():
+                for params in pending:
+                    started, first_event = time.perf_counter(), None
+                    async with client.stream(
+                        "GET", url, params={**params, "stream": "ndjson"}
+                    ) as response:
+                        async for _ in response.aiter_lines():
+                            if first_event is None:
+                                first_event = time.perf_counter() - started
+                    first.append(first_event)
+                    last.append(time.perf_counter() - started)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return first, last
+
+    results = {}
+    log_requests, METRICS["LOG_REQUESTS"] = METRICS["LOG_REQUESTS"], False
+    with fake_tmap(latency=latency), wsgi_server() as base_url:
+        try:
+            seed_dataset(size)
+            route_cache.clear()
+            results["plain"], _, _ = load_test(
+                "GET",
+                base_url + "/api/find_path/",
+                [{"params": params} for params in trips],
+                concurrency,
+            )
+            route_cache.clear()
+            results["stream first"], results["stream last"] = asyncio.run(
+                run(base_url + "/api/find_path/")
+            )
+        finally:
+            METRICS["LOG_REQUESTS"] = log_requests
+            bench_area_rows().delete()
+            reload_snapshot()
+    return results
+
+
+def bench_dedup(repeat=5, reports=500, spots=50, jitter=4.0, size=10_000, **kwargs):
+    """
+    같은 위험 구조물을 GPS 오차(jitter, m)가 있는 위치로 여러 번 제보할 때
+    제보 1건의 처리 시간과 늘어난 행 수를 병합 반경 별로 비교합니다.
+    (0: 같은 좌표만 합침, 그 외: REPORT["MERGE_RADIUS"])
+    """
+    rng = random.Random(6)
+    hazards = seed_dataset(size)
+    spots = rng.sample(hazards, spots)
+    scale = jitter / METERS_PER_DEGREE
+    locations = [
+        (y + rng.gauss(0, scale), x + rng.gauss(0, scale))
+        for x, y, _ in (spots[i % len(spots)] for i in range(reports))
+    ]
+
+    results = {}
+    try:
+        for radius in (0.0, REPORT["MERGE_RADIUS"]):
+            label = f"radius {radius:g}m"
+            elapsed = []
+            for _ in range(repeat):
+                seed_dataset(size)
+                started = time.perf_counter()
+                for latitude, longitude in locations:
+                    add_weights({(latitude, longitude): 0.5}, merge_radius=radius)
+                elapsed.append((time.perf_counter() - started) / reports)
+            results[label] = elapsed
+            results[f"{label} new rows"] = bench_area_rows().count() - size
+    finally:
+        bench_area_rows().delete()
+        reload_snapshot()
+    return results
+
+
+def bench_corridor(
+    repeat=5, latency=0.2, concurrency=50, corridors=20, size=10_000, **kwargs
+):
+    """
+    자주 요청되는 구간의 경로 탐색 응답 시간을 미리 계산된 경로 사용 여부 별로 비교합니다.
+    (TMap 경로 캐시는 매번 비우므로 live는 항상 TMap 요청)
+    """
+    count = concurrency * repeat
+    min_x, min_y, max_x, max_y = BENCH_AREA
+    rng = random.Random(5)
+    pairs = []
+    for _ in range(corridors):
+        start_x = min_x + rng.random() * (max_x - min_x)
+        start_y = min_y + rng.random() * (max_y - min_y)
+        end_x = start_x + (rng.random() - 0.5) * 0.02
+        end_y = start_y + (rng.random() - 0.5) * 0.02
+        pairs.append(((start_x, start_y), (end_x, end_y)))
+    trips = [
+        {
+            "params": {
+                "start_x": start[0],
+                "start_y": start[1],
+                "end_x": end[0],
+                "end_y": end[1],
+            }
+        }
+        for start, end in (pairs[i % corridors] for i in range(count))
+    ]
+
+    results = {}
+    routes = get_corridor_routes()
+    log_requests, METRICS["LOG_REQUESTS"] = METRICS["LOG_REQUESTS"], False
+    with fake_tmap(latency=latency), wsgi_server() as base_url:
+        try:
+            seed_dataset(size)
+            started = time.perf_counter()
+            precompute_routes(
+                pairs,
+                views.FindRouteView.find_candidates,
+                alpha=views.ROUTE_ALPHA,
+                prune=False,
+            )
+            results["precompute"] = [time.perf_counter() - started]
+
+            for label in ("live", "precomputed"):
+                route_cache.clear()
+                routes.clear()
+                if label == "precomputed":
+                    routes.load()
+                elapsed, _, total = load_test(
+                    "GET", base_url + "/api/find_path/", trips, concurrency
+                )
+                results[label] = elapsed
+                results[f"{label} req/s"] = len(elapsed) / total
+        finally:
+            METRICS["LOG_REQUESTS"] = log_requests
+            PrecomputedRoute.objects.filter(
+                key__in=[corridor_key(start, end) for start, end in pairs]
+            ).delete()
+            routes.clear()
+            bench_area_rows().delete()
+            reload_snapshot()
+    return results
+
+
+def bench_resilience(
+    repeat=5, latency=0.05, slow_rate=0.02, slow_latency=1.0, calls=20, **kwargs
+):
+    """
+    TMap 응답 일부가 느릴 때(slow_rate 비율이 slow_latency초) 경로 탐색 시간을
+    hedged request 사용 여부 별로, TMap 장애(모든 요청 오류) 시 응답 시간을
+    차단기(circuit breaker) 사용 여부 별로 비교합니다.
+    """
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+    a, b = (126.9850, 37.5690, 1.0), (126.9880, 37.5672, 0.5)
+
+    def route():
+        find_optimal_route(start, end, [a, b])
+
+    count = calls * repeat
+    results = {}
+    hedge_percentile = TMAP["HEDGE_PERCENTILE"]
+    breaker_failures = HTTP_CLIENTS["tmap"]["BREAKER_FAILURES"]
+    try:
+        with fake_tmap(latency=latency, slow_rate=slow_rate, slow_latency=slow_latency):
+            # 먼저 실행한 요청의 응답 시간으로 hedged request 대기 시간이 정해짐
+            TMAP["HEDGE_PERCENTILE"] = 0
+            results["slow tail"] = timed(route, count, setup=route_cache.clear)
+            TMAP["HEDGE_PERCENTILE"] = hedge_percentile or 95
+            results["slow tail, hedged"] = timed(route, count, setup=route_cache.clear)
+
+        with fake_tmap(latency=latency, error_rate=1.0):
+            for name, failures in (("outage", 0), ("outage, breaker", 5)):
+                HTTP_CLIENTS["tmap"]["BREAKER_FAILURES"] = failures
+                client._breakers.pop("tmap", None)
+                results[name] = timed(route, count, setup=route_cache.clear)
+    finally:
+        TMAP["HEDGE_PERCENTILE"] = hedge_percentile
+        HTTP_CLIENTS["tmap"]["BREAKER_FAILURES"] = breaker_failures
+        client._breakers.pop("tmap", None)
+        route_cache.clear()
+    return results
+
+
+def bench_quota(repeat=5, latency=0.2, concurrency=50, quota=20, **kwargs):
+    """
+    TMap 요청 한도(초당 quota개)를 넘는 부하에서 경로 탐색 시간과 처리량을
+    요청 스케줄러(같은 요청 합치기 + 초당 요청 수 제한) 사용 여부 별로 비교합니다.
+    (사용자 요청의 절반 정도는 다른 사용자와 같은 구간)
+    """
+    count = concurrency * repeat
+    rng = random.Random(8)
+    pool = [
+        (
+            (126.95 + rng.random() * 0.05, 37.53 + rng.random() * 0.05),
+            (126.95 + rng.random() * 0.05, 37.53 + rng.random() * 0.05),
+        )
+        for _ in range(count // 2)
+    ]
+    trips = [rng.choice(pool) for _ in range(count)]
+
+    def route(trip):
+        start, end = trip
+        a = ((start[0] * 2 + end[0]) / 3, (start[1] * 2 + end[1]) / 3, 1.0)
+        b = ((start[0] + end[0] * 2) / 3, (start[1] + end[1] * 2) / 3, 0.5)
+        started = time.perf_counter()
+        found = find_optimal_route(start, end, [a, b]) is not None
+        return time.perf_counter() - started, found
+
+    results = {}
+    scheduler = function.tmap_scheduler
+    # 1초 동안 보낼 수 있는 요청 수(BURST + RATE_LIMIT)가 한도를 넘지 않도록 설정
+    burst = max(quota // 5, 1)
+    # 429 오류로 차단기가 열리면 요청을 보내지 않으므로 비교에서 제외
+    breaker_failures = HTTP_CLIENTS["tmap"]["BREAKER_FAILURES"]
+    HTTP_CLIENTS["tmap"]["BREAKER_FAILURES"] = 0
+    try:
+        for name, rate in (("unscheduled", 0), ("scheduled", quota - burst)):
+            function.tmap_scheduler = RequestScheduler(
+                "tmap",
+                rate=rate,
+                burst=burst,
+                queue_timeout=TMAP["QUEUE_TIMEOUT"] or None,
+                coalesce=bool(rate),
+            )
+            route_cache.clear()
+            client._breakers.pop("tmap", None)
+            with fake_tmap(latency=latency, quota=quota) as server:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(concurrency) as executor:
+                    outcomes = list(executor.map(route, trips))
+                elapsed = time.perf_counter() - started
+                # deadline이 지나 기다리지 않은 TMap 요청까지 끝난 뒤 서버 종료
+                function.tmap_executor.wait_idle()
+            found = sum(found for _, found in outcomes)
+            results[name] = [seconds for seconds, _ in outcomes]
+            results[f"{name} found"] = found
+            results[f"{name} routes/s"] = found / elapsed
+            results[f"{name} tmap calls"] = server.request_count
+            results[f"{name} tmap 429"] = server.rejected_count
+    finally:
+        function.tmap_scheduler = scheduler
+        HTTP_CLIENTS["tmap"]["BREAKER_FAILURES"] = breaker_failures
+        client._breakers.pop("tmap", None)
+        route_cache.clear()
+    return results
+
+
+def bench_decay(repeat=5, size=100_000, reports=200, **kwargs):
+    """
+    제보 점수 감쇠 방식 별 비용을 비교합니다.
+    - rewrite: 모든 행의 위험도를 주기적으로 다시 쓰는 작업 1회 (UPDATE 전체 테이블)
+    - report: 제보 1건 반영 (제보된 행만 감쇠 후 증가)
+    - query_circle: 경유지 후보 조회 (조회한 점들의 현재 가중치를 한 번에 계산)
+    - annotate: 현재 위험도 상위 100개 DB 조회 (ORM 식으로 계산)
+    """
+    rng = random.Random(9)
+    points = seed_dataset(size)
+    snapshot = get_snapshot()
+    min_x, min_y, max_x, max_y = BENCH_AREA
+    center = ((min_x + max_x) / 2, (min_y + max_y) / 2)
+    spots = rng.sample(points, reports)
+
+    def report_all():
+        for x, y, _ in spots:
+            add_weights({(y, x): 0.5}, merge_radius=0)
+
+    try:
+        results = {
+            "rewrite": timed(
+                lambda: bench_area_rows().update(weight=F("weight") * 0.99), repeat
+            ),
+            "report": [
+                seconds / reports for seconds in timed(report_all, max(repeat // 2, 1))
+            ],
+            "query_circle": timed(
+                lambda: snapshot.query_circle(center, 0.01), repeat * 20
+            ),
+            "annotate": timed(
+                lambda: list(
+                    bench_area_rows()
+                    .with_current_weight()
+                    .order_by("-current_weight")
+                    .values_list("pk", "current_weight")[:100]
+                ),
+                repeat,
+            ),
+        }
+    finally:
+        bench_area_rows().delete()
+        reload_snapshot()
+    return results
+
+
+# 새 워커 프로세스의 시작 시간 측정 스크립트 (인자: 첫 요청의 쿼리 문자열, import/cold/warm)
+# 출력: {"import": 앱/URLconf import, "ready": WSGI 앱 준비, "first": 첫 요청 처리} (초)
+STARTUP_SCRIPT = """
+import json, sys, time, wsgiref.util
+started = time.perf_counter()
+import django
+django.setup()
+if sys.argv[2] == "import":
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    print(json.dumps({"import": time.perf_counter() - started}))
+    sys.exit()
+from backend.wsgi import application
+ready = time.perf_counter()
+environ = {"PATH_INFO": "/api/find_path/", "QUERY_STRING": sys.argv[1]}
+wsgiref.util.setup_testing_defaults(environ)
+statuses = []
+b"".join(application(environ, lambda status, headers: statuses.append(status)))
+assert statuses[0].startswith("200"), statuses[0]
+print(json.dumps({"ready": ready - started, "first": time.perf_counter() - ready}))
+"""
+
+
+def bench_startup(repeat=5, latency=0.2, size=10_000, **kwargs):
+    """
+    새 워커 프로세스의 시작 시간을 측정합니다. (매번 새 파이썬 프로세스 실행)
+    - import: django.setup()과 URLconf(뷰 모듈) import 시간
+    - cold/warm ready: WSGI 앱을 불러와 요청을 받을 수 있을 때까지 (warm: STARTUP["WARMUP"])
+    - cold/warm first response: 첫 경로 탐색 요청 처리 시간 (위험 구조물 size개, TMap 연결 포함)
+    """
+    min_x, min_y, max_x, max_y = BENCH_AREA
+    query = (
+        f"start_x={min_x + 0.02}&start_y={min_y + 0.02}"
+        f"&end_x={max_x - 0.02}&end_y={max_y - 0.02}"
+    )
+
+    def run(server, mode):
+        env = {
+            **os.environ,
+            # 벤치마크 프로세스와 같은 DB (test_database 사용 시 테스트 DB)
+            "DB_NAME": connection.settings_dict["NAME"],
+            "TMAP_API_URL": server.url,
+            "TMAP_APP_KEY": "fake",
+            "STARTUP_WARMUP": "true" if mode == "warm" else "false",
+            "METRICS_LOG_REQUESTS": "false",
+        }
+        process = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, query, mode],
+            cwd=BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr)
+        return json.loads(process.stdout.splitlines()[-1])
+
+    results = {
+        "import": [],
+        "cold ready": [],
+        "cold first response": [],
+        "warm ready": [],
+        "warm first response": [],
+    }
+    with FakeTMapServer(latency=latency) as server:
+        try:
+            seed_dataset(size)
+            for _ in range(repeat):
+                results["import"].append(run(server, "import")["import"])
+                for mode in ("cold", "warm"):
+                    timings = run(server, mode)
+                    results[f"{mode} ready"].append(timings["ready"])
+                    results[f"{mode} first response"].append(timings["first"])
+        finally:
+            bench_area_rows().delete()
+            reload_snapshot()
+    return results
+
+
+BENCHMARKS = {
+    "fanout": bench_fanout,
+    "filter": bench_filter,
+    "local_route": bench_local_route,
+    "asgi": bench_asgi,
+    "image": bench_image,
+    "caption": bench_caption,
+    "report": bench_report,
+    "import": bench_import,
+    "waypoints": bench_waypoints,
+    "compact": bench_compact,
+    "helpers": bench_helpers,
+    "load": bench_load,
+    "corridor": bench_corridor,
+    "dedup": bench_dedup,
+    "stream": bench_stream,
+    "resilience": bench_resilience,
+    "quota": bench_quota,
+    "decay": bench_decay,
+    "startup": bench_startup,
+    "prefilter": bench_prefilter,
+}
@@ -0,0 +1,300 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """
+    프로세스 내부 캐시 (LRU + TTL)
+    """
+
+    def __init__(self, max_entries=1024, timeout=600):
+        """
+        :param max_entries: 최대 저장 개수 (초과 시 가장 오래 사용되지 않은 항목부터 삭제)
+        :param timeout: 항목 유효 시간 (초)
+        """
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()  # key -> (만료 시각, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    async def aget(self, key):
+        # 메모리 조회만 하므로 이벤트 루프에서 바로 실행
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCache:
+    """
+    Django 캐시 프레임워크(CACHES 설정)를 사용하는 캐시
+    Redis, Memcached 등을 지정하면 여러 gunicorn 워커가 캐시를 공유합니다.
+    같은 캐시를 다른 용도와 함께 사용할 수 있도록 clear()는 이 프로세스가 저장한 키만 삭제합니다.
+    """
+
+    def __init__(self, alias="default", timeout=600, prefix=""):
+        """
+        :param alias: settings.CACHES의 캐시 이름
+        :param timeout: 항목 유효 시간 (초)
+        :param prefix: 캐시 키 접두사
+        """
+        from django.core.cache import caches
+
+        self._cache = caches[alias]
+        self.timeout = timeout
+        self.prefix = prefix
+        self._keys = OrderedDict()  # 저장한 키 -> 만료 시각 (clear에서 삭제할 키)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(self.prefix + key)
+
+    def set(self, key, value):
+        self._cache.set(self.prefix + key, value, self.timeout)
+        self._remember(key)
+
+    async def aget(self, key):
+        return await self._cache.aget(self.prefix + key)
+
+    async def aset(self, key, value):
+        await self._cache.aset(self.prefix + key, value, self.timeout)
+        self._remember(key)
+
+    def _remember(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._keys[key] = now + self.timeout
+            self._keys.move_to_end(key)
+            # 만료된 키는 기록에서 제거 (유효 시간이 모두 같으므로 오래된 키부터)
+            while self._keys and next(iter(self._keys.values())) < now:
+                self._keys.popitem(last=False)
+
+    def delete(self, key):
+        self._cache.delete(self.prefix + key)
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def clear(self):
+        """
+        이 프로세스가 저장한 키를 삭제합니다. (캐시의 다른 키와 다른 워커가 저장한 키는 유지)
+        """
+        with self._lock:
+            keys, self._keys = list(self._keys), OrderedDict()
+        self._cache.delete_many([self.prefix + key for key in keys])
+
+
+class CountingCache:
+    """
+    캐시 적중(hit)/실패(miss) 횟수를 기록하는 캐시 래퍼
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        self._count(value)
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    async def aget(self, key):
+        value = await self.backend.aget(key)
+        self._count(value)
+        return value
+
+    async def aset(self, key, value):
+        await self.backend.aset(key, value)
+
+    def _count(self, value):
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """
+        :return: {"hits": 적중 횟수, "misses": 실패 횟수, "hit_ratio": 적중률}
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class CaptionCache:
+    """
+    이미지 캡션 캐시
+    정규화된 이미지의 내용 해시로 먼저 조회하고, 없으면 지각 해시(perceptual hash)의
+    해밍 거리가 max_distance 이하인 비슷한 이미지의 캡션을 사용합니다.
+    지각 해시는 max_distance + 1개 구간으로 나누어 저장하므로 (비둘기집 원리로
+    비슷한 해시는 적어도 한 구간이 같음) get/set만 지원하는 백엔드에서도 동작합니다.
+    """
+
+    def __init__(self, backend, max_distance=4, bucket_size=16, hash_bits=64):
+        """
+        :param backend: LocalCache 또는 DjangoCache
+        :param max_distance: 비슷한 이미지로 판단하는 최대 해밍 거리 (음수이면 사용 안 함)
+        :param bucket_size: 지각 해시 구간 별로 보관하는 최대 이미지 수
+        :param hash_bits: 지각 해시 비트 수
+        """
+        self.backend = backend
+        self.max_distance = max_distance
+        self.bucket_size = bucket_size
+        bands = max(max_distance, 0) + 1
+        self.band_bits = -(-hash_bits // bands)  # 올림
+        self.bands = -(-hash_bits // self.band_bits)
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _band_keys(self, phash):
+        mask = (1 << self.band_bits) - 1
+        return [
+            f"phash:{i}:{(phash >> (i * self.band_bits)) & mask:x}"
+            for i in range(self.bands)
+        ]
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def peek(self, digest):
+        """
+        내용 해시로만 조회합니다. (실패는 기록하지 않음, 이미지 변환 전 원본 조회용)
+        :return: 캡션 (없으면 None)
+        """
+        caption = self.backend.get(f"content:{digest}")
+        if caption is not None:
+            self._count("hits")
+        return caption
+
+    def get(self, digest, phash=None):
+        """
+        :param digest: 정규화된 이미지의 내용 해시
+        :param phash: 지각 해시 (None이면 같은 이미지만 조회)
+        :return: 캡션 (없으면 None)
+        """
+        caption = self.backend.get(f"content:{digest}")
+        if caption is not None:
+            self._count("hits")
+            return caption
+
+        if phash is not None and self.max_distance >= 0:
+            # 구간이 같은 이미지 중 해밍 거리가 가장 가까운 이미지
+            candidates = {}
+            for key in self._band_keys(phash):
+                for other_phash, other_digest in self.backend.get(key) or ():
+                    distance = (phash ^ other_phash).bit_count()
+                    if distance <= self.max_distance:
+                        candidates[other_digest] = distance
+            for other_digest in sorted(candidates, key=candidates.get):
+                caption = self.backend.get(f"content:{other_digest}")
+                if caption is not None:
+                    self._count("near_hits")
+                    return caption
+
+        self._count("misses")
+        return None
+
+    def set(self, digests, phash, caption):
+        """
+        :param digests: 내용 해시 목록 (첫 번째가 정규화된 이미지, 그 외는 원본 등)
+        :param phash: 지각 해시 (None이면 내용 해시로만 저장)
+        :param caption: 캡션
+        """
+        digest = digests[0]
+        for other_digest in digests:
+            self.backend.set(f"content:{other_digest}", caption)
+        if phash is None or self.max_distance < 0:
+            return
+        for key in self._band_keys(phash):
+            bucket = [
+                entry for entry in self.backend.get(key) or () if entry[1] != digest
+            ]
+            self.backend.set(key, [(phash, digest), *bucket][: self.bucket_size])
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """
+        :return: {"hits": 같은 이미지 적중, "near_hits": 비슷한 이미지 적중,
+            "misses": 실패 횟수, "hit_ratio": 적중률}
+        """
+        total = self.hits + self.near_hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.near_hits) / total if total else 0.0,
+        }
+
+
+def build_backend(config, prefix=""):
+    """
+    설정에 맞는 캐시 백엔드를 생성합니다.
+    :param config: {"BACKEND": "local" | "django", "TIMEOUT": ..., "MAX_ENTRIES": ..., "DJANGO_CACHE": ...}
+    :param prefix: Django 캐시 키 접두사
+    :return: LocalCache 또는 DjangoCache
+    """
+    if config["BACKEND"] == "django":
+        return DjangoCache(
+            alias=config["DJANGO_CACHE"], timeout=config["TIMEOUT"], prefix=prefix
+        )
+    return LocalCache(max_entries=config["MAX_ENTRIES"], timeout=config["TIMEOUT"])
+
+
+def build_cache(config, prefix=""):
+    """
+    설정에 맞는 캐시를 생성합니다.
+    :param config: {"BACKEND": "local" | "django", "TIMEOUT": ..., "MAX_ENTRIES": ..., "DJANGO_CACHE": ...}
+    :param prefix: Django 캐시 키 접두사
+    :return: CountingCache
+    """
+    return CountingCache(build_backend(config, prefix=prefix))
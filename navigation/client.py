@@ -0,0 +1,399 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+from backend.settings import HTTP_CLIENTS
+
+# 외부 요청이 끝날 때마다 호출되는 함수 목록 (메트릭 수집용)
+# hook(client_name, method, url, status_code, elapsed, error)
+request_hooks = []
+
+
+def add_request_hook(hook):
+    """
+    외부 요청 완료 시 호출할 함수를 등록합니다.
+    :param hook: hook(client_name, method, url, status_code, elapsed, error)
+        status_code는 응답이 없으면 None, error는 예외가 없으면 None입니다.
+    """
+    if hook not in request_hooks:
+        request_hooks.append(hook)
+
+
+class CircuitOpenError(Exception):
+    """
+    차단기(circuit breaker)가 열려 있어 요청을 보내지 않음
+    """
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 failures번 이상이면 recovery초 동안 요청을 막는 차단기 (circuit breaker)
+    recovery초가 지나면 요청 1개만 보내 보고(half-open), 성공하면 다시 허용합니다.
+    """
+
+    def __init__(self, failures=5, recovery=10.0):
+        """
+        :param failures: 차단하는 연속 실패 횟수
+        :param recovery: 차단 시간 (초)
+        """
+        self.failures = failures
+        self.recovery = recovery
+        self.consecutive_failures = 0
+        self.opened_at = None  # 차단 시작 시각 (None이면 허용)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        :return: "closed" (허용), "open" (차단), "half_open" (시험 요청 허용)
+        """
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.recovery:
+            return "open"
+        return "half_open"
+
+    def allow(self):
+        """
+        요청을 보내도 되는지 확인합니다. (half-open 상태에서는 한 번에 1개만 허용)
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.recovery or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self):
+        """
+        결과를 기록하지 않고 시험 요청(half-open) 자리를 비웁니다. (취소된 요청)
+        """
+        with self._lock:
+            self._probing = False
+
+    def record(self, success):
+        """
+        요청 결과를 기록합니다.
+        :param success: 응답을 받았고 서버 오류(5xx, 429)가 아닌지 여부
+        """
+        with self._lock:
+            self._probing = False
+            if success:
+                self.consecutive_failures = 0
+                self.opened_at = None
+                return
+            self.consecutive_failures += 1
+            # 시험 요청이 실패하면 다시 차단
+            if self.opened_at is not None or self.consecutive_failures >= self.failures:
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """
+    최근 성공한 요청의 응답 시간 (hedged request 대기 시간 계산용)
+    """
+
+    def __init__(self, size=512):
+        """
+        :param size: 보관하는 최근 응답 수
+        """
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, elapsed):
+        with self._lock:
+            self._samples.append(elapsed)
+
+    def percentile(self, q, min_samples=1):
+        """
+        :param q: 백분위수 (0~100)
+        :param min_samples: 필요한 최소 응답 수
+        :return: 응답 시간 (초, 응답 수가 부족하면 None)
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+
+# 클라이언트 이름 별 차단기와 응답 시간 (동기/비동기 클라이언트가 공유)
+_breakers = {}
+_latencies = {}
+_state_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """
+    settings.HTTP_CLIENTS[name]의 차단기를 반환합니다.
+    :return: CircuitBreaker (BREAKER_FAILURES가 0이거나 설정이 없으면 None)
+    """
+    with _state_lock:
+        if name not in _breakers:
+            config = HTTP_CLIENTS.get(name, {})
+            failures = config.get("BREAKER_FAILURES", 0)
+            _breakers[name] = (
+                CircuitBreaker(failures, config["BREAKER_RECOVERY"])
+                if failures > 0
+                else None
+            )
+        return _breakers[name]
+
+
+def get_latency(name):
+    """
+    클라이언트의 최근 응답 시간을 반환합니다.
+    :return: LatencyTracker
+    """
+    with _state_lock:
+        if name not in _latencies:
+            _latencies[name] = LatencyTracker()
+        return _latencies[name]
+
+
+def check_breaker(name, method, url):
+    """
+    차단기가 열려 있으면 요청을 보내지 않고 CircuitOpenError를 발생시킵니다.
+    """
+    breaker = get_breaker(name)
+    if breaker is not None and not breaker.allow():
+        error = CircuitOpenError(f"{name} circuit breaker is open")
+        for hook in request_hooks:
+            hook(name, method, url, None, 0.0, error)
+        raise error
+
+
+def record_request(client, method, url, status_code, elapsed, error):
+    """
+    요청 결과를 차단기와 응답 시간에 기록합니다. (add_request_hook으로 등록)
+    """
+    if isinstance(error, CircuitOpenError):
+        return
+    success = status_code is not None and status_code < 500 and status_code != 429
+    breaker = get_breaker(client)
+    if breaker is not None:
+        breaker.record(success)
+    if success:
+        get_latency(client).add(elapsed)
+
+
+add_request_hook(record_request)
+
+
+class HttpClient:
+    """
+    keep-alive 연결 풀을 사용하는 외부 HTTP 클라이언트
+    """
+
+    def __init__(
+        self,
+        name,
+        pool_connections=4,
+        pool_maxsize=8,
+        connect_timeout=3.05,
+        read_timeout=5.0,
+        retries=2,
+        backoff_factor=0.2,
+        retry_methods=(),
+    ):
+        """
+        :param name: 클라이언트 이름 (메트릭 구분용)
+        :param pool_connections: 연결 풀을 유지할 호스트 수
+        :param pool_maxsize: 호스트 당 최대 연결 수
+        :param connect_timeout: 연결 제한 시간 (초)
+        :param read_timeout: 응답 대기 제한 시간 (초)
+        :param retries: 최대 재시도 횟수 (연결 실패는 요청을 보내지 않았으므로 모든 메서드 재시도)
+        :param backoff_factor: 재시도 대기 시간 계수 (backoff_factor * 2^(n-1) 초)
+        :param retry_methods: 응답을 받지 못했거나 502/503/504일 때도 재시도할 HTTP 메서드
+            (서버가 같은 요청을 두 번 처리해도 되는 조회성 요청만 지정, 디폴트: 재시도 안 함)
+        """
+        # requests, httpx는 클라이언트를 처음 만들 때 import (워커 시작 시간 단축)
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        # allowed_methods가 비어 있으면 모든 메서드를 재시도하므로 횟수를 0으로 지정
+        response_retries = retries if retry_methods else 0
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=response_retries,
+            status=response_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504) if retry_methods else (),
+            allowed_methods=frozenset(retry_methods),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """
+        HTTP 요청을 보냅니다. (timeout을 지정하지 않으면 클라이언트 설정값 사용)
+        :return: requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        check_breaker(self.name, method, url)
+        started = time.perf_counter()
+        response, error = None, None
+        try:
+            response = self.session.request(method, url, **kwargs)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            status_code = response.status_code if response is not None else None
+            for hook in request_hooks:
+                hook(self.name, method, url, status_code, elapsed, error)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """
+    settings.HTTP_CLIENTS에 정의된 클라이언트를 반환합니다.
+    연결 풀은 워커 프로세스마다 따로 생성합니다. (fork 이후 소켓 공유 방지)
+    :param name: 클라이언트 이름 ("tmap", "ai")
+    :return: HttpClient
+    """
+    global _clients_pid
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(name)
+        if client is None:
+            config = HTTP_CLIENTS[name]
+            client = _clients[name] = HttpClient(
+                name,
+                pool_connections=config["POOL_CONNECTIONS"],
+                pool_maxsize=config["POOL_MAXSIZE"],
+                connect_timeout=config["CONNECT_TIMEOUT"],
+                read_timeout=config["READ_TIMEOUT"],
+                retries=config["RETRIES"],
+                backoff_factor=config["BACKOFF_FACTOR"],
+                retry_methods=config["RETRY_METHODS"],
+            )
+        return client
+
+
+class AsyncHttpClient:
+    """
+    keep-alive 연결 풀을 사용하는 비동기 외부 HTTP 클라이언트 (ASGI 뷰용)
+    """
+
+    def __init__(
+        self,
+        name,
+        pool_maxsize=8,
+        connect_timeout=3.05,
+        read_timeout=5.0,
+        retries=2,
+    ):
+        """
+        :param name: 클라이언트 이름 (메트릭 구분용)
+        :param pool_maxsize: 최대 연결 수
+        :param connect_timeout: 연결 제한 시간 (초)
+        :param read_timeout: 응답 대기 제한 시간 (초)
+        :param retries: 연결 실패 시 최대 재시도 횟수
+        """
+        import httpx
+
+        self.name = name
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=retries),
+        )
+
+    async def request(self, method, url, **kwargs):
+        """
+        HTTP 요청을 보냅니다.
+        :return: httpx.Response
+        """
+        check_breaker(self.name, method, url)
+        started = time.perf_counter()
+        response, error = None, None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            status_code = response.status_code if response is not None else None
+            # 취소된 요청(먼저 끝난 hedged request, 연결 종료)은 기록하지 않음
+            if response is not None or error is not None:
+                for hook in request_hooks:
+                    hook(self.name, method, url, status_code, elapsed, error)
+            else:
+                # 시험 요청이 취소되어도 다음 요청이 시험 요청을 보낼 수 있도록 함
+                breaker = get_breaker(self.name)
+                if breaker is not None:
+                    breaker.release()
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# 이벤트 루프 별 비동기 클라이언트 (httpx 연결은 생성된 이벤트 루프에서만 사용 가능)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(name):
+    """
+    settings.HTTP_CLIENTS에 정의된 비동기 클라이언트를 반환합니다.
+    :param name: 클라이언트 이름 ("tmap", "ai")
+    :return: AsyncHttpClient
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(name)
+    if client is None:
+        config = HTTP_CLIENTS[name]
+        client = clients[name] = AsyncHttpClient(
+            name,
+            pool_maxsize=config["ASYNC_POOL_MAXSIZE"],
+            connect_timeout=config["CONNECT_TIMEOUT"],
+            read_timeout=config["READ_TIMEOUT"],
+            retries=config["RETRIES"],
+        )
+    return client
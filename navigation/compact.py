@@ -0,0 +1,189 @@
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+
+from backend.settings import ROUTING
+from .function import EARTH_RADIUS, as_point_arrays
+from .snapshot import get_snapshot
+
+# 인코딩 폴리라인 좌표 정밀도 (소수점 자릿수, Google 형식과 같음)
+POLYLINE_PRECISION = 5
+
+# 경로 주변 위험 구조물을 찾을 때 한 번에 조회하는 선분 수
+HAZARD_CHUNK_SIZE = 16
+
+# 간략 형식의 필드 (fields 파라미터로 일부만 선택 가능)
+COMPACT_FIELDS = ("distance", "time", "polyline", "instructions", "hazards")
+
+
+class CompactRouteRenderer(JSONRenderer):
+    """
+    ?format=compact 요청을 처리하는 렌더러
+    출력은 JSON과 같고, 응답 내용은 뷰에서 compact_route로 변환합니다.
+    """
+
+    format = "compact"
+
+
+def parse_fields(format, fields):
+    """
+    응답 형식과 fields 파라미터("polyline,time")를 검증합니다.
+    :param format: format 파라미터
+    :param fields: fields 파라미터 (쉼표로 구분)
+    :return: 간략 형식이면 포함할 필드 튜플 (fields가 없으면 전체), 아니면 None
+    """
+    if format != CompactRouteRenderer.format:
+        return None
+    if not fields:
+        return COMPACT_FIELDS
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names.difference(COMPACT_FIELDS)
+    if unknown:
+        raise ValueError(f"알 수 없는 필드입니다: {', '.join(sorted(unknown))}")
+    return tuple(name for name in COMPACT_FIELDS if name in names)
+
+
+def encode_polyline(coordinates, precision=POLYLINE_PRECISION):
+    """
+    좌표 목록을 Google encoded polyline 문자열로 변환합니다. (위도, 경도 순으로 인코딩)
+    :param coordinates: [(x, y), ...] (경도, 위도)
+    :param precision: 좌표 소수점 자릿수
+    :return: 인코딩된 문자열
+    """
+    if len(coordinates) == 0:
+        return ""
+    points = np.asarray(coordinates, dtype=np.float64)[:, 1::-1]
+    points = np.round(points * 10**precision).astype(np.int64)
+    deltas = np.diff(points, axis=0, prepend=[[0, 0]]).ravel()
+    # 부호를 최하위 비트로 옮긴 뒤 하위 5비트씩 문자로 변환
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1).tolist()
+    chars = []
+    for value in values:
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def route_geometry(route):
+    """
+    TMap 경로 응답에서 경로 좌표와 안내 지점 목록을 추출합니다.
+    :param route: TMap API 응답 데이터 (GeoJSON FeatureCollection)
+    :return: ([(x, y), ...], [{"index", "turn_type", "point_type", "description"}, ...])
+        안내 지점의 index는 경로 좌표 목록에서의 위치
+    """
+    coordinates = []
+    instructions = []
+
+    def append(point):
+        point = (point[0], point[1])
+        if not coordinates or coordinates[-1] != point:
+            coordinates.append(point)
+
+    for feature in route["features"]:
+        geometry = feature["geometry"]
+        if geometry["type"] == "LineString":
+            for point in geometry["coordinates"]:
+                append(point)
+        elif geometry["type"] == "Point":
+            append(geometry["coordinates"])
+            properties = feature["properties"]
+            instructions.append(
+                {
+                    "index": len(coordinates) - 1,
+                    "turn_type": properties.get("turnType"),
+                    "point_type": properties.get("pointType"),
+                    "description": properties.get("description", ""),
+                }
+            )
+    return coordinates, instructions
+
+
+def hazards_along_route(coordinates, radius_m=None, index=None):
+    """
+    경로에서 radius_m(m) 이내에 있는 위험 구조물을 경로 진행 순서대로 반환합니다.
+    경로를 HAZARD_CHUNK_SIZE개 선분씩 나누어 구간 주변의 점들만 조회하고 거리를 계산합니다.
+    :param coordinates: 경로 좌표 [(x, y), ...]
+    :param radius_m: 경로로부터의 거리 (m) (디폴트: ROUTING["HAZARD_RADIUS"])
+    :param index: query_bbox를 지원하는 공간 인덱스 (디폴트: 위험 구조물 스냅샷)
+    :return: [[x, y, weight], ...]
+    """
+    if radius_m is None:
+        radius_m = ROUTING["HAZARD_RADIUS"]
+    if index is None:
+        index = get_snapshot()
+    if len(coordinates) == 0:
+        return []
+
+    line = np.asarray(coordinates, dtype=np.float64)
+    if len(line) == 1:
+        line = np.vstack([line, line])
+    cos_lat = np.cos(np.radians(line[:, 1].mean()))
+    pad = np.degrees(radius_m / EARTH_RADIUS) * np.array([1 / cos_lat, 1.0])
+    # 경로의 평균 위도 기준 평면 좌표 (m)
+    scale = np.radians(1.0) * EARTH_RADIUS * np.array([cos_lat, 1.0])
+    origin = line[0]
+    path = (line - origin) * scale
+
+    nearest = {}  # 위험 구조물 -> (선분 번호, 선분 위 위치)
+    for first in range(0, len(line) - 1, HAZARD_CHUNK_SIZE):
+        last = min(first + HAZARD_CHUNK_SIZE, len(line) - 1)
+        chunk = line[first : last + 1]
+        candidates = index.query_bbox(
+            *(chunk.min(axis=0) - pad), *(chunk.max(axis=0) + pad)
+        )
+        if not candidates:
+            continue
+
+        # 구간 주변 점에서 구간의 각 선분까지의 거리 (점 수 × 선분 수)
+        xs, ys, _ = as_point_arrays(candidates)
+        points = (np.column_stack([xs, ys]) - origin) * scale
+        a, ab = path[first:last], path[first + 1 : last + 1] - path[first:last]
+        length2 = (ab**2).sum(axis=1)
+        ap = points[:, None, :] - a[None, :, :]
+        t = np.divide(
+            (ap * ab).sum(axis=2),
+            length2,
+            out=np.zeros(ap.shape[:2]),
+            where=length2 > 0,
+        )
+        t = np.clip(t, 0.0, 1.0)
+        distances = np.hypot(*(ap - t[:, :, None] * ab).transpose(2, 0, 1))
+
+        segment = distances.argmin(axis=1)
+        rows = np.arange(len(candidates))
+        for i in np.flatnonzero(distances[rows, segment] <= radius_m).tolist():
+            # 여러 구간에 걸친 점은 먼저 지나는 구간 기준
+            nearest.setdefault(
+                candidates[i], (first + int(segment[i]), float(t[i, segment[i]]))
+            )
+
+    return [list(hazard) for hazard in sorted(nearest, key=nearest.get)]
+
+
+def compact_route(route, fields=COMPACT_FIELDS, index=None):
+    """
+    TMap 경로 응답을 모바일용 간략 형식으로 변환합니다.
+    - distance, time: 총 거리 (m), 총 소요 시간 (초)
+    - polyline: 경로 좌표의 인코딩 폴리라인 (Google 형식, 위도/경도 순)
+    - instructions: 안내 지점 목록 (index는 폴리라인 좌표 위치)
+    - hazards: 경로 주변 위험 구조물 [[x, y, weight], ...]
+    :param route: TMap API 응답 데이터
+    :param fields: 포함할 필드 (디폴트: 전체)
+    :param index: 위험 구조물 공간 인덱스 (디폴트: 위험 구조물 스냅샷)
+    :return: 간략 형식 dict
+    """
+    properties = route["features"][0]["properties"] if route["features"] else {}
+    coordinates, instructions = route_geometry(route)
+    data = {}
+    if "distance" in fields:
+        data["distance"] = properties.get("totalDistance")
+    if "time" in fields:
+        data["time"] = properties.get("totalTime")
+    if "polyline" in fields:
+        data["polyline"] = encode_polyline(coordinates)
+    if "instructions" in fields:
+        data["instructions"] = instructions
+    if "hazards" in fields:
+        data["hazards"] = hazards_along_route(coordinates, index=index)
+    return data
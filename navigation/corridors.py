@@ -0,0 +1,359 @@
+import csv
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from backend.settings import CORRIDORS
+from .function import find_optimal_routes, route_cache_key
+from .metrics import register_cache
+from .models import PrecomputedRoute
+from .snapshot import get_snapshot
+
+# 요청 로그에서 구간을 찾을 경로 탐색 뷰 (resolver view_name)
+ROUTE_VIEWS = ("navigation:find_path", "navigation:async_find_path")
+
+# 미리 계산된 경로를 DB에서 한 번에 읽는 개수
+LOAD_BATCH_SIZE = 100
+
+
+def corridor_key(start, end, precision=None):
+    """
+    구간 키를 생성합니다. (출발지/목적지 좌표를 precision 자릿수로 반올림)
+    :param precision: 좌표 소수점 자릿수 (디폴트: CORRIDORS["PRECISION"])
+    """
+    if precision is None:
+        precision = CORRIDORS["PRECISION"]
+    return route_cache_key(start, end, precision=precision)
+
+
+def as_candidates(points):
+    """
+    경유지 후보를 비교할 수 있는 형식으로 변환합니다. (JSON에서 읽은 리스트 포함)
+    :return: ((x, y, weight), ...)
+    """
+    return tuple((float(x), float(y), float(weight)) for x, y, weight in points)
+
+
+def candidate_points(candidates):
+    """
+    경유지 후보의 위치만 반환합니다. (미리 계산된 경로를 계속 사용할 수 있는지 비교할 때 사용,
+    제보 점수는 시간에 따라 계속 감쇠하므로 가중치 대신 선택된 위치가 바뀌었는지 비교)
+    :return: ((x, y), ...)
+    """
+    return tuple((x, y) for x, y, _ in as_candidates(candidates))
+
+
+def read_corridors(file):
+    """
+    구간 목록 CSV를 읽습니다. (start_x, start_y, end_x, end_y 열)
+    :return: [(출발지, 목적지), ...]
+    """
+    return [
+        (
+            (float(record["start_x"]), float(record["start_y"])),
+            (float(record["end_x"]), float(record["end_y"])),
+        )
+        for record in csv.DictReader(file)
+    ]
+
+
+def mine_corridors(lines, top=None, min_count=None, precision=None):
+    """
+    navigation.requests 요청 로그에서 자주 요청된 구간을 찾습니다.
+    성공(200)한 경로 탐색 요청의 좌표를 precision 자릿수로 반올림하여 셉니다.
+    :param lines: 로그 줄 이터레이터 (JSON 앞의 시각 등 접두사는 무시)
+    :param top: 찾을 구간 수 (디폴트: CORRIDORS["TOP"])
+    :param min_count: 최소 요청 수 (디폴트: CORRIDORS["MIN_COUNT"])
+    :param precision: 좌표 소수점 자릿수 (디폴트: CORRIDORS["PRECISION"])
+    :return: 요청 수 내림차순 [(출발지, 목적지), ...]
+    """
+    if top is None:
+        top = CORRIDORS["TOP"]
+    if min_count is None:
+        min_count = CORRIDORS["MIN_COUNT"]
+    if precision is None:
+        precision = CORRIDORS["PRECISION"]
+
+    counts = Counter()
+    for line in lines:
+        position = line.find("{")
+        if position < 0:
+            continue
+        try:
+            record = json.loads(line[position:])
+            if record["view"] not in ROUTE_VIEWS or record["status"] != 200:
+                continue
+            query = record["query"]
+            start = (float(query["start_x"]), float(query["start_y"]))
+            end = (float(query["end_x"]), float(query["end_y"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        counts[
+            (
+                (round(start[0], precision), round(start[1], precision)),
+                (round(end[0], precision), round(end[1], precision)),
+            )
+        ] += 1
+    return [pair for pair, count in counts.most_common(top) if count >= min_count]
+
+
+class CorridorRoutes:
+    """
+    미리 계산된 구간 경로의 워커 프로세스 내부 사본
+    DB(PrecomputedRoute)에서 새로 계산된 경로만 주기적으로 읽어 옵니다.
+    조회 시 현재 스냅샷의 경유지 후보가 계산 당시와 같을 때만 사용합니다.
+    - 계산 이후 스냅샷이 바뀌지 않았으면(같은 버전) 후보를 다시 찾지 않음
+    - 바뀌었으면 스냅샷 revision 별로 구간 당 한 번만 후보를 다시 찾아 비교
+    (후보가 바뀐 경로도 TMap 장애 시 대체 경로(fallback)로 사용하도록 보관)
+    """
+
+    def __init__(self, max_age=24 * 3600):
+        """
+        :param max_age: 미리 계산된 경로의 최대 사용 기간 (초)
+        """
+        self.max_age = max_age
+        # 구간 키 -> (출발지, 목적지, 경유지 후보, 경로, 계산 시각, 스냅샷 버전)
+        self._entries = {}
+        # 구간 키 -> (스냅샷 revision, 경유지 후보가 그대로인지 여부)
+        self._checked = {}
+        # 읽어 온 행의 계산 시각 (사용하지 않게 된 행 포함)
+        self._loaded = {}
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, start, end, find_candidates):
+        """
+        :param start: 출발지 좌표 (x, y)
+        :param end: 목적지 좌표 (x, y)
+        :param find_candidates: 구간의 경유지 후보를 반환하는 함수 find_candidates(start, end)
+        :return: 미리 계산된 경로 (없거나 구간 안의 위험 구조물이 바뀌었으면 None)
+        """
+        key = corridor_key(start, end)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+
+        route, computed_at = entry[3], entry[4]
+        if time.time() - computed_at > self.max_age or not self._unchanged(
+            key, entry, find_candidates
+        ):
+            # 다시 계산된 경로를 읽어 올 때까지 사용하지 않음
+            self._count("stale")
+            return None
+        self._count("hits")
+        return route
+
+    def _unchanged(self, key, entry, find_candidates):
+        """
+        구간의 경유지 후보가 경로 계산 당시와 같은지 확인합니다.
+        """
+        entry_start, entry_end, candidates, _, _, version = entry
+        snapshot = get_snapshot()
+        if snapshot.version == version:
+            return True
+        revision = snapshot.revision
+        checked = self._checked.get(key)
+        if checked is not None and checked[0] == revision:
+            return checked[1]
+        unchanged = candidate_points(
+            find_candidates(entry_start, entry_end)
+        ) == candidate_points(candidates)
+        self._checked[key] = (revision, unchanged)
+        return unchanged
+
+    def fallback(self, start, end):
+        """
+        위험 구조물 변경 여부와 관계없이 미리 계산된 경로를 반환합니다.
+        (TMap 장애나 응답 시간 초과로 경로를 찾지 못했을 때 사용)
+        :param start: 출발지 좌표 (x, y)
+        :param end: 목적지 좌표 (x, y)
+        :return: 미리 계산된 경로 (없으면 None)
+        """
+        entry = self._entries.get(corridor_key(start, end))
+        return entry[3] if entry else None
+
+    def load(self):
+        """
+        DB에서 새로 계산되거나 삭제된 구간 경로를 반영합니다.
+        :return: 새로 읽은 경로 수
+        """
+        current = dict(PrecomputedRoute.objects.values_list("key", "computed_at"))
+        changed = [key for key, at in current.items() if self._loaded.get(key) != at]
+
+        entries = {}
+        for i in range(0, len(changed), LOAD_BATCH_SIZE):
+            for row in PrecomputedRoute.objects.filter(
+                key__in=changed[i : i + LOAD_BATCH_SIZE]
+            ):
+                entries[row.key] = (
+                    (row.start_x, row.start_y),
+                    (row.end_x, row.end_y),
+                    as_candidates(row.candidates),
+                    row.route,
+                    row.computed_at.timestamp(),
+                    row.version,
+                )
+                current[row.key] = row.computed_at
+
+        with self._lock:
+            self._entries = {
+                key: entry for key, entry in self._entries.items() if key in current
+            }
+            self._entries.update(entries)
+            self._loaded = current
+            self._checked = {
+                key: checked
+                for key, checked in self._checked.items()
+                if key in self._entries and key not in entries
+            }
+        return len(entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loaded.clear()
+            self._checked.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        :return: {"hits": 적중 횟수, "stale": 위험 구조물 변경으로 사용하지 않은 횟수,
+            "misses": 실패 횟수, "hit_ratio": 적중률}
+        """
+        total = self.hits + self.stale + self.misses
+        return {
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+def _poll(routes, interval):
+    while True:
+        try:
+            close_old_connections()
+            routes.load()
+        except Exception as e:
+            print(f"Precomputed route refresh failed: {str(e)}")
+        time.sleep(interval)
+
+
+_routes = None
+_routes_pid = None
+_routes_lock = threading.Lock()
+
+
+def get_corridor_routes():
+    """
+    워커 프로세스의 미리 계산된 구간 경로를 반환합니다.
+    최초 호출 시 DB에서 읽어 오는 스레드를 시작합니다. (요청 처리 중에는 DB 조회 안 함)
+    :return: CorridorRoutes
+    """
+    global _routes, _routes_pid
+    routes = _routes
+    if routes is not None and _routes_pid == os.getpid():
+        return routes
+
+    with _routes_lock:
+        if _routes is None or _routes_pid != os.getpid():
+            routes = CorridorRoutes(max_age=CORRIDORS["MAX_AGE"])
+            if CORRIDORS["POLL_INTERVAL"] > 0:
+                threading.Thread(
+                    target=_poll,
+                    args=(routes, CORRIDORS["POLL_INTERVAL"]),
+                    name="corridor-routes",
+                    daemon=True,
+                ).start()
+            register_cache("corridor", routes)
+            _routes, _routes_pid = routes, os.getpid()
+        return _routes
+
+
+def precompute_routes(corridors, find_candidates, alpha, force=False, prune=True):
+    """
+    구간 별 최적 경로를 계산하여 DB에 저장합니다.
+    계산에 사용한 경유지 후보가 그대로이고 MAX_AGE의 절반이 지나지 않은 경로는 건너뜁니다.
+    :param corridors: [(출발지, 목적지), ...]
+    :param find_candidates: 구간의 경유지 후보를 반환하는 함수 find_candidates(start, end)
+    :param alpha: 최단 경로 대비 허용 배수
+    :param force: 모든 구간을 다시 계산
+    :param prune: corridors에 없는 구간의 경로 삭제
+    :return: {"corridors", "computed", "unchanged", "failed", "removed"}
+    """
+    snapshot = get_snapshot()
+    # 후보를 찾기 전에 버전을 먼저 기록 (이후 변경분은 다음 실행 때 반영)
+    version = snapshot.version
+    existing = {
+        key: (as_candidates(candidates), computed_at)
+        for key, candidates, computed_at in PrecomputedRoute.objects.values_list(
+            "key", "candidates", "computed_at"
+        )
+    }
+    now = timezone.now()
+
+    keys = set()
+    trips = {}  # 구간 키 -> (출발지, 목적지, 경유지 후보)
+    for start, end in corridors:
+        key = corridor_key(start, end)
+        if key in keys:
+            continue
+        keys.add(key)
+        candidates = as_candidates(find_candidates(start, end))
+        current = existing.get(key)
+        if (
+            not force
+            and current is not None
+            and candidate_points(current[0]) == candidate_points(candidates)
+            and (now - current[1]).total_seconds() < CORRIDORS["MAX_AGE"] / 2
+        ):
+            continue
+        trips[key] = (start, end, candidates)
+
+    # 모든 구간의 TMap 요청을 중복 제거 후 동시에 계산
+    routes, _ = find_optimal_routes(
+        [(start, end, list(candidates)) for start, end, candidates in trips.values()],
+        alpha=alpha,
+    )
+    stats = {
+        "corridors": len(keys),
+        "computed": 0,
+        "unchanged": len(keys) - len(trips),
+        "failed": 0,
+        "removed": 0,
+    }
+    for (key, (start, end, candidates)), route in zip(trips.items(), routes):
+        if not route:
+            stats["failed"] += 1
+            continue
+        PrecomputedRoute.objects.update_or_create(
+            key=key,
+            defaults={
+                "start_x": start[0],
+                "start_y": start[1],
+                "end_x": end[0],
+                "end_y": end[1],
+                "route": route,
+                "candidates": [list(point) for point in candidates],
+                "version": version,
+            },
+        )
+        stats["computed"] += 1
+
+    if prune:
+        stats["removed"], _ = PrecomputedRoute.objects.exclude(key__in=keys).delete()
+    return stats
@@ -0,0 +1,476 @@
+import heapq
+import itertools
+import json
+import math
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+from backend.settings import ROUTING
+from .function import EARTH_RADIUS, distance_m
+
+# 보행 가능한 OSM 도로 종류
+WALKABLE_HIGHWAYS = {
+    "footway",
+    "pedestrian",
+    "path",
+    "steps",
+    "crossing",
+    "living_street",
+    "residential",
+    "service",
+    "unclassified",
+    "tertiary",
+    "tertiary_link",
+    "secondary",
+    "secondary_link",
+    "primary",
+    "primary_link",
+    "track",
+}
+
+
+def _pair_distances(x1, y1, x2, y2):
+    """
+    좌표 배열 쌍 사이의 거리(m)를 계산합니다. (equirectangular 근사)
+    """
+    cos_lat = np.cos(np.radians((y1 + y2) / 2))
+    dx = np.radians(x2 - x1) * cos_lat
+    dy = np.radians(y2 - y1)
+    return np.hypot(dx, dy) * EARTH_RADIUS
+
+
+class PedestrianGraph:
+    """
+    보행자 도로 그래프 (CSR 인접 구조)
+    노드 i의 이웃은 indices[indptr[i]:indptr[i + 1]], 간선 길이(m)는 lengths의 같은 구간입니다.
+    """
+
+    def __init__(self, xs, ys, indptr, indices, lengths, cell_size=0.002):
+        """
+        :param xs: 노드 경도 배열
+        :param ys: 노드 위도 배열
+        :param indptr: 노드 별 간선 시작 위치 (길이: 노드 수 + 1)
+        :param indices: 간선 도착 노드 배열
+        :param lengths: 간선 길이 배열 (m)
+        :param cell_size: 가까운 노드 탐색용 격자 셀 크기 (단위: 도)
+        """
+        self.xs = np.ascontiguousarray(xs, dtype=np.float64)
+        self.ys = np.ascontiguousarray(ys, dtype=np.float64)
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        self.lengths = np.ascontiguousarray(lengths, dtype=np.float64)
+        self.min_cos_lat = (
+            float(np.cos(np.radians(np.abs(self.ys).max()))) if len(self.ys) else 1.0
+        )
+        # 간선 출발 노드 배열
+        self.sources = np.repeat(
+            np.arange(len(self.xs), dtype=np.int32), np.diff(self.indptr)
+        )
+
+        # 가까운 노드 탐색용 격자
+        self.cell_size = cell_size
+        self.cells = {}
+        cxs = np.floor(self.xs / cell_size).astype(np.int64).tolist()
+        cys = np.floor(self.ys / cell_size).astype(np.int64).tolist()
+        for node, cell in enumerate(zip(cxs, cys)):
+            self.cells.setdefault(cell, []).append(node)
+        self.cells = {
+            cell: np.array(nodes, dtype=np.int64) for cell, nodes in self.cells.items()
+        }
+
+    def __len__(self):
+        return len(self.xs)
+
+    @classmethod
+    def from_lines(cls, lines, precision=7):
+        """
+        선(좌표 리스트) 목록으로부터 양방향 그래프를 생성합니다.
+        좌표가 precision 자릿수까지 같으면 같은 노드로 취급합니다.
+        :param lines: [[(x, y), (x, y), ...], ...]
+        :return: PedestrianGraph
+        """
+        nodes = {}
+        xs, ys, sources, targets = [], [], [], []
+        for line in lines:
+            previous = None
+            for x, y in line:
+                key = (round(x, precision), round(y, precision))
+                node = nodes.get(key)
+                if node is None:
+                    node = nodes[key] = len(xs)
+                    xs.append(x)
+                    ys.append(y)
+                if previous is not None and previous != node:
+                    sources.append(previous)
+                    targets.append(node)
+                previous = node
+
+        xs = np.array(xs, dtype=np.float64)
+        ys = np.array(ys, dtype=np.float64)
+        # 양방향 간선으로 CSR 구성
+        sources, targets = (
+            np.array(sources + targets, dtype=np.int64),
+            np.array(targets + sources, dtype=np.int64),
+        )
+        lengths = _pair_distances(xs[sources], ys[sources], xs[targets], ys[targets])
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(xs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(xs)), out=indptr[1:])
+        return cls(xs, ys, indptr, targets[order], lengths[order])
+
+    @classmethod
+    def from_geojson(cls, path):
+        """
+        LineString/MultiLineString 간선 목록 GeoJSON 파일로부터 그래프를 생성합니다.
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        lines = []
+        for feature in data.get("features", []):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "LineString":
+                lines.append(geometry["coordinates"])
+            elif geometry.get("type") == "MultiLineString":
+                lines.extend(geometry["coordinates"])
+        return cls.from_lines([[tuple(c[:2]) for c in line] for line in lines])
+
+    @classmethod
+    def from_osm(cls, path):
+        """
+        OSM XML 파일(.osm)의 보행 가능한 way로부터 그래프를 생성합니다.
+        """
+        coordinates, ways = {}, []
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag == "node":
+                coordinates[element.get("id")] = (
+                    float(element.get("lon")),
+                    float(element.get("lat")),
+                )
+                element.clear()
+            elif element.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in element.iter("tag")}
+                if (
+                    tags.get("highway") in WALKABLE_HIGHWAYS
+                    and tags.get("foot") != "no"
+                    and tags.get("access") != "private"
+                ):
+                    ways.append([nd.get("ref") for nd in element.iter("nd")])
+                element.clear()
+        lines = [
+            [coordinates[ref] for ref in way if ref in coordinates] for way in ways
+        ]
+        return cls.from_lines(lines)
+
+    @classmethod
+    def load(cls, path):
+        """
+        파일 확장자에 맞게 그래프를 불러옵니다. (.npz, .geojson, .json, .osm)
+        """
+        suffix = Path(path).suffix.lower()
+        if suffix == ".npz":
+            data = np.load(path)
+            return cls(
+                data["xs"], data["ys"], data["indptr"], data["indices"], data["lengths"]
+            )
+        if suffix == ".osm":
+            return cls.from_osm(path)
+        return cls.from_geojson(path)
+
+    def save(self, path):
+        """
+        그래프를 .npz 파일로 저장합니다. (다음 실행 시 파싱 없이 바로 불러오기 위함)
+        """
+        np.savez(
+            path,
+            xs=self.xs,
+            ys=self.ys,
+            indptr=self.indptr,
+            indices=self.indices,
+            lengths=self.lengths,
+        )
+
+    def nodes_within(self, point, radius_m):
+        """
+        point로부터 radius_m(m) 이내에 있는 노드들과 거리를 반환합니다.
+        :return: (노드 배열, 거리 배열)
+        """
+        x, y = point
+        # 반경을 위도/경도 단위로 변환하여 확인할 셀 범위 결정
+        dy = math.degrees(radius_m / EARTH_RADIUS)
+        dx = dy / max(math.cos(math.radians(y)), 1e-6)
+        size = self.cell_size
+        x_cells = range(math.floor((x - dx) / size), math.floor((x + dx) / size) + 1)
+        y_cells = range(math.floor((y - dy) / size), math.floor((y + dy) / size) + 1)
+        buckets = [
+            self.cells[cell]
+            for cell in itertools.product(x_cells, y_cells)
+            if cell in self.cells
+        ]
+        if not buckets:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        nodes = np.concatenate(buckets)
+        distances = distance_m(self.xs[nodes], self.ys[nodes], point)
+        mask = distances <= radius_m
+        return nodes[mask], distances[mask]
+
+    def nearest_node(self, point, max_distance):
+        """
+        point에서 가장 가까운 노드를 찾습니다.
+        :return: (노드, 거리) 또는 (None, None)
+        """
+        nodes, distances = self.nodes_within(point, max_distance)
+        if len(nodes) == 0:
+            return None, None
+        i = int(np.argmin(distances))
+        return int(nodes[i]), float(distances[i])
+
+    def hazard_penalties(self, hazards, costs, radius_m):
+        """
+        위험 구조물 주변 노드의 비용 가중치를 계산합니다.
+        :param hazards: RoadStructureSnapshot.arrays() 결과
+        :param costs: 속성 별 비용 계수 (ROUTING["COSTS"])
+        :param radius_m: 위험 구조물이 영향을 주는 반경 (m)
+        :return: 노드 별 비용 가중치 배열
+        """
+        scores = (
+            costs["weight"] * hazards["weights"]
+            + costs["braille_block"] * hazards["braille_block"]
+            + costs["audio_signal"] * hazards["audio_signal"]
+            + costs["bollard"] * (hazards["bollard"] == 2)
+        )
+        penalties = np.zeros(len(self.xs))
+        for i in np.flatnonzero(scores):
+            nodes, _ = self.nodes_within((hazards["xs"][i], hazards["ys"][i]), radius_m)
+            penalties[nodes] += scores[i]
+        return penalties
+
+    def edge_costs(self, penalties):
+        """
+        간선 비용을 계산합니다. (거리 × (1 + 양 끝 노드 비용 가중치 평균))
+        """
+        return self.lengths * (
+            1.0 + (penalties[self.sources] + penalties[self.indices]) / 2
+        )
+
+    def shortest_path(self, source, target, costs):
+        """
+        A* 알고리즘으로 최소 비용 경로를 찾습니다.
+        휴리스틱은 직선 거리이며, 간선 비용이 거리 이상이므로 최적 경로를 보장합니다.
+        :param costs: 간선 비용 리스트 (edge_costs 결과)
+        :return: 노드 리스트 또는 None
+        """
+        indptr, indices, xs, ys = self._adjacency()
+        tx, ty = xs[target], ys[target]
+        # 그래프에서 가장 고위도의 cos 값을 사용하여 휴리스틱이 실제 거리를 넘지 않도록 함
+        cos_lat = self.min_cos_lat
+        scale = math.pi / 180 * EARTH_RADIUS
+
+        def heuristic(node):
+            return math.hypot((xs[node] - tx) * cos_lat, ys[node] - ty) * scale
+
+        best = {source: 0.0}
+        previous = {}
+        heap = [(heuristic(source), 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                path = [node]
+                while node in previous:
+                    node = previous[node]
+                    path.append(node)
+                return path[::-1]
+            if cost > best.get(node, math.inf):
+                continue
+            for e in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[e]
+                new_cost = cost + costs[e]
+                if new_cost < best.get(neighbor, math.inf):
+                    best[neighbor] = new_cost
+                    previous[neighbor] = node
+                    heapq.heappush(
+                        heap, (new_cost + heuristic(neighbor), new_cost, neighbor)
+                    )
+        return None
+
+    def _adjacency(self):
+        # 탐색 루프에서 NumPy 스칼라 변환 비용을 피하기 위해 리스트로 변환하여 보관
+        if not hasattr(self, "_adjacency_lists"):
+            self._adjacency_lists = (
+                self.indptr.tolist(),
+                self.indices.tolist(),
+                self.xs.tolist(),
+                self.ys.tolist(),
+            )
+        return self._adjacency_lists
+
+    def path_length(self, path):
+        """
+        노드 경로의 실제 거리(m)를 계산합니다.
+        """
+        xs, ys = self.xs[path], self.ys[path]
+        return float(_pair_distances(xs[:-1], ys[:-1], xs[1:], ys[1:]).sum())
+
+
+def route_response(coordinates, distance, walking_speed):
+    """
+    좌표 목록을 TMap 보행자 경로 API와 같은 형식의 GeoJSON으로 변환합니다.
+    :param coordinates: 경로 좌표 [(x, y), ...]
+    :param distance: 총 거리 (m)
+    :param walking_speed: 보행 속도 (m/s)
+    :return: GeoJSON FeatureCollection
+    """
+    total_time = round(distance / walking_speed)
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": list(coordinates[0])},
+                "properties": {
+                    "totalDistance": round(distance),
+                    "totalTime": total_time,
+                    "index": 0,
+                    "pointIndex": 0,
+                    "name": "",
+                    "description": "",
+                    "turnType": 200,
+                    "pointType": "SP",
+                },
+            },
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "LineString",
+                    "coordinates": [list(c) for c in coordinates],
+                },
+                "properties": {
+                    "index": 1,
+                    "lineIndex": 0,
+                    "name": "",
+                    "description": f"{round(distance)}m 이동",
+                    "distance": round(distance),
+                    "time": total_time,
+                },
+            },
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": list(coordinates[-1])},
+                "properties": {
+                    "index": 2,
+                    "pointIndex": 1,
+                    "name": "",
+                    "description": "",
+                    "turnType": 201,
+                    "pointType": "EP",
+                },
+            },
+        ],
+    }
+
+
+class LocalRouter:
+    """
+    위험 구조물을 반영한 로컬 보행자 경로 탐색기
+    """
+
+    def __init__(self, graph, snapshot=None):
+        """
+        :param graph: PedestrianGraph
+        :param snapshot: 위험 구조물 스냅샷 (없으면 거리만으로 탐색)
+        """
+        self.graph = graph
+        self.snapshot = snapshot
+        self._costs = graph.lengths.tolist()
+        self._revision = None
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh_costs(self, force=False):
+        """
+        스냅샷이 바뀌었으면 간선 비용을 다시 계산합니다.
+        (COST_REFRESH_INTERVAL 이내에는 다시 계산하지 않음)
+        """
+        if self.snapshot is None:
+            return
+        now = time.monotonic()
+        if not force and (
+            self._revision == self.snapshot.revision
+            or now - self._refreshed_at < ROUTING["COST_REFRESH_INTERVAL"]
+        ):
+            return
+        with self._lock:
+            revision = self.snapshot.revision
+            penalties = self.graph.hazard_penalties(
+                self.snapshot.arrays(), ROUTING["COSTS"], ROUTING["HAZARD_RADIUS"]
+            )
+            self._costs = self.graph.edge_costs(penalties).tolist()
+            self._revision, self._refreshed_at = revision, now
+
+    def route(self, start, end):
+        """
+        출발지에서 목적지까지의 경로를 찾습니다.
+        :param start: 출발지 좌표 (x, y)
+        :param end: 도착지 좌표 (x, y)
+        :return: TMap API와 같은 형식의 GeoJSON 또는 None
+        """
+        self.refresh_costs()
+        source, source_distance = self.graph.nearest_node(
+            start, ROUTING["SNAP_DISTANCE"]
+        )
+        target, target_distance = self.graph.nearest_node(end, ROUTING["SNAP_DISTANCE"])
+        if source is None or target is None:
+            return None
+
+        path = self.graph.shortest_path(source, target, self._costs)
+        if path is None:
+            return None
+
+        coordinates = list(
+            zip(self.graph.xs[path].tolist(), self.graph.ys[path].tolist())
+        )
+        # 출발지/목적지가 노드와 떨어져 있으면 경로 양 끝에 연결
+        if source_distance > 0:
+            coordinates.insert(0, tuple(start))
+        if target_distance > 0:
+            coordinates.append(tuple(end))
+        distance = source_distance + self.graph.path_length(path) + target_distance
+        return route_response(coordinates, distance, ROUTING["WALKING_SPEED"])
+
+
+# 그래프 파일을 불러오지 못했을 때 다시 시도하기까지의 시간 (초)
+LOAD_RETRY_INTERVAL = 60.0
+
+_router = None
+_router_failed_at = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """
+    ROUTING["GRAPH_PATH"]의 그래프로 만든 로컬 경로 탐색기를 반환합니다.
+    그래프 파일이 없거나 읽을 수 없으면 TMap 경로를 사용하도록 None을 반환하고,
+    LOAD_RETRY_INTERVAL이 지난 뒤에 다시 불러옵니다.
+    :return: LocalRouter 또는 None (그래프 파일이 설정되지 않았거나 불러오지 못한 경우)
+    """
+    global _router, _router_failed_at
+    if _router is None and ROUTING["GRAPH_PATH"]:
+        from .snapshot import get_snapshot
+
+        with _router_lock:
+            if _router is None and (
+                _router_failed_at is None
+                or time.monotonic() - _router_failed_at >= LOAD_RETRY_INTERVAL
+            ):
+                try:
+                    graph = PedestrianGraph.load(ROUTING["GRAPH_PATH"])
+                except Exception as e:
+                    print(f"Pedestrian graph load failed: {str(e)}")
+                    _router_failed_at = time.monotonic()
+                    return None
+                _router = LocalRouter(graph, snapshot=get_snapshot())
+                _router_failed_at = None
+    return _router
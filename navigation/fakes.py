@@ -0,0 +1,277 @@
+import json
+import math
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.settings import TMAP
+
+# 보행 속도 (m/s)
+WALKING_SPEED = 1.1
+
+
+def _distance_m(a, b):
+    """
+    두 WGS84 좌표 (경도, 위도) 사이의 근사 거리(m)를 계산합니다.
+    """
+    lat = math.radians((a[1] + b[1]) / 2)
+    dx = math.radians(b[0] - a[0]) * math.cos(lat) * 6371000
+    dy = math.radians(b[1] - a[1]) * 6371000
+    return math.hypot(dx, dy)
+
+
+def fake_route_response(payload):
+    """
+    TMap 보행자 경로 API와 같은 형식의 GeoJSON 응답을 만듭니다.
+    출발지 → 경유지 → 도착지를 직선으로 이어 거리와 시간을 계산합니다.
+    :param payload: TMap API 요청 본문
+    :return: GeoJSON FeatureCollection
+    """
+    points = [(float(payload["startX"]), float(payload["startY"]))]
+    if payload.get("passList"):
+        for p in payload["passList"].split("_"):
+            x, y = p.split(",")
+            points.append((float(x), float(y)))
+    points.append((float(payload["endX"]), float(payload["endY"])))
+
+    features = []
+    total_distance = 0.0
+    for i, point in enumerate(points):
+        point_type = "SP" if i == 0 else "EP" if i == len(points) - 1 else "PP"
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": list(point)},
+                "properties": {
+                    "index": len(features),
+                    "pointIndex": i,
+                    "name": "",
+                    "description": "경유지" if point_type == "PP" else "",
+                    "direction": "",
+                    "nearPoiName": "",
+                    "nearPoiX": "0.0",
+                    "nearPoiY": "0.0",
+                    "intersectionName": "",
+                    "facilityType": "11",
+                    "facilityName": "",
+                    "turnType": 200 if i == 0 else 201 if point_type == "EP" else 11,
+                    "pointType": point_type,
+                },
+            }
+        )
+        if i < len(points) - 1:
+            distance = _distance_m(point, points[i + 1])
+            total_distance += distance
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": [list(point), list(points[i + 1])],
+                    },
+                    "properties": {
+                        "index": len(features),
+                        "lineIndex": i,
+                        "name": "",
+                        "description": f"{round(distance)}m 이동",
+                        "distance": round(distance),
+                        "time": round(distance / WALKING_SPEED),
+                        "roadType": 21,
+                        "categoryRoadType": 0,
+                        "facilityType": "11",
+                        "facilityName": "",
+                    },
+                }
+            )
+
+    features[0]["properties"]["totalDistance"] = round(total_distance)
+    features[0]["properties"]["totalTime"] = round(total_distance / WALKING_SPEED)
+    return {"type": "FeatureCollection", "features": features}
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # 부하 테스트 시 동시 연결이 listen 대기열을 넘어 지연되지 않도록 크게 설정
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 응답을 기다리지 않고 연결을 끊은 경우 (응답 시간 초과)
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class _FakeServer:
+    """
+    테스트/벤치마크용 로컬 HTTP 서버 (요청 처리는 하위 클래스의 respond에서)
+    응답 지연(latency)과 오류 비율(error_rate)을 설정할 수 있습니다.
+    (slow_rate 비율의 요청은 slow_latency만큼 지연)
+    """
+
+    path = "/"
+    # error_rate 비율만큼 보내는 오류 응답
+    error_status = 500
+    error_body = {"error": "fake server error"}
+
+    def __init__(
+        self,
+        latency=0.0,
+        error_rate=0.0,
+        slow_rate=0.0,
+        slow_latency=0.0,
+        host="127.0.0.1",
+        port=0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def is_error(self, count):
+        """
+        count번째 요청에 오류를 응답할지 결정합니다. (요청 수의 error_rate 비율로 고르게 분포)
+        """
+        return bool(self.error_rate) and (count * self.error_rate) % 1 < self.error_rate
+
+    def is_slow(self, count):
+        """
+        count번째 요청을 slow_latency만큼 지연할지 결정합니다. (is_error와 같은 방식)
+        """
+        return bool(self.slow_rate) and (count * self.slow_rate) % 1 < self.slow_rate
+
+    def respond(self, count, headers, body):
+        """
+        :param count: 지금까지 받은 요청 수 (이번 요청 포함)
+        :param headers: 요청 헤더
+        :param body: 요청 본문 (bytes)
+        :return: (상태 코드, 응답 본문 객체)
+        """
+        raise NotImplementedError
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # keep-alive 연결에서 헤더/본문 분할 전송 시 지연(Nagle) 방지
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request_body = self.rfile.read(length)
+                with server._lock:
+                    server.request_count += 1
+                    count = server.request_count
+                time.sleep(
+                    server.slow_latency if server.is_slow(count) else server.latency
+                )
+
+                if server.is_error(count):
+                    status, response = server.error_status, server.error_body
+                else:
+                    status, response = server.respond(count, self.headers, request_body)
+                body = json.dumps(response, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeTMapServer(_FakeServer):
+    """
+    테스트/벤치마크용 로컬 TMap 서버
+    응답 지연(latency)과 오류 비율(error_rate)을 설정할 수 있습니다.
+    quota를 지정하면 최근 1초 동안 quota개를 넘는 요청에는 429 오류를 응답합니다.
+
+    사용 예)
+        with FakeTMapServer(latency=0.2) as server:
+            TMAP["API_URL"] = server.url
+    """
+
+    path = "/tmap/routes/pedestrian"
+    error_body = {"error": {"code": "9401"}}
+    quota_body = {"error": {"code": "QUOTA_EXCEEDED"}}
+
+    def __init__(self, quota=0, **kwargs):
+        super().__init__(**kwargs)
+        self.quota = quota
+        self.rejected_count = 0
+        self._accepted = deque()  # 최근 1초 동안 처리한 요청 시각
+
+    def respond(self, count, headers, body):
+        if self.quota:
+            now = time.monotonic()
+            with self._lock:
+                while self._accepted and now - self._accepted[0] >= 1.0:
+                    self._accepted.popleft()
+                if len(self._accepted) >= self.quota:
+                    self.rejected_count += 1
+                    return 429, self.quota_body
+                self._accepted.append(now)
+        return 200, fake_route_response(json.loads(body or b"{}"))
+
+
+class FakeCaptionServer(_FakeServer):
+    """
+    테스트/벤치마크용 로컬 AI Image Captioning 서버
+    이미지를 받으면 latency만큼 기다린 뒤 고정된 캡션을 반환합니다.
+    (error_rate 비율만큼 오류 응답)
+    """
+
+    path = "/caption"
+
+    def __init__(self, latency=0.0, caption="인도 위에 볼라드가 있습니다", **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.caption = caption
+
+    def respond(self, count, headers, body):
+        if not headers.get("Content-Type", "").startswith("multipart/form-data"):
+            return 400, {"error": "image required"}
+        return 200, [self.caption]
+
+
+@contextmanager
+def fake_tmap(**kwargs):
+    """
+    로컬 TMap 서버를 띄우고 TMap API 주소와 키를 임시로 교체합니다.
+    """
+    api_url, app_key = TMAP["API_URL"], TMAP["APP_KEY"]
+    with FakeTMapServer(**kwargs) as server:
+        TMAP["API_URL"], TMAP["APP_KEY"] = server.url, "fake"
+        try:
+            yield server
+        finally:
+            TMAP["API_URL"], TMAP["APP_KEY"] = api_url, app_key
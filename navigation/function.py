@@ -1,7 +1,63 @@
-import requests
-from backend.settings import TMAP
+import asyncio
+import contextvars
+import itertools
+import time
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from backend.settings import TMAP, ROUTE_CACHE, ROUTING
+from .cache import build_cache
+from .client import get_async_client, get_client, get_latency
+from .metrics import deadline_exceeded, hedged_requests, register_cache, timer
+from .scheduler import PRIORITY_HIGH, PRIORITY_LOW, PriorityExecutor, RequestScheduler
+from concurrent.futures import FIRST_COMPLETED, wait
 from urllib.parse import quote
 
+# points_within_circle에서 원의 반지름을 확장하는 비율
+CIRCLE_RADIUS_FACTOR = 1.5
+
+# 지구 반지름 (m)
+EARTH_RADIUS = 6371000.0
+
+# detour_distance의 여유 비율 (거리 근사 방식 차이로 타원 경계의 후보가 빠지지 않도록)
+DETOUR_MARGIN = 1.01
+
+# TMap 요청을 동시에 보내기 위한 스레드 풀 (워커 프로세스 당 하나)
+# 최단 경로 요청을 경유지 경로 요청보다 먼저 실행
+tmap_executor = PriorityExecutor(
+    max_workers=TMAP["MAX_WORKERS"], thread_name_prefix="tmap"
+)
+
+# 같은 TMap 요청 합치기 + 초당 요청 수 제한 (워커 프로세스 당 하나)
+tmap_scheduler = RequestScheduler(
+    "tmap",
+    rate=TMAP["RATE_LIMIT"],
+    burst=TMAP["BURST"],
+    queue_timeout=TMAP["QUEUE_TIMEOUT"] or None,
+)
+
+# TMap 경로 응답 캐시
+route_cache = build_cache(ROUTE_CACHE, prefix="route:")
+register_cache("route", route_cache)
+
+
+def route_cache_key(start, end, passList=None, precision=None):
+    """
+    경로 캐시 키를 생성합니다.
+    좌표는 precision 자릿수로 반올림하고, 경유지는 순서를 유지합니다.
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param passList: 경유지 리스트
+    :param precision: 좌표 소수점 자릿수 (디폴트: ROUTE_CACHE["PRECISION"])
+    :return: 캐시 키 문자열
+    """
+    if precision is None:
+        precision = ROUTE_CACHE["PRECISION"]
+    points = [start, *(passList or []), end]
+    return "_".join(
+        f"{float(p[0]):.{precision}f},{float(p[1]):.{precision}f}" for p in points
+    )
+
 
 def calculate_midpoint_and_circle(start, end, factor=1.1):
     """
@@ -16,6 +72,66 @@ def calculate_midpoint_and_circle(start, end, factor=1.1):
     return midpoint, radius
 
 
+def as_point_arrays(points):
+    """
+    점 목록을 경도, 위도, 가중치 배열로 변환합니다.
+    :param points: [(x, y, weight), ...]
+    :return: (xs, ys, weights) 연속된 float64 배열
+    """
+    array = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return (
+        np.ascontiguousarray(array[:, 0]),
+        np.ascontiguousarray(array[:, 1]),
+        np.ascontiguousarray(array[:, 2]),
+    )
+
+
+def distance_m(xs, ys, point):
+    """
+    WGS84 좌표 배열과 한 점 사이의 거리(m)를 계산합니다. (equirectangular 근사)
+    :param xs: 경도 배열
+    :param ys: 위도 배열
+    :param point: 기준 좌표 (x, y)
+    :return: 거리 배열 (m)
+    """
+    cos_lat = np.cos(np.radians(point[1]))
+    dx = np.radians(xs - point[0]) * cos_lat
+    dy = np.radians(ys - point[1])
+    return np.hypot(dx, dy) * EARTH_RADIUS
+
+
+def detour_distance(start, end, alpha, circuity=None):
+    """
+    경유지를 거치는 경로의 출발지 -> 경유지 -> 목적지 직선 거리 합의 최대값을 계산합니다.
+    plan_pass_lists는 직선 거리 합이 최단 경로 추정 거리(직선 거리 × circuity)의
+    alpha 배를 넘는 조합을 제외하므로, 출발지/목적지까지의 거리 합이 이보다 먼 후보는
+    어떤 조합에도 포함되지 않습니다. (경유지 후보 필터링 타원의 크기)
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param alpha: 최단 경로 대비 허용 배수
+    :param circuity: 최단 보행 거리 / 직선 거리 추정 상한 (디폴트: ROUTING["CIRCUITY"])
+    :return: 거리 (m, DETOUR_MARGIN 포함)
+    """
+    if circuity is None:
+        circuity = ROUTING["CIRCUITY"]
+    straight = distance_m(np.array([end[0]]), np.array([end[1]]), start)[0]
+    return alpha * circuity * float(straight) * DETOUR_MARGIN
+
+
+def circle_mask(xs, ys, center, radius):
+    """
+    원 내부에 있는 점들의 마스크를 계산합니다. (좌표 차이 기준, points_within_circle과 동일)
+    :param xs: 경도 배열
+    :param ys: 위도 배열
+    :param center: 원의 중심 좌표 (x, y)
+    :param radius: 원의 반지름 (단위: 도)
+    :return: bool 배열
+    """
+    dx = xs - center[0]
+    dy = ys - center[1]
+    return np.sqrt(dx * dx + dy * dy) <= radius
+
+
 def points_within_circle(points, center, radius):
     """
     주어진 원 내부에 있는 점들을 필터링합니다.
@@ -24,36 +140,117 @@ def points_within_circle(points, center, radius):
     :param radius: 원의 반지름
     :return: 원 안에 있는 점들
     """
-    filtered_points = []
-    for point in points:
-        # 좌표와 중심 좌표의 차이를 계산하여 거리 계산
-        distance = ((point[0] - center[0]) ** 2 + (point[1] - center[1]) ** 2) ** 0.5
+    if len(points) == 0:
+        return []
+    xs, ys, _ = as_point_arrays(points)
+    # 거리가 반지름 이내인 점을 필터링
+    mask = circle_mask(xs, ys, center, radius * CIRCLE_RADIUS_FACTOR)
+    return [points[i] for i in np.flatnonzero(mask)]
 
-        # 거리가 반지름 이내인 점을 필터링
-        if distance <= radius*1.5:
-            filtered_points.append(point)
-    print(filtered_points)
-    return filtered_points
 
+def points_within_distance(points, center, radius_m):
+    """
+    중심으로부터 실제 거리 radius_m(m) 이내에 있는 점들을 필터링합니다.
+    :param points: 후보 점들 [(x, y, weight), ...]
+    :param center: 중심 좌표 (x, y)
+    :param radius_m: 반경 (m)
+    :return: 반경 안에 있는 점들
+    """
+    if len(points) == 0:
+        return []
+    xs, ys, _ = as_point_arrays(points)
+    mask = distance_m(xs, ys, center) <= radius_m
+    return [points[i] for i in np.flatnonzero(mask)]
 
-def select_highest_safety_points(points):
+
+def top_k_indices(weights, k):
+    """
+    가중치가 가장 큰 k개 점의 인덱스를 내림차순으로 반환합니다.
+    전체 정렬 대신 argpartition으로 상위 k개만 고르며,
+    가중치가 같으면 앞에 있는 점을 우선합니다. (sorted와 동일한 결과)
+    :param weights: 가중치 배열
+    :param k: 선택할 개수
+    :return: 인덱스 배열
     """
-    안전도를 기준으로 가장 높은 두 점을 선택합니다.
+    n = len(weights)
+    if n <= k:
+        return np.argsort(-weights, kind="stable")
+    # 상위 k번째 가중치 이상인 점들만 남긴 뒤 안정 정렬
+    threshold = weights[np.argpartition(-weights, k - 1)[:k]].min()
+    top = np.flatnonzero(weights >= threshold)
+    return top[np.argsort(-weights[top], kind="stable")][:k]
+
+
+def select_highest_safety_points(points, k=2):
+    """
+    안전도를 기준으로 가장 높은 k개 점을 선택합니다.
     :param points: [(x, y, safety_score), ...]
-    :return: [(x1, y1), (x2, y2)]
+    :param k: 선택할 개수 (디폴트: 2)
+    :return: [(x1, y1, safety_score1), ...]
+    """
+    if len(points) == 0:
+        return []
+    # 안전도 기준으로 가장 높은 k개 점을 내림차순으로 반환
+    _, _, weights = as_point_arrays(points)
+    return [points[i] for i in top_k_indices(weights, k)]
+
+
+def path_priority(passList=None):
     """
-    # 안전도 기준으로 내림차순 정렬하여 가장 높은 두 점을 반환
-    return sorted(points, key=lambda p: p[2], reverse=True)[:2]
+    TMap 요청의 우선순위를 반환합니다. (최단 경로 요청이 경유지 경로 요청보다 먼저)
+    """
+    return PRIORITY_LOW if passList else PRIORITY_HIGH
 
 
-def calculate_path_response(start, end, passList=None):
+def calculate_path_response(start, end, passList=None, coalesce=True):
     """
     TMap API를 호출하여 경로 응답 데이터를 반환합니다.
+    같은 (출발지, 경유지, 도착지) 요청은 캐시된 응답을 반환하고,
+    같은 요청이 진행 중이면 새로 보내지 않고 그 응답을 함께 사용합니다. (tmap_scheduler)
     :param start: 출발지 좌표 (x, y)
     :param end: 도착지 좌표 (x, y)
     :param passList: 경유지 리스트
+    :param coalesce: False이면 같은 요청이 진행 중이어도 새로 보냄 (hedged request)
+    :return: TMap API 응답 데이터 또는 None
+    """
+    key = route_cache_key(start, end, passList)
+    with timer("tmap"):
+        response = route_cache.get(key)
+        if response is None:
+            response = tmap_scheduler.call(
+                key,
+                fetch_path_response,
+                key,
+                start,
+                end,
+                passList,
+                priority=path_priority(passList),
+                coalesce=coalesce,
+            )
+    return response
+
+
+def fetch_path_response(key, start, end, passList=None):
+    """
+    TMap API를 호출하고 성공한 응답을 캐시에 저장합니다.
+    :param key: 경로 캐시 키
     :return: TMap API 응답 데이터 또는 None
     """
+    response = request_path_response(start, end, passList)
+    # 실패한 응답은 캐시하지 않음
+    if response is not None:
+        route_cache.set(key, response)
+    return response
+
+
+def path_request(start, end, passList=None):
+    """
+    TMap API 요청 헤더와 본문을 생성합니다.
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param passList: 경유지 리스트
+    :return: (headers, payload)
+    """
     headers = {
         "accept": "application/json",
         "content-type": "application/json",
@@ -75,9 +272,22 @@ def calculate_path_response(start, end, passList=None):
 
     if passList:
         payload["passList"] = "_".join([f"{p[0]},{p[1]}" for p in passList])
+    return headers, payload
+
 
+def request_path_response(start, end, passList=None):
+    """
+    TMap API를 호출하여 경로 응답 데이터를 반환합니다. (캐시 사용 안 함)
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param passList: 경유지 리스트
+    :return: TMap API 응답 데이터 또는 None
+    """
+    headers, payload = path_request(start, end, passList)
     try:
-        response = requests.post(TMAP["API_URL"], json=payload, headers=headers)
+        response = get_client("tmap").post(
+            TMAP["API_URL"], json=payload, headers=headers
+        )
         if response.status_code == 200:
             return response.json()
         else:
@@ -88,62 +298,502 @@ def calculate_path_response(start, end, passList=None):
         return None
 
 
-def find_optimal_route(start, end, candidates, alpha=2.0):
+async def acalculate_path_response(start, end, passList=None, coalesce=True):
+    """
+    calculate_path_response의 비동기 버전
+    """
+    key = route_cache_key(start, end, passList)
+    with timer("tmap"):
+        response = await route_cache.aget(key)
+        if response is None:
+            response = await tmap_scheduler.acall(
+                key,
+                afetch_path_response,
+                key,
+                start,
+                end,
+                passList,
+                priority=path_priority(passList),
+                coalesce=coalesce,
+            )
+    return response
+
+
+async def afetch_path_response(key, start, end, passList=None):
+    """
+    fetch_path_response의 비동기 버전
+    """
+    response = await arequest_path_response(start, end, passList)
+    if response is not None:
+        await route_cache.aset(key, response)
+    return response
+
+
+async def arequest_path_response(start, end, passList=None):
+    """
+    request_path_response의 비동기 버전
+    """
+    headers, payload = path_request(start, end, passList)
+    try:
+        response = await get_async_client("tmap").post(
+            TMAP["API_URL"], json=payload, headers=headers
+        )
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(f"TMap API Error: {response.status_code} - {response.text}")
+            return None
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        return None
+
+
+def submit_path_requests(start, end, pass_lists, coalesce=True):
+    """
+    여러 경유지 조합에 대한 TMap API 요청을 스레드 풀에서 동시에 시작합니다.
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param pass_lists: 경유지 리스트들 [None, [a], [a, b], ...] (None은 경유지 없음)
+    :param coalesce: calculate_path_response 참고
+    :return: pass_lists와 같은 순서의 Future 리스트
+    """
+    # 요청 처리 시간 측정(timer)이 스레드에서도 같은 요청에 기록되도록 컨텍스트 복사
+    return [
+        tmap_executor.submit_with_priority(
+            path_priority(p),
+            contextvars.copy_context().run,
+            calculate_path_response,
+            start,
+            end,
+            passList=p,
+            coalesce=coalesce,
+        )
+        for p in pass_lists
+    ]
+
+
+def route_deadline():
+    """
+    지금부터 ROUTING["DEADLINE"]초 후의 응답 대기 시각 상한을 반환합니다.
+    :return: time.monotonic() 기준 시각 (DEADLINE이 0이면 None)
+    """
+    if ROUTING["DEADLINE"] <= 0:
+        return None
+    return time.monotonic() + ROUTING["DEADLINE"]
+
+
+def hedge_delay():
+    """
+    TMap 요청을 한 번 더 보내기 전 대기 시간을 반환합니다.
+    (최근 응답 시간의 TMAP["HEDGE_PERCENTILE"] 백분위수, 최소 TMAP["HEDGE_MIN_DELAY"])
+    :return: 초 (사용하지 않거나 최근 응답 수가 부족하면 None)
+    """
+    if TMAP["HEDGE_PERCENTILE"] <= 0:
+        return None
+    delay = get_latency("tmap").percentile(
+        TMAP["HEDGE_PERCENTILE"], min_samples=TMAP["HEDGE_MIN_SAMPLES"]
+    )
+    return None if delay is None else max(delay, TMAP["HEDGE_MIN_DELAY"])
+
+
+def iter_path_responses(start, end, pass_lists, deadline=None):
+    """
+    여러 경유지 조합에 대한 TMap API 요청을 동시에 보내고 도착하는 순서대로 반환합니다.
+    - hedge_delay()가 지나도 끝나지 않은 요청은 한 번 더 보내 먼저 성공한 응답을 사용
+    - deadline이 지나면 남은 요청은 기다리지 않음 (끝나면 캐시에는 저장됨)
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param pass_lists: 경유지 리스트들 [None, [a], [a, b], ...] (None은 경유지 없음)
+    :param deadline: 응답 대기 시각 상한 (time.monotonic() 기준, None이면 모두 기다림)
+    :return: (pass_lists 번호, TMap API 응답 데이터 또는 None) 이터레이터
+    """
+    futures = dict(zip(submit_path_requests(start, end, pass_lists), itertools.count()))
+    delay = hedge_delay()
+    hedge_at = None if delay is None else time.monotonic() + delay
+    while futures:
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            deadline_exceeded.inc("tmap", amount=len(set(futures.values())))
+            return
+        if hedge_at is not None and now >= hedge_at:
+            # 느린 요청은 한 번씩 더 보냄
+            slow = sorted(set(futures.values()))
+            hedges = submit_path_requests(
+                start, end, [pass_lists[i] for i in slow], coalesce=False
+            )
+            futures.update(zip(hedges, slow))
+            hedged_requests.inc("tmap", amount=len(slow))
+            hedge_at = None
+
+        limits = [limit - now for limit in (deadline, hedge_at) if limit is not None]
+        done, _ = wait(
+            futures,
+            timeout=min(limits) if limits else None,
+            return_when=FIRST_COMPLETED,
+        )
+        for future in done:
+            i = futures.pop(future, None)
+            # 같은 번호의 다른 요청이 먼저 끝난 경우
+            if i is None:
+                continue
+            response = future.result()
+            others = [other for other, j in futures.items() if j == i]
+            # 실패했으면 같은 번호의 다른 요청 결과를 기다림
+            if response is None and others:
+                continue
+            for other in others:
+                del futures[other]
+                # 아직 시작하지 않은 요청은 보내지 않음
+                other.cancel()
+            yield i, response
+
+
+async def aiter_path_responses(start, end, pass_lists, deadline=None):
+    """
+    iter_path_responses의 비동기 버전 (deadline이 지나거나 반환을 중단하면 남은 요청 취소)
+    """
+    tasks = {
+        asyncio.ensure_future(acalculate_path_response(start, end, p)): i
+        for i, p in enumerate(pass_lists)
+    }
+    delay = hedge_delay()
+    hedge_at = None if delay is None else time.monotonic() + delay
+    try:
+        while tasks:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                deadline_exceeded.inc("tmap", amount=len(set(tasks.values())))
+                return
+            if hedge_at is not None and now >= hedge_at:
+                # 느린 요청은 한 번씩 더 보냄
+                slow = sorted(set(tasks.values()))
+                for i in slow:
+                    hedge = acalculate_path_response(
+                        start, end, pass_lists[i], coalesce=False
+                    )
+                    tasks[asyncio.ensure_future(hedge)] = i
+                hedged_requests.inc("tmap", amount=len(slow))
+                hedge_at = None
+
+            limits = [
+                limit - now for limit in (deadline, hedge_at) if limit is not None
+            ]
+            done, _ = await asyncio.wait(
+                tasks,
+                timeout=min(limits) if limits else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                i = tasks.pop(task, None)
+                if i is None:
+                    continue
+                response = task.result()
+                others = [other for other, j in tasks.items() if j == i]
+                if response is None and others:
+                    continue
+                for other in others:
+                    del tasks[other]
+                    other.cancel()
+                yield i, response
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def fetch_path_responses(start, end, pass_lists, deadline=None):
+    """
+    여러 경유지 조합에 대한 TMap API 요청을 동시에 보냅니다.
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param pass_lists: 경유지 리스트들 [None, [a], [a, b], ...] (None은 경유지 없음)
+    :param deadline: 응답 대기 시각 상한 (iter_path_responses 참고)
+    :return: pass_lists와 같은 순서의 TMap API 응답 데이터 리스트
+        (실패했거나 deadline까지 받지 못한 요청은 None)
+    """
+    responses = [None] * len(pass_lists)
+    for i, response in iter_path_responses(start, end, pass_lists, deadline):
+        responses[i] = response
+    return responses
+
+
+def find_local_route(start, end):
+    """
+    로컬 경로 탐색 엔진을 사용하도록 설정된 경우 로컬 경로를 반환합니다.
+    :return: TMap API와 같은 형식의 GeoJSON 또는 None (사용하지 않거나 경로가 없는 경우)
+    """
+    if ROUTING["BACKEND"] != "local":
+        return None
+
+    from .engine import get_router
+
+    router = get_router()
+    if router is None:
+        return None
+    with timer("local_route"):
+        return router.route(start, end)
+
+
+def plan_pass_lists(
+    start,
+    end,
+    candidates,
+    alpha,
+    max_waypoints=None,
+    max_plans=None,
+    circuity=None,
+    speed=None,
+):
+    """
+    후보 점들의 부분집합과 순서로 경유지 조합을 만들고, TMap에 요청할 조합만 고릅니다.
+    - 직선 거리와 보행 속도로 각 조합의 최소 소요 시간을 추정하여,
+      최단 경로 추정 시간(직선 거리 × circuity)의 alpha 배를 넘는 조합은 제외
+    - 같은 후보들을 지나는 조합은 추정 시간이 가장 짧은 순서만 남김
+    - 안전도 합이 높은 순(같으면 추정 시간이 짧은 순)으로 max_plans개 선택
+      (경유지가 여러 개인 경로가 모두 alpha 배를 넘을 경우에 대비하여 경유지 1개 조합을 포함)
+    :param start: 출발지 좌표 (x, y)
+    :param end: 도착지 좌표 (x, y)
+    :param candidates: 후보 점들의 리스트 [(x1, y1, weight), ...]
+    :param alpha: 최단 경로 대비 허용 배수
+    :param max_waypoints: 경로 1개 당 최대 경유지 수 (디폴트: ROUTING["MAX_WAYPOINTS"])
+    :param max_plans: 선택할 최대 조합 수 (디폴트: ROUTING["MAX_PLANS"])
+    :param circuity: 최단 보행 거리 / 직선 거리 추정 상한 (디폴트: ROUTING["CIRCUITY"])
+    :param speed: 보행 속도 (m/s) (디폴트: ROUTING["WALKING_SPEED"])
+    :return: (경유지 리스트의 리스트 [[a], [a, b], ...], 각 조합의 안전도 합 리스트)
+    """
+    if max_waypoints is None:
+        max_waypoints = ROUTING["MAX_WAYPOINTS"]
+    if max_plans is None:
+        max_plans = ROUTING["MAX_PLANS"]
+    if circuity is None:
+        circuity = ROUTING["CIRCUITY"]
+    if speed is None:
+        speed = ROUTING["WALKING_SPEED"]
+    if not candidates or max_plans <= 0:
+        return [], []
+
+    # 0: 출발지, 1 ~ n: 후보 점, n + 1: 도착지
+    n = len(candidates)
+    xs = np.array([start[0], *(c[0] for c in candidates), end[0]], dtype=np.float64)
+    ys = np.array([start[1], *(c[1] for c in candidates), end[1]], dtype=np.float64)
+    distances = [distance_m(xs, ys, point).tolist() for point in zip(xs, ys)]
+    budget = alpha * distances[0][n + 1] * circuity / speed
+
+    # 후보 집합 -> (추정 시간, 경유 순서)
+    best = {}
+    for size in range(1, min(max_waypoints, n) + 1):
+        for order in itertools.permutations(range(1, n + 1), size):
+            legs = zip((0, *order), (*order, n + 1))
+            estimate = sum(distances[a][b] for a, b in legs) / speed
+            if estimate > budget:
+                continue
+            key = frozenset(order)
+            if key not in best or estimate < best[key][0]:
+                best[key] = (estimate, order)
+
+    plans = sorted(
+        (
+            (sum(float(candidates[i - 1][2]) for i in order), estimate, order)
+            for estimate, order in best.values()
+        ),
+        key=lambda plan: (-plan[0], plan[1]),
+    )
+    selected = plans[:max_plans]
+    if max_plans > 1 and all(len(order) > 1 for _, _, order in selected):
+        single = next((plan for plan in plans if len(plan[2]) == 1), None)
+        if single:
+            selected[-1] = single
+
+    pass_lists = [[candidates[i - 1] for i in order] for _, _, order in selected]
+    return pass_lists, [score for score, _, _ in selected]
+
+
+def select_optimal_route(shortest_response, paths, alpha, scores=None):
+    """
+    최단 경로와 경유지 경로들 중 최적 경로를 선택합니다.
+    최단 경로 대비 alpha 배수 이내의 경유지 경로 중 안전도 합이 가장 높은 경로를 선택하고,
+    안전도 합이 같으면 소요 시간이 짧은 경로를 선택합니다.
+    최단 경로를 받지 못했으면(오류, 시간 초과) 받은 경유지 경로 중 가장 빠른 경로를 선택합니다.
+    :param shortest_response: 최단 경로 TMap API 응답 데이터
+    :param paths: 경유지 경로 TMap API 응답 데이터 리스트 (실패한 요청은 None)
+    :param alpha: 최단 경로 대비 허용 배수
+    :param scores: 각 경유지 경로의 안전도 합 (디폴트: 모두 같음, 소요 시간만 비교)
+    :return: 최적 경로에 대한 TMap API 응답 데이터 (받은 경로가 없으면 None)
+    """
+
+    def total_time(response):
+        return response["features"][0]["properties"].get("totalTime", float("inf"))
+
+    if not shortest_response:
+        available = [r for r in paths if r]
+        return min(available, key=total_time) if available else None
+
+    shortest_time = total_time(shortest_response)
+    if scores is None:
+        scores = [0] * len(paths)
+
+    # 유효한 응답 중 alpha 배수 이내인 경로만 필터링
+    valid_paths = [
+        (-score, total_time(r), i)
+        for i, (r, score) in enumerate(zip(paths, scores))
+        if r and total_time(r) <= alpha * shortest_time
+    ]
+
+    # 해당하는 경로가 없으면 최단 경로 응답 반환
+    if not valid_paths:
+        return shortest_response
+
+    # 최적 경로 선택
+    _, _, i = min(valid_paths)
+    return paths[i]
+
+
+def find_optimal_route(start, end, candidates, alpha=2.0, deadline=None):
     """
     최적 경로의 TMap API 응답 데이터를 반환합니다.
+    최단 경로와 경유지 경로들은 동시에 요청하고, deadline까지 받은 경로 중에서 선택합니다.
     :param start: 출발지 좌표 (x, y)
     :param end: 도착지 좌표 (x, y)
     :param candidates: 후보 점들의 리스트 [(x1, y1, weight), ...]
     :param alpha: 최단 경로 대비 허용 배수
+    :param deadline: 응답 대기 시각 상한 (time.monotonic() 기준, 디폴트: route_deadline())
     :return: 최적 경로에 대한 TMap API 응답 데이터
     """
-    # S → E 최단 경로 시간 및 응답 데이터
-    shortest_response = calculate_path_response(start, end)
-    if not shortest_response:
-        return None
+    if deadline is None:
+        deadline = route_deadline()
+
+    # 로컬 경로 탐색 엔진 사용 시 (경로를 찾지 못하면 TMap 사용)
+    route = find_local_route(start, end)
+    if route:
+        return route
 
-    shortest_time = shortest_response["features"][0]["properties"].get(
-        "totalTime", float("inf")
+    # 로컬에서 걸러낸 경유지 조합과 S → E 최단 경로를 동시에 요청
+    pass_lists, scores = plan_pass_lists(start, end, candidates, alpha)
+    shortest_response, *paths = fetch_path_responses(
+        start, end, [None] + pass_lists, deadline
     )
-    
-    # 후보 점이 2개일 경우 처리
-    if len(candidates) >= 2:
-        a, b = candidates[:2]  # 첫 두 후보를 a, b로 설정
-        paths = [
-            calculate_path_response(start, end, passList=[a]),
-            calculate_path_response(start, end, passList=[b]),
-            calculate_path_response(start, end, passList=[a, b]),
-            calculate_path_response(start, end, passList=[b, a]),
-        ]
-
-        # 유효한 응답만 필터링
-        valid_paths = [r for r in paths if r]
-        
-        # 유효한 경로가 없으면 최단 경로 응답 반환
-        if not valid_paths:
-            return shortest_response
-
-        # 최적 경로 선택
-        optimal_response = min(
-            valid_paths,
-            key=lambda r: r["features"][0]["properties"].get("totalTime", float("inf")),
-        )
-        # 최적 경로 시간이 alpha 배수보다 크면 변경
-        if (
-            optimal_response["features"][0]["properties"].get("totalTime", float("inf"))
-            > alpha * shortest_time
-        ):
-            return shortest_response
+    return select_optimal_route(shortest_response, paths, alpha, scores)
+
+
+async def afind_optimal_route(start, end, candidates, alpha=2.0, deadline=None):
+    """
+    find_optimal_route의 비동기 버전
+    """
+    route = None
+    async for _, route in aiter_optimal_route(start, end, candidates, alpha, deadline):
+        pass
+    return route
+
 
-        return optimal_response
+def iter_optimal_route(start, end, candidates, alpha=2.0, deadline=None):
+    """
+    find_optimal_route의 결과를 단계적으로 반환합니다.
+    최단 경로 응답이 도착하면 바로 ("shortest", 최단 경로)를, 경유지 경로까지 모두 받거나
+    deadline이 지난 뒤 ("optimal", 최적 경로)를 반환합니다.
+    (최단 경로를 받지 못하면 ("optimal", ...)만 반환, 받은 경로가 없으면 최적 경로는 None)
+    로컬 경로 탐색 엔진의 경로는 ("optimal", 경로) 하나만 반환합니다.
+    :return: (단계, TMap API 응답 데이터) 이터레이터
+    """
+    if deadline is None:
+        deadline = route_deadline()
+
+    route = find_local_route(start, end)
+    if route:
+        yield "optimal", route
+        return
 
-    elif len(candidates) == 1:
-        a = candidates[0]
-        path = calculate_path_response(start, end, passList=[a])
+    pass_lists, scores = plan_pass_lists(start, end, candidates, alpha)
+    responses = [None] * (len(pass_lists) + 1)
+    for i, response in iter_path_responses(start, end, [None] + pass_lists, deadline):
+        responses[i] = response
+        if i == 0 and response:
+            yield "shortest", response
+    shortest_response, *paths = responses
+    yield "optimal", select_optimal_route(shortest_response, paths, alpha, scores)
+
+
+async def aiter_optimal_route(start, end, candidates, alpha=2.0, deadline=None):
+    """
+    iter_optimal_route의 비동기 버전
+    """
+    if deadline is None:
+        deadline = route_deadline()
+
+    # 로컬 경로 탐색 엔진은 CPU 작업이므로 스레드에서 실행
+    if ROUTING["BACKEND"] == "local":
+        route = await sync_to_async(find_local_route)(start, end)
+        if route:
+            yield "optimal", route
+            return
+
+    pass_lists, scores = plan_pass_lists(start, end, candidates, alpha)
+    responses = [None] * (len(pass_lists) + 1)
+    async for i, response in aiter_path_responses(
+        start, end, [None] + pass_lists, deadline
+    ):
+        responses[i] = response
+        if i == 0 and response:
+            yield "shortest", response
+    shortest_response, *paths = responses
+    yield "optimal", select_optimal_route(shortest_response, paths, alpha, scores)
+
+
+def find_optimal_routes(trips, alpha=2.0, deadline=None):
+    """
+    여러 (출발지, 목적지) 쌍의 최적 경로를 한 번에 계산합니다.
+    모든 쌍의 TMap API 요청을 모아 중복(같은 캐시 키)을 제거한 뒤 동시에 보냅니다.
+    :param trips: [(start, end, candidates), ...]
+    :param alpha: 최단 경로 대비 허용 배수
+    :param deadline: 응답 대기 시각 상한 (time.monotonic() 기준, None이면 모두 기다림)
+        (deadline까지 받지 못한 요청은 기다리지 않고 받은 경로 중에서 선택, 끝나면 캐시에는 저장됨)
+    :return: (trips와 같은 순서의 최적 경로 TMap API 응답 데이터 리스트 (실패 시 None),
+        deadline까지 요청이 모두 끝나지 않은 trips 번호 집합)
+    """
+    requests = {}  # 캐시 키 -> (start, end, passList)
+    plans = []  # 로컬 경로 또는 ([최단 경로 키, 경유지 경로 키, ...], 안전도 합 리스트)
+    for start, end, candidates in trips:
+        route = find_local_route(start, end)
+        if route:
+            plans.append(route)
+            continue
+        pass_lists, scores = plan_pass_lists(start, end, candidates, alpha)
+        keys = []
+        for pass_list in [None] + pass_lists:
+            key = route_cache_key(start, end, pass_list)
+            requests.setdefault(key, (start, end, pass_list))
+            keys.append(key)
+        plans.append((keys, scores))
+
+    futures = {
+        key: tmap_executor.submit_with_priority(
+            path_priority(p),
+            contextvars.copy_context().run,
+            calculate_path_response,
+            start,
+            end,
+            passList=p,
+        )
+        for key, (start, end, p) in requests.items()
+    }
 
-        if path:
-            path_time = path["features"][0]["properties"].get("totalTime", float("inf"))
-            if path_time <= alpha * shortest_time:
-                return path
+    timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+    _, not_done = wait(futures.values(), timeout=timeout)
+    if not_done:
+        deadline_exceeded.inc("tmap", amount=len(not_done))
 
-    return shortest_response
+    routes, pending = [], set()
+    for i, plan in enumerate(plans):
+        if isinstance(plan, dict):
+            routes.append(plan)
+            continue
+        keys, scores = plan
+        responses = []
+        for key in keys:
+            future = futures[key]
+            if future in not_done:
+                pending.add(i)
+                responses.append(None)
+            else:
+                responses.append(future.result())
+        shortest_response, *paths = responses
+        routes.append(select_optimal_route(shortest_response, paths, alpha, scores))
+    return routes, pending
@@ -0,0 +1,186 @@
+import hashlib
+import io
+import os
+import uuid
+
+import numpy as np
+
+from backend.settings import CAPTION_CACHE, IMAGE_CAPTION
+from .cache import CaptionCache, build_backend
+from .metrics import register_cache
+
+# AI 서버로 이미지를 전송할 때 한 번에 읽는 크기 (바이트)
+CHUNK_SIZE = 64 * 1024
+
+# multipart 본문에서 파일 외의 부분(경계 문자열, 헤더 등)에 허용하는 크기 (바이트)
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+caption_cache = CaptionCache(
+    build_backend(CAPTION_CACHE, prefix="caption:"),
+    max_distance=CAPTION_CACHE["MAX_DISTANCE"],
+)
+register_cache("caption", caption_cache)
+
+
+class ImageRejected(Exception):
+    """
+    업로드 이미지가 크기 제한을 넘거나 이미지 파일이 아닌 경우
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def check_content_length(meta, config=IMAGE_CAPTION):
+    """
+    요청 본문을 읽기 전에 Content-Length 헤더로 업로드 크기를 확인합니다.
+    :param meta: request.META
+    """
+    try:
+        length = int(meta.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length > config["MAX_UPLOAD_SIZE"] + MULTIPART_OVERHEAD:
+        raise ImageRejected("Image too large", 413)
+
+
+def prepare_caption_image(image, config=IMAGE_CAPTION):
+    """
+    업로드된 이미지를 AI 서버로 보낼 수 있는 형식으로 변환합니다.
+    - 허용 형식이고 AI 모델 입력 크기 이하이면 원본 바이트를 그대로 사용 (디코딩하지 않음)
+    - 그 외에는 AI 모델 입력 크기로 축소한 JPEG로 변환
+    :param image: 업로드된 이미지 파일
+    :param config: 이미지 처리 설정 (디폴트: settings.IMAGE_CAPTION)
+    :return: (파일 이름, 이미지 파일 객체, MIME 타입)
+    """
+    if image.size > config["MAX_UPLOAD_SIZE"]:
+        raise ImageRejected("Image too large", 413)
+
+    # Pillow는 이미지 캡션 요청에만 필요하므로 처음 사용할 때 import (워커 시작 시간 단축)
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    # Pillow는 파일을 열 때 헤더만 읽고, 픽셀 데이터는 필요할 때 디코딩
+    image.seek(0)
+    try:
+        image_file = Image.open(image)
+    except Image.DecompressionBombError:
+        raise ImageRejected("Image too large", 413)
+    except UnidentifiedImageError:
+        raise ImageRejected("Invalid image file", 415)
+
+    width, height = image_file.size
+    if width * height > config["MAX_PIXELS"]:
+        raise ImageRejected("Image too large", 413)
+
+    max_side = config["MAX_SIDE"]
+    if (
+        image_file.format in config["PASSTHROUGH_FORMATS"]
+        and max(width, height) <= max_side
+    ):
+        image.seek(0)
+        return image.name, image, Image.MIME.get(image_file.format, image.content_type)
+
+    # thumbnail은 JPEG의 경우 draft 모드로 디코딩 단계에서부터 축소 (1/2, 1/4, 1/8)
+    image_file.thumbnail((max_side, max_side))
+    # 휴대폰 사진의 EXIF 회전 정보는 재인코딩 시 사라지므로 미리 적용
+    image_file = ImageOps.exif_transpose(image_file).convert("RGB")
+    buffer = io.BytesIO()
+    image_file.save(buffer, format="JPEG", quality=config["JPEG_QUALITY"])
+    buffer.seek(0)
+    return image.name, buffer, "image/jpeg"
+
+
+def content_hash(fileobj):
+    """
+    이미지 파일 내용의 SHA-256 해시를 계산합니다.
+    :return: 16진수 문자열
+    """
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    while chunk := fileobj.read(CHUNK_SIZE):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def perceptual_hash(fileobj):
+    """
+    이미지의 지각 해시(dHash, 64비트)를 계산합니다.
+    크기/압축률만 다르거나 조금 다르게 찍힌 이미지는 해밍 거리가 작은 해시를 가집니다.
+    :return: 64비트 정수
+    """
+    from PIL import Image, ImageOps
+
+    fileobj.seek(0)
+    image = Image.open(fileobj)
+    # JPEG는 디코딩 단계에서부터 축소 (draft 모드)
+    image.draft("L", (64, 64))
+    image = ImageOps.exif_transpose(image).convert("L")
+    pixels = np.asarray(image.resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    fileobj.seek(0)
+    # 가로로 이웃한 픽셀의 밝기 증감 64개
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def lookup_caption(image):
+    """
+    업로드된 이미지를 변환하고 캡션 캐시를 조회합니다.
+    원본 파일이 같으면 이미지를 디코딩하지 않고 바로 반환합니다.
+    :param image: 업로드된 이미지 파일
+    :return: (캐시된 캡션 또는 None, prepare_caption_image 결과, 캐시 키)
+        캐시 키는 캡션 생성 후 caption_cache.set(*캐시 키, 캡션)에 사용
+    """
+    if image.size > IMAGE_CAPTION["MAX_UPLOAD_SIZE"]:
+        raise ImageRejected("Image too large", 413)
+    original = content_hash(image)
+    caption = caption_cache.peek(original)
+    if caption is not None:
+        return caption, None, None
+
+    prepared = prepare_caption_image(image)
+    fileobj = prepared[1]
+    # 원본을 그대로 사용하는 경우 정규화된 이미지의 해시는 원본과 같음
+    digest = original if fileobj is image else content_hash(fileobj)
+    phash = perceptual_hash(fileobj) if caption_cache.max_distance >= 0 else None
+    keys = (tuple(dict.fromkeys((digest, original))), phash)
+    return caption_cache.get(digest, phash), prepared, keys
+
+
+class MultipartBody:
+    """
+    파일 하나를 담은 multipart/form-data 요청 본문
+    파일 내용을 메모리에 모으지 않고 CHUNK_SIZE 단위로 읽으면서 전송합니다.
+    (재시도 시 처음부터 다시 보낼 수 있도록 반복할 때마다 파일을 되감음)
+    """
+
+    def __init__(self, field, filename, fileobj, content_type):
+        """
+        :param field: 폼 필드 이름
+        :param filename: 파일 이름
+        :param fileobj: 파일 객체 (seek/read 지원)
+        :param content_type: 파일의 MIME 타입
+        """
+        boundary = uuid.uuid4().hex
+        filename = (filename or field).replace('"', "%22")
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        self.tail = f"\r\n--{boundary}--\r\n".encode()
+        self.fileobj = fileobj
+        self.size = fileobj.seek(0, os.SEEK_END)
+
+    def __len__(self):
+        return len(self.head) + self.size + len(self.tail)
+
+    def __iter__(self):
+        yield self.head
+        self.fileobj.seek(0)
+        while chunk := self.fileobj.read(CHUNK_SIZE):
+            yield chunk
+        yield self.tail
@@ -0,0 +1,325 @@
+import csv
+import json
+import math
+import os
+import re
+import time
+
+from django.db import connection, transaction
+
+from .models import RoadStructure, RoadStructureChange
+from .reports import UPSERT_BATCH_SIZE, UPSERT_VENDORS
+from .spatial import ATTRIBUTES, grid_cell
+
+# 입력 열(속성) 이름 별칭
+COLUMN_ALIASES = {
+    "lat": "latitude",
+    "위도": "latitude",
+    "lon": "longitude",
+    "lng": "longitude",
+    "경도": "longitude",
+    "위험도": "weight",
+    "점자블록": "braille_block",
+    "음향신호기": "audio_signal",
+    "볼라드": "bollard",
+}
+
+# 정수 속성의 허용 값
+CHOICES = {
+    "braille_block": (0, 1, 2),
+    "audio_signal": (0, 1),
+    "bollard": (0, 1, 2),
+}
+
+# 저장하는 필드 (위도, 경도 외의 필드는 입력되지 않으면 기본값으로 추가,
+# 격자 셀 번호는 위도/경도로 계산)
+COLUMNS = ("latitude", "longitude", "weight", *ATTRIBUTES, "cell")
+
+# 파일 확장자 별 입력 형식
+FORMATS = {
+    ".csv": "csv",
+    ".geojson": "geojson",
+    ".json": "geojson",
+    ".geojsonl": "geojsonl",
+    ".geojsons": "geojsonl",
+    ".ndjson": "geojsonl",
+    ".jsonl": "geojsonl",
+}
+
+_FEATURES = re.compile(r'"features"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,\x1e"
+
+
+def detect_format(path):
+    """
+    파일 확장자로 입력 형식을 판단합니다.
+    :return: "csv", "geojson", "geojsonl"
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"지원하지 않는 파일 형식입니다: {path}")
+    return FORMATS[extension]
+
+
+def read_csv(file):
+    """
+    CSV 파일을 한 행씩 읽습니다. (첫 행은 열 이름)
+    :return: (줄 번호, {열 이름: 값}) 이터레이터
+    """
+    reader = csv.DictReader(file)
+    for record in reader:
+        yield f"line {reader.line_num}", record
+
+
+def read_geojson(file, chunk_size=1 << 16):
+    """
+    GeoJSON FeatureCollection의 "features" 배열을 전체를 메모리에 올리지 않고 하나씩 읽습니다.
+    :return: (Feature 번호, Feature) 이터레이터
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        match = _FEATURES.search(buffer)
+        if match:
+            buffer, position = buffer[match.end() :], 0
+            break
+        chunk = file.read(chunk_size)
+        if not chunk:
+            raise ValueError("GeoJSON FeatureCollection이 아닙니다.")
+        buffer += chunk
+
+    index = 0
+    while True:
+        # Feature 사이의 공백과 쉼표 건너뛰기
+        while position < len(buffer) and buffer[position] in _SEPARATORS:
+            position += 1
+        if position == len(buffer):
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise ValueError("GeoJSON 파일이 중간에 끝났습니다.")
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        if buffer[position] == "]":
+            return
+
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Feature가 읽은 범위 밖까지 이어지면 더 읽어서 다시 시도
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield f"feature {index}", feature
+        index += 1
+        position = end
+        if position > chunk_size:
+            buffer, position = buffer[position:], 0
+
+
+def read_geojson_lines(file):
+    """
+    한 줄에 Feature 하나씩 저장된 GeoJSON(GeoJSONSeq, NDJSON)을 읽습니다.
+    :return: (줄 번호, Feature) 이터레이터
+    """
+    for number, line in enumerate(file, start=1):
+        line = line.strip(_SEPARATORS)
+        if line:
+            yield f"line {number}", json.loads(line)
+
+
+def feature_record(feature):
+    """
+    Point Feature를 {열 이름: 값} 형식으로 변환합니다.
+    """
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") != "Point":
+        raise ValueError("Point geometry가 아닙니다.")
+    longitude, latitude = geometry["coordinates"][:2]
+    return {
+        **(feature.get("properties") or {}),
+        "latitude": latitude,
+        "longitude": longitude,
+    }
+
+
+def _number(value, name):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 값이 숫자가 아닙니다: {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} 값이 올바르지 않습니다: {value!r}")
+    return number
+
+
+def validate_record(record):
+    """
+    입력 행을 검증합니다.
+    :param record: {열 이름: 값} (빈 값은 입력하지 않은 것으로 처리)
+    :return: (위도, 경도, {입력된 필드(weight, braille_block, audio_signal, bollard): 값})
+    """
+    values = {}
+    for name, value in record.items():
+        if name is None or value is None or value == "":
+            continue
+        name = name.strip()
+        values[COLUMN_ALIASES.get(name, name)] = value
+
+    if "latitude" not in values or "longitude" not in values:
+        raise ValueError("위도/경도가 없습니다.")
+    latitude = _number(values["latitude"], "latitude")
+    longitude = _number(values["longitude"], "longitude")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"좌표 범위를 벗어났습니다: ({latitude}, {longitude})")
+
+    fields = {}
+    if "weight" in values:
+        fields["weight"] = _number(values["weight"], "weight")
+        if fields["weight"] < 0:
+            raise ValueError(f"weight 값이 음수입니다: {fields['weight']}")
+    for name, choices in CHOICES.items():
+        if name in values:
+            number = _number(values[name], name)
+            if number not in choices:
+                raise ValueError(f"{name} 값은 {choices} 중 하나여야 합니다: {number}")
+            fields[name] = int(number)
+    return latitude, longitude, fields
+
+
+def _upsert(rows, update_fields):
+    """
+    INSERT ... ON CONFLICT (위도, 경도) DO UPDATE로 입력된 필드만 덮어씁니다.
+    (ORM bulk_create보다 SQL 생성 비용이 훨씬 적음)
+    :param rows: [COLUMNS 순서의 값, ...]
+    :param update_fields: 이미 있는 위치에서 덮어쓸 필드
+    """
+    qn = connection.ops.quote_name
+    meta = RoadStructure._meta
+    column = {name: qn(meta.get_field(name).column) for name in COLUMNS}
+    if update_fields:
+        action = "DO UPDATE SET " + ", ".join(
+            f"{column[name]} = EXCLUDED.{column[name]}" for name in update_fields
+        )
+    else:
+        action = "DO NOTHING"
+    placeholder = "(" + ", ".join(["%s"] * len(COLUMNS)) + ")"
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            chunk = rows[i : i + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {qn(meta.db_table)} ({', '.join(column.values())})"
+                f" VALUES {', '.join([placeholder] * len(chunk))}"
+                f" ON CONFLICT ({column['latitude']}, {column['longitude']}) {action}",
+                [value for row in chunk for value in row],
+            )
+
+
+def _merge(rows, update_fields):
+    """
+    ON CONFLICT를 지원하지 않는 DB용: 이미 있는 위치는 bulk_update, 없는 위치는 bulk_create
+    """
+    objects = [RoadStructure(**dict(zip(COLUMNS, row))) for row in rows]
+    existing = {
+        (road_structure.latitude, road_structure.longitude): road_structure
+        for road_structure in RoadStructure.objects.filter(
+            latitude__in={obj.latitude for obj in objects},
+            longitude__in={obj.longitude for obj in objects},
+        )
+    }
+    created, updated = [], []
+    for obj in objects:
+        current = existing.get((obj.latitude, obj.longitude))
+        if current is None:
+            created.append(obj)
+            continue
+        for field in update_fields:
+            setattr(current, field, getattr(obj, field))
+        updated.append(current)
+    RoadStructure.objects.bulk_create(created)
+    if update_fields and updated:
+        RoadStructure.objects.bulk_update(updated, update_fields)
+
+
+def write_batch(batch):
+    """
+    위치 별 입력값을 한 트랜잭션으로 저장합니다. (이미 있는 위치는 입력된 필드만 덮어씀)
+    :param batch: {(위도, 경도): {필드: 값}}
+    """
+    defaults = {
+        name: RoadStructure._meta.get_field(name).get_default() for name in COLUMNS
+    }
+    # 입력된 필드 조합이 같은 행끼리 모아서 저장
+    groups = {}
+    for (latitude, longitude), fields in batch.items():
+        groups.setdefault(tuple(sorted(fields)), []).append(
+            (latitude, longitude)
+            + tuple(fields.get(name, defaults[name]) for name in COLUMNS[2:-1])
+            + (grid_cell(latitude, longitude),)
+        )
+
+    with transaction.atomic():
+        for update_fields, rows in groups.items():
+            if connection.vendor in UPSERT_VENDORS:
+                _upsert(rows, update_fields)
+            else:
+                _merge(rows, update_fields)
+
+
+def import_hazards(file, format, batch_size=5000, progress=None, max_errors=10):
+    """
+    CSV/GeoJSON 위험 구조물 데이터를 batch_size개씩 검증하여 DB에 저장합니다.
+    (위도, 경도)가 같은 행은 갱신하고, 없으면 새로 추가합니다.
+    :param file: 텍스트 파일 객체
+    :param format: "csv", "geojson", "geojsonl"
+    :param batch_size: 한 번에 저장하는 행 수 (메모리 사용량 상한)
+    :param progress: 배치를 저장할 때마다 호출할 함수 progress(stats)
+    :param max_errors: stats["errors"]에 보관하는 최대 오류 메시지 수
+    :return: {"read", "invalid", "written", "elapsed", "errors"}
+    """
+    if format == "csv":
+        records = read_csv(file)
+    elif format == "geojson":
+        records = read_geojson(file)
+    elif format == "geojsonl":
+        records = read_geojson_lines(file)
+    else:
+        raise ValueError(f"지원하지 않는 입력 형식입니다: {format}")
+
+    stats = {"read": 0, "invalid": 0, "written": 0, "elapsed": 0.0, "errors": []}
+    started = time.perf_counter()
+
+    def flush(batch):
+        write_batch(batch)
+        stats["written"] += len(batch)
+        stats["elapsed"] = time.perf_counter() - started
+        if progress:
+            progress(stats)
+
+    batch = {}
+    for position, record in records:
+        stats["read"] += 1
+        try:
+            if format != "csv":
+                record = feature_record(record)
+            latitude, longitude, fields = validate_record(record)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            stats["invalid"] += 1
+            if len(stats["errors"]) < max_errors:
+                stats["errors"].append(f"{position}: {str(e)}")
+            continue
+        # 같은 배치 안에서 위치가 겹치면 나중 행의 값을 사용
+        batch.setdefault((latitude, longitude), {}).update(fields)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = {}
+    if batch:
+        flush(batch)
+
+    if stats["written"]:
+        # 변경 범위가 크므로 각 워커의 스냅샷은 전체를 다시 불러오도록 기록
+        RoadStructureChange.record(RoadStructureChange.RELOAD)
+    stats["elapsed"] = time.perf_counter() - started
+    return stats
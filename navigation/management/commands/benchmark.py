@@ -0,0 +1,66 @@
+from statistics import mean
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from navigation.benchmarks import BENCHMARKS, test_database
+
+
+def format_seconds(seconds):
+    # 1ms 미만은 μs 단위로 출력
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.2f} μs"
+    return f"{seconds * 1000:9.2f} ms"
+
+
+class Command(BaseCommand):
+    help = "성능 벤치마크를 실행합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(BENCHMARKS))
+        parser.add_argument("--repeat", type=int, default=5, help="반복 횟수")
+        parser.add_argument(
+            "--latency", type=float, default=0.2, help="로컬 TMap 서버 응답 지연 (초)"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="동시 요청 수 (부하 테스트)"
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="로컬 TMap/AI 서버의 오류 응답 비율 (부하 테스트)",
+        )
+        parser.add_argument(
+            "--allow-live-db",
+            action="store_true",
+            help="테스트 DB를 만들지 않고 설정된 DB에서 실행 (벤치마크 데이터 추가/삭제)",
+        )
+
+    def handle(self, *args, **options):
+        benchmark = BENCHMARKS[options["name"]]
+        kwargs = {
+            "repeat": options["repeat"],
+            "latency": options["latency"],
+            "concurrency": options["concurrency"],
+            "error_rate": options["error_rate"],
+        }
+        if options["allow_live_db"]:
+            results = benchmark(**kwargs)
+        else:
+            with test_database():
+                results = benchmark(**kwargs)
+        for label, elapsed in results.items():
+            # 시간 목록이 아닌 값(메모리 등)은 그대로 출력
+            if not isinstance(elapsed, list):
+                self.stdout.write(f"{label:>20}: {elapsed:9.2f}")
+                continue
+            p50, p95, p99 = np.percentile(elapsed, (50, 95, 99))
+            self.stdout.write(
+                f"{label:>20}: mean {format_seconds(mean(elapsed))}"
+                f" / min {format_seconds(min(elapsed))}"
+                f" / p50 {format_seconds(p50)}"
+                f" / p95 {format_seconds(p95)}"
+                f" / p99 {format_seconds(p99)}"
+                f" / max {format_seconds(max(elapsed))}"
+            )
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from navigation.engine import PedestrianGraph
+
+
+class Command(BaseCommand):
+    help = "OSM(.osm) 또는 GeoJSON 보행로 파일을 로컬 경로 탐색용 그래프(.npz)로 변환합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="입력 파일 (.osm, .geojson, .json)")
+        parser.add_argument("output", help="출력 파일 (.npz)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        graph = PedestrianGraph.load(options["source"])
+        graph.save(options["output"])
+        self.stdout.write(
+            f"nodes: {len(graph)}, edges: {len(graph.indices)}"
+            f" ({time.perf_counter() - started:.2f}s)"
+        )
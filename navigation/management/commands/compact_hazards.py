@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from backend.settings import REPORT
+from navigation.reports import assign_cells, merge_nearby
+
+
+class Command(BaseCommand):
+    help = (
+        "위험 구조물에 격자 셀 번호를 채우고, 병합 반경 이내에 모여 있는 위험 구조물을"
+        " 하나로 합칩니다. (GPS 오차로 나뉘어 저장된 제보 정리)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--radius",
+            type=float,
+            default=REPORT["MERGE_RADIUS"],
+            help="병합 반경 (m, 디폴트: REPORT_MERGE_RADIUS)",
+        )
+        parser.add_argument(
+            "--no-merge", action="store_true", help="격자 셀 번호만 채움"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"cells assigned: {assign_cells()}")
+        if not options["no_merge"]:
+            self.stdout.write(f"merged: {merge_nearby(options['radius'])}")
@@ -0,0 +1,66 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from navigation.ingest import FORMATS, detect_format, import_hazards
+
+
+class Command(BaseCommand):
+    help = (
+        "CSV 또는 GeoJSON 위험 구조물 데이터를 일괄로 가져옵니다."
+        " (위도, 경도)가 같은 위험 구조물은 입력된 값으로 갱신합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source", help="입력 파일 (.csv, .geojson, .geojsonl, - : 표준 입력)"
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(set(FORMATS.values())),
+            help="입력 형식 (디폴트: 파일 확장자로 판단)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="한 번에 저장하는 행 수"
+        )
+        parser.add_argument(
+            "--encoding", default="utf-8-sig", help="입력 파일 인코딩 (예: cp949)"
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        format = options["format"]
+        if format is None:
+            if source == "-":
+                raise CommandError(
+                    "표준 입력을 사용할 때는 --format을 지정해야 합니다."
+                )
+            try:
+                format = detect_format(source)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        def progress(stats):
+            self.stdout.write(
+                f"{stats['written']} rows written"
+                f" ({stats['written'] / max(stats['elapsed'], 1e-9):.0f} rows/s)"
+            )
+
+        if source == "-":
+            sys.stdin.reconfigure(encoding=options["encoding"])
+            stats = import_hazards(
+                sys.stdin, format, options["batch_size"], progress=progress
+            )
+        else:
+            with open(source, encoding=options["encoding"], newline="") as file:
+                stats = import_hazards(
+                    file, format, options["batch_size"], progress=progress
+                )
+
+        for error in stats["errors"]:
+            self.stderr.write(f"invalid {error}")
+        self.stdout.write(
+            f"read: {stats['read']}, invalid: {stats['invalid']},"
+            f" written: {stats['written']} ({stats['elapsed']:.2f}s,"
+            f" {stats['read'] / max(stats['elapsed'], 1e-9):.0f} rows/s)"
+        )
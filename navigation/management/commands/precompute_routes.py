@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from backend.settings import CORRIDORS
+from navigation.corridors import mine_corridors, precompute_routes, read_corridors
+from navigation.views import ROUTE_ALPHA, FindRouteView
+
+
+class Command(BaseCommand):
+    help = (
+        "자주 요청되는 구간(설정된 목록, 요청 로그)의 최적 경로를 미리 계산합니다."
+        " 구간 안의 위험 구조물이 바뀐 경로만 다시 계산합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corridors",
+            default=CORRIDORS["FILE"],
+            help="구간 목록 CSV (start_x, start_y, end_x, end_y 열,"
+            " 디폴트: CORRIDORS_FILE)",
+        )
+        parser.add_argument(
+            "--log",
+            action="append",
+            default=[],
+            help="navigation.requests 요청 로그 파일 (여러 번 지정 가능)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=CORRIDORS["TOP"],
+            help="요청 로그에서 찾을 구간 수",
+        )
+        parser.add_argument(
+            "--min-count",
+            type=int,
+            default=CORRIDORS["MIN_COUNT"],
+            help="요청 로그에서 찾을 구간의 최소 요청 수",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="반복 실행 주기 (초, 0이면 한 번만 실행)",
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="모든 구간을 다시 계산"
+        )
+
+    def corridors(self, options):
+        corridors = []
+        if options["corridors"]:
+            with open(options["corridors"], encoding="utf-8-sig", newline="") as file:
+                try:
+                    corridors.extend(read_corridors(file))
+                except (KeyError, TypeError, ValueError) as e:
+                    raise CommandError(f"구간 목록을 읽을 수 없습니다: {str(e)}")
+        for path in options["log"]:
+            with open(path, encoding="utf-8", errors="replace") as file:
+                corridors.extend(
+                    mine_corridors(file, options["top"], options["min_count"])
+                )
+        return corridors
+
+    def handle(self, *args, **options):
+        if not options["corridors"] and not options["log"]:
+            raise CommandError("--corridors 또는 --log를 지정해야 합니다.")
+
+        while True:
+            started = time.perf_counter()
+            stats = precompute_routes(
+                self.corridors(options),
+                FindRouteView.find_candidates,
+                alpha=ROUTE_ALPHA,
+                force=options["force"],
+            )
+            self.stdout.write(
+                f"corridors: {stats['corridors']}, computed: {stats['computed']},"
+                f" unchanged: {stats['unchanged']}, failed: {stats['failed']},"
+                f" removed: {stats['removed']}"
+                f" ({time.perf_counter() - started:.2f}s)"
+            )
+            if options["interval"] <= 0:
+                break
+            time.sleep(options["interval"])
+            close_old_connections()
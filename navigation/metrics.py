@@ -0,0 +1,370 @@
+import contextvars
+import ipaddress
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from backend.settings import CORRIDORS, METRICS
+from .client import add_request_hook
+
+logger = logging.getLogger("navigation.requests")
+
+# Prometheus 텍스트 형식 응답의 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 히스토그램 구간 경계 (초, Prometheus 클라이언트 기본값과 같음)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 메트릭 목록 (워커 프로세스 당, /api/metrics/ 응답 순서)
+REGISTRY = []
+
+# 적중률을 수집할 캐시 {이름: stats()를 지원하는 캐시}
+_caches = {}
+
+# 요청 로그에 반올림하여 기록하는 좌표 쿼리 파라미터
+LOGGED_COORDINATES = ("start_x", "start_y", "end_x", "end_y")
+
+# 요청 처리 중 측정한 구간 시간 [(이름, 초), ...] (요청마다 새 리스트)
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """
+    증가만 하는 카운터 (레이블 값 조합 별)
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *label_values, amount=1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labels, label_values), value
+
+
+class Gauge:
+    """
+    현재 값(대기열 길이 등)을 나타내는 게이지 (레이블 값 조합 별)
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = float(value)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    """
+    구간 별 관측 횟수를 누적하는 히스토그램 (레이블 값 조합 별)
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # 레이블 값 -> [구간 별 횟수..., 합계, 전체 횟수]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            counts = self._values.get(label_values)
+            if counts is None:
+                counts = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        for label_values, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, [("le", bound)])
+                yield f"{self.name}_bucket{labels}", cumulative
+            labels = _format_labels(self.labels, label_values, [("le", "+Inf")])
+            yield f"{self.name}_bucket{labels}", counts[-1]
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels}", counts[-2]
+            yield f"{self.name}_count{labels}", counts[-1]
+
+
+request_seconds = Histogram(
+    "navigation_request_duration_seconds",
+    "API 요청 처리 시간",
+    labels=("view", "method", "status"),
+)
+step_seconds = Histogram(
+    "navigation_step_duration_seconds",
+    "요청 처리 구간 별 소요 시간 (snapshot, filter, tmap, ai 등)",
+    labels=("step",),
+)
+external_seconds = Histogram(
+    "navigation_external_request_duration_seconds",
+    "외부 API(TMap, AI 서버) 요청 시간",
+    labels=("client",),
+)
+external_requests = Counter(
+    "navigation_external_requests_total",
+    "외부 API 요청 수 (status: 응답 코드, 응답이 없으면 error)",
+    labels=("client", "status"),
+)
+external_errors = Counter(
+    "navigation_external_errors_total",
+    "외부 API 오류 수 (reason: 4xx/5xx 응답 코드 또는 예외 이름)",
+    labels=("client", "reason"),
+)
+hedged_requests = Counter(
+    "navigation_hedged_requests_total",
+    "응답이 늦어 한 번 더 보낸 외부 API 요청 수",
+    labels=("client",),
+)
+deadline_exceeded = Counter(
+    "navigation_deadline_exceeded_total",
+    "응답 대기 시간 상한(ROUTING DEADLINE)이 지나 기다리지 않은 외부 API 요청 수",
+    labels=("client",),
+)
+
+
+def register_cache(name, cache):
+    """
+    /api/metrics/에 적중/실패 횟수를 노출할 캐시를 등록합니다.
+    :param cache: stats()가 {"hits", "misses", ...}를 반환하는 캐시
+    """
+    _caches[name] = cache
+
+
+def _cache_samples():
+    for name, cache in sorted(_caches.items()):
+        for result, value in cache.stats().items():
+            if result != "hit_ratio":
+                labels = _format_labels(("cache", "result"), (name, result))
+                yield "navigation_cache_requests_total" + labels, value
+
+
+def render_metrics():
+    """
+    이 워커 프로세스의 메트릭을 Prometheus 텍스트 형식으로 반환합니다.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(f"{name} {value}" for name, value in metric.samples())
+    lines.append(
+        "# HELP navigation_cache_requests_total 캐시 조회 수 (result: 적중/실패)"
+    )
+    lines.append("# TYPE navigation_cache_requests_total counter")
+    lines.extend(f"{name} {value}" for name, value in _cache_samples())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def timer(step):
+    """
+    with 블록의 소요 시간을 step_seconds 히스토그램에 기록합니다.
+    요청 처리 중이면 응답의 Server-Timing 헤더와 요청 로그에도 포함합니다.
+    (TMap 요청처럼 같은 이름이 여러 번 측정되면 각각 기록)
+    :param step: 구간 이름
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        step_seconds.observe(elapsed, step)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((step, elapsed))
+
+
+def record_external_request(client, method, url, status_code, elapsed, error):
+    """
+    외부 요청 완료 시 호출되는 함수 (client.add_request_hook으로 등록)
+    """
+    external_seconds.observe(elapsed, client)
+    external_requests.inc(client, str(status_code or "error"))
+    if error is not None:
+        external_errors.inc(client, type(error).__name__)
+    elif status_code >= 400:
+        external_errors.inc(client, str(status_code))
+
+
+add_request_hook(record_external_request)
+
+
+def server_timing(timings, total):
+    """
+    Server-Timing 헤더 값을 생성합니다. (같은 이름이 여러 번이면 tmap_1, tmap_2, ...)
+    :param timings: [(이름, 초), ...]
+    :param total: 요청 전체 처리 시간 (초)
+    """
+    counts = {}
+    for step, _ in timings:
+        counts[step] = counts.get(step, 0) + 1
+    seen = {}
+    entries = []
+    for step, elapsed in timings:
+        if counts[step] > 1:
+            seen[step] = seen.get(step, 0) + 1
+            step = f"{step}_{seen[step]}"
+        entries.append(f"{step};dur={elapsed * 1000:.1f}")
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def log_query(query, precision=None):
+    """
+    요청 로그에 기록할 쿼리 파라미터를 반환합니다.
+    출발지/목적지 좌표는 구간을 찾는 데 필요한 자릿수로만 반올림하여 기록합니다.
+    (숫자가 아닌 좌표는 기록하지 않음)
+    :param query: 쿼리 파라미터 {이름: 값}
+    :param precision: 좌표 소수점 자릿수 (디폴트: CORRIDORS["PRECISION"])
+    :return: {이름: 값}
+    """
+    if precision is None:
+        precision = CORRIDORS["PRECISION"]
+    logged = {}
+    for name, value in query.items():
+        if name in LOGGED_COORDINATES:
+            try:
+                value = round(float(value), precision)
+            except ValueError:
+                continue
+        logged[name] = value
+    return logged
+
+
+def metrics_allowed(address, allowed=None):
+    """
+    /api/metrics/에 접근할 수 있는 클라이언트 주소인지 확인합니다.
+    :param address: 클라이언트 주소 (REMOTE_ADDR)
+    :param allowed: 허용할 주소 또는 대역 목록 (디폴트: METRICS["ALLOWED_IPS"])
+    """
+    if allowed is None:
+        allowed = METRICS["ALLOWED_IPS"]
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False) for network in allowed
+    )
+
+
+class RequestMetricsMiddleware:
+    """
+    요청 처리 시간과 구간 별 시간(timer)을 수집하는 미들웨어
+    - Server-Timing 응답 헤더 (METRICS["SERVER_TIMING"])
+    - navigation.requests 로거로 요청 별 JSON 로그 (METRICS["LOG_REQUESTS"])
+    - /api/metrics/ 히스토그램
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = []
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        self.finish(request, response, timings, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timings = []
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+        self.finish(request, response, timings, time.perf_counter() - started)
+        return response
+
+    def finish(self, request, response, timings, total):
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        request_seconds.observe(total, view, request.method, str(response.status_code))
+
+        if METRICS["SERVER_TIMING"]:
+            response["Server-Timing"] = server_timing(timings, total)
+        if METRICS["LOG_REQUESTS"]:
+            durations = {}
+            for step, elapsed in timings:
+                durations.setdefault(step, []).append(round(elapsed * 1000, 1))
+            logger.info(
+                json.dumps(
+                    {
+                        "view": view,
+                        "method": request.method,
+                        "path": request.path,
+                        # 자주 요청되는 구간 찾기에 사용 (precompute_routes --log)
+                        "query": log_query(request.GET.dict()),
+                        "status": response.status_code,
+                        "duration_ms": round(total * 1000, 1),
+                        "timings_ms": durations,
+                    },
+                    ensure_ascii=False,
+                )
+            )
@@ -1,7 +1,14 @@
+import time
+
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Exp
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import Group, Permission
 
+from backend.settings import REPORT
+from .spatial import MIN_DECAY_EXPONENT, decay_rate, grid_cell
+
 
 class User(AbstractUser):
     # 기본 내장 auth 앱의 User 모델과 사용자 정의 users 앱의 User 모델 사이의 충돌 방지
@@ -11,9 +18,38 @@ class User(AbstractUser):
     )
 
 
+def decayed_score(now, rate):
+    """
+    now 시각까지 감쇠한 제보 점수 식을 반환합니다.
+    (score × exp(-rate × (now - scored_at)), 너무 오래된 점수는 0)
+    :param now: 기준 시각 (Unix timestamp)
+    :param rate: 감쇠율 (1/초, spatial.decay_rate)
+    """
+    if rate <= 0:
+        return F("score")
+    return Case(
+        When(scored_at__lt=now + MIN_DECAY_EXPONENT / rate, then=Value(0.0)),
+        default=F("score") * Exp((F("scored_at") - now) * rate),
+        output_field=models.FloatField(),
+    )
+
+
+class RoadStructureQuerySet(models.QuerySet):
+    def with_current_weight(self, now=None):
+        """
+        현재 위험도(weight + 감쇠한 제보 점수)를 current_weight로 추가합니다.
+        :param now: 기준 시각 (Unix timestamp, 디폴트: 현재 시각)
+        """
+        if now is None:
+            now = time.time()
+        rate = decay_rate(REPORT["SCORE_HALF_LIFE"])
+        return self.annotate(current_weight=F("weight") + decayed_score(now, rate))
+
+
 class RoadStructure(models.Model):
     """
     교차점 별 위험 구조물 여부
+    위험도는 기본 위험도(weight)와 시간이 지나면 감쇠하는 제보 점수(score)의 합입니다.
     """
 
     # 점자블록(설치 0, 미흡 1, 미설치 2)
@@ -24,10 +60,34 @@ class RoadStructure(models.Model):
     bollard = models.IntegerField(default=0, blank=True)
     # 위험도(가중치)
     weight = models.FloatField(default=0.0, blank=True)
+    # 제보 점수 (scored_at 시각 기준, 읽을 때 REPORT["SCORE_HALF_LIFE"]에 따라 감쇠)
+    score = models.FloatField(default=0.0, db_default=0.0, blank=True)
+    # 제보 점수 갱신 시각 (Unix timestamp)
+    scored_at = models.FloatField(default=0.0, db_default=0.0, blank=True)
     # 위도
     latitude = models.FloatField()
     # 경도
     longitude = models.FloatField()
+    # 위도/경도가 속한 격자 셀 번호 (근접 제보 병합 시 인덱스로 조회, spatial.grid_cell)
+    cell = models.BigIntegerField(null=True, blank=True, db_index=True)
+
+    objects = RoadStructureQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # 같은 위치의 제보는 하나의 행에 누적 (INSERT ... ON CONFLICT 대상)
+            models.UniqueConstraint(
+                fields=["latitude", "longitude"],
+                name="unique_road_structure_location",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "cell"}
+        super().save(*args, **kwargs)
 
     @classmethod
     def create_table(cls, **kwargs):
@@ -48,3 +108,47 @@ class RoadStructure(models.Model):
             road_structure.delete()
         except cls.DoesNotExist:
             pass
+
+
+class RoadStructureChange(models.Model):
+    """
+    위험 구조물 변경 이력
+    각 워커의 메모리 스냅샷이 "버전 N 이후 변경분"만 DB에서 읽어 반영할 때 사용합니다.
+    (id가 스냅샷 버전에 해당)
+    """
+
+    # 전체를 다시 불러와야 하는 대량 변경 (일괄 가져오기 등)
+    RELOAD = 0
+
+    # 변경된 위험 구조물 id (삭제된 경우에도 남기기 위해 외래키를 사용하지 않음)
+    road_structure_id = models.BigIntegerField()
+    # 변경 시각
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    @classmethod
+    def record(cls, *road_structure_ids):
+        cls.objects.bulk_create(
+            [cls(road_structure_id=pk) for pk in road_structure_ids]
+        )
+
+
+class PrecomputedRoute(models.Model):
+    """
+    자주 요청되는 구간의 미리 계산된 최적 경로 (precompute_routes 명령으로 생성)
+    계산에 사용한 경유지 후보와 다르면(구간 안의 위험 구조물이 바뀌면) 사용하지 않습니다.
+    """
+
+    # 구간 키 (반올림한 출발지/목적지 좌표)
+    key = models.CharField(max_length=100, unique=True)
+    start_x = models.FloatField()
+    start_y = models.FloatField()
+    end_x = models.FloatField()
+    end_y = models.FloatField()
+    # TMap API 응답 데이터
+    route = models.JSONField()
+    # 계산에 사용한 경유지 후보 [[x, y, weight], ...]
+    candidates = models.JSONField()
+    # 계산에 사용한 위험 구조물 스냅샷 버전 (RoadStructureChange id)
+    version = models.BigIntegerField()
+    # 계산 시각
+    computed_at = models.DateTimeField(auto_now=True, db_index=True)
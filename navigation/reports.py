@@ -0,0 +1,367 @@
+import atexit
+import os
+import threading
+import time
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+
+from backend.settings import REPORT
+from .models import RoadStructure, RoadStructureChange, decayed_score
+from .snapshot import FIELDS, peek_snapshot
+from .spatial import (
+    ATTRIBUTES,
+    MIN_DECAY_EXPONENT,
+    decay_rate,
+    distance_between,
+    grid_cell,
+    neighbor_cells,
+)
+
+# INSERT ... ON CONFLICT DO UPDATE ... RETURNING을 지원하는 DB
+UPSERT_VENDORS = ("postgresql", "sqlite")
+
+# 쿼리 1개로 갱신하는 최대 위치 수 (쿼리 파라미터 개수 제한)
+UPSERT_BATCH_SIZE = 500
+
+
+def _upsert(items, now, rate):
+    """
+    INSERT ... ON CONFLICT (위도, 경도) DO UPDATE로 제보 점수를 증가시킵니다.
+    기존 점수는 마지막 갱신 이후 감쇠시킨 뒤 더하고, 갱신 시각을 now로 바꿉니다.
+    :param items: [((위도, 경도), 증가량), ...]
+    :param now: 갱신 시각 (Unix timestamp)
+    :param rate: 감쇠율 (1/초, spatial.decay_rate)
+    :return: 변경된 행 목록 (FIELDS 순서)
+    """
+    qn = connection.ops.quote_name
+    meta = RoadStructure._meta
+    column = {
+        name: qn(meta.pk.column if name == "pk" else meta.get_field(name).column)
+        for name in FIELDS
+    }
+    table = qn(meta.db_table)
+    latitude, longitude, score, scored_at = (
+        column["latitude"],
+        column["longitude"],
+        column["score"],
+        column["scored_at"],
+    )
+    insert_columns = ", ".join(
+        [
+            latitude,
+            longitude,
+            column["weight"],
+            score,
+            scored_at,
+            qn(meta.get_field("cell").column),
+            *(column[name] for name in ATTRIBUTES),
+        ]
+    )
+    # 새로 추가하는 위치의 기본 위험도와 다른 속성은 모델 기본값(0)
+    row = "(%s, %s, 0, %s, %s, %s" + ", 0" * len(ATTRIBUTES) + ")"
+    params = [
+        value
+        for (lat, lon), increment in items
+        for value in (lat, lon, increment, now, grid_cell(lat, lon))
+    ]
+    if rate > 0:
+        # 너무 오래된 점수는 exp() 언더플로 대신 0
+        decayed = (
+            f"CASE WHEN {table}.{scored_at} < %s THEN 0 "
+            f"ELSE {table}.{score} * EXP(%s * ({table}.{scored_at} - %s)) END"
+        )
+        params += [now + MIN_DECAY_EXPONENT / rate, rate, now]
+    else:
+        decayed = f"{table}.{score}"
+    sql = (
+        f"INSERT INTO {table} ({insert_columns}) VALUES {', '.join([row] * len(items))} "
+        f"ON CONFLICT ({latitude}, {longitude}) "
+        f"DO UPDATE SET {score} = {decayed} + EXCLUDED.{score}, "
+        f"{scored_at} = EXCLUDED.{scored_at} "
+        f"RETURNING {', '.join(column[name] for name in FIELDS)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _update_or_create(items, now, rate):
+    """
+    ON CONFLICT를 지원하지 않는 DB용: 감쇠 식(decayed_score)으로 증가시키고, 없으면 새로 추가합니다.
+    """
+    for (latitude, longitude), increment in items:
+        location = RoadStructure.objects.filter(latitude=latitude, longitude=longitude)
+        while not location.update(
+            score=decayed_score(now, rate) + increment, scored_at=now
+        ):
+            road_structure = RoadStructure(
+                latitude=latitude,
+                longitude=longitude,
+                score=increment,
+                scored_at=now,
+                cell=grid_cell(latitude, longitude),
+            )
+            try:
+                with transaction.atomic():
+                    RoadStructure.objects.bulk_create([road_structure])
+                break
+            # 다른 요청이 같은 위치를 먼저 추가한 경우 다시 증가 시도
+            except IntegrityError:
+                continue
+
+    query = Q()
+    for (latitude, longitude), _ in items:
+        query |= Q(latitude=latitude, longitude=longitude)
+    return list(RoadStructure.objects.filter(query).values_list(*FIELDS))
+
+
+def snap_locations(increments, radius_m=None):
+    """
+    제보 위치를 radius_m(m) 이내에서 가장 가까운 기존 위험 구조물의 위치로 옮깁니다.
+    주변 격자 셀(RoadStructure.cell 인덱스)의 행만 조회하며, 기존 위험 구조물이 없으면
+    같은 호출에서 먼저 처리한 가까운 제보 위치로 합칩니다.
+    :param increments: {(위도, 경도): 증가량}
+    :param radius_m: 병합 반경 (m, 디폴트: REPORT["MERGE_RADIUS"], 0이면 옮기지 않음)
+    :return: {(위도, 경도): 증가량}
+    """
+    if radius_m is None:
+        radius_m = REPORT["MERGE_RADIUS"]
+    if radius_m <= 0:
+        return increments
+
+    cells = {location: neighbor_cells(*location, radius_m) for location in increments}
+    queried = sorted(set().union(*cells.values()))
+    nearby = {}  # 셀 번호 -> [(위도, 경도), ...]
+    for i in range(0, len(queried), UPSERT_BATCH_SIZE):
+        for latitude, longitude, cell in RoadStructure.objects.filter(
+            cell__in=queried[i : i + UPSERT_BATCH_SIZE]
+        ).values_list("latitude", "longitude", "cell"):
+            nearby.setdefault(cell, []).append((latitude, longitude))
+
+    snapped = {}
+    for location, increment in sorted(increments.items()):
+        target, nearest = location, radius_m
+        for cell in cells[location]:
+            for other in nearby.get(cell, ()):
+                distance = distance_between(*location, *other)
+                if distance <= nearest:
+                    target, nearest = other, distance
+        if target == location and location not in snapped:
+            nearby.setdefault(grid_cell(*location), []).append(location)
+        snapped[target] = snapped.get(target, 0.0) + increment
+    return snapped
+
+
+def add_weights(increments, merge_radius=None):
+    """
+    위치 별 제보 점수를 원자적으로 증가시킵니다. (없는 위치는 새로 추가)
+    읽기-수정-쓰기 대신 DB에서 직접 더하므로 동시 제보가 유실되지 않습니다.
+    기존 점수는 마지막 갱신 이후 REPORT["SCORE_HALF_LIFE"]에 따라 감쇠시킨 뒤 더하므로
+    제보된 행만 갱신하고, 나머지 행은 읽을 때 감쇠를 계산합니다.
+    save()를 거치지 않으므로 변경 이력 기록과 스냅샷 반영은 여기서 직접 합니다.
+    :param increments: {(위도, 경도): 증가량}
+    :param merge_radius: 이 거리(m) 이내의 기존 위험 구조물에 합침
+        (디폴트: REPORT["MERGE_RADIUS"], snap_locations 참고)
+    :return: 변경된 행 [(pk, 경도, 위도, weight, score, scored_at, braille_block,
+        audio_signal, bollard), ...]
+    """
+    rows = []
+    now = time.time()
+    rate = decay_rate(REPORT["SCORE_HALF_LIFE"])
+    with transaction.atomic():
+        # 여러 요청이 같은 행들을 잠글 때 교착 상태가 생기지 않도록 항상 같은 순서로 처리
+        items = sorted(snap_locations(increments, merge_radius).items())
+        for i in range(0, len(items), UPSERT_BATCH_SIZE):
+            batch = items[i : i + UPSERT_BATCH_SIZE]
+            if connection.vendor in UPSERT_VENDORS:
+                rows.extend(_upsert(batch, now, rate))
+            else:
+                rows.extend(_update_or_create(batch, now, rate))
+        if rows:
+            RoadStructureChange.record(*(row[0] for row in rows))
+            snapshot = peek_snapshot()
+            if snapshot is not None:
+                transaction.on_commit(lambda: snapshot.apply(rows))
+    return rows
+
+
+class ReportBuffer:
+    """
+    위험 구조물 제보를 모아 두었다가 주기적으로 한 번에 반영하는 write-behind 버퍼
+    같은 위치의 제보는 증가량을 합쳐 하나의 행 갱신으로 처리합니다.
+    (워커가 비정상 종료되면 아직 반영하지 않은 제보는 사라질 수 있음)
+    """
+
+    def __init__(self, flush_interval=1.0, max_size=1000):
+        """
+        :param flush_interval: 반영 주기 (초)
+        :param max_size: 모아 둔 위치가 이 개수 이상이면 주기와 관계없이 바로 반영
+        """
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending = {}  # (위도, 경도) -> 증가량 합계
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, latitude, longitude, increment):
+        with self._lock:
+            key = (latitude, longitude)
+            self._pending[key] = self._pending.get(key, 0.0) + increment
+            full = len(self._pending) >= self.max_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        모아 둔 제보를 DB에 반영합니다.
+        :return: 반영한 위치 수
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                add_weights(pending)
+            except Exception:
+                # 반영에 실패하면 다음 주기에 다시 시도
+                with self._lock:
+                    for key, increment in pending.items():
+                        self._pending[key] = self._pending.get(key, 0.0) + increment
+                raise
+            return len(pending)
+
+    def start(self):
+        """
+        주기적으로 반영하는 스레드를 시작합니다. (프로세스 종료 시에도 반영)
+        """
+        threading.Thread(target=self._run, name="report-buffer", daemon=True).start()
+        atexit.register(self.flush)
+        return self
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                print(f"Report buffer flush failed: {str(e)}")
+
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+
+def get_report_buffer():
+    """
+    워커 프로세스의 제보 버퍼를 반환합니다.
+    :return: ReportBuffer
+    """
+    global _buffer, _buffer_pid
+    with _buffer_lock:
+        if _buffer is None or _buffer_pid != os.getpid():
+            _buffer = ReportBuffer(
+                flush_interval=REPORT["FLUSH_INTERVAL"],
+                max_size=REPORT["BUFFER_MAX_SIZE"],
+            ).start()
+            _buffer_pid = os.getpid()
+        return _buffer
+
+
+def report(latitude, longitude):
+    """
+    위험 구조물 제보를 반영합니다.
+    REPORT["BUFFER"]가 True이면 버퍼에 모아 두었다가 FLUSH_INTERVAL마다 반영합니다.
+    :param latitude: 위도
+    :param longitude: 경도
+    """
+    increment = REPORT["WEIGHT_INCREMENT"]
+    if REPORT["BUFFER"]:
+        get_report_buffer().add(latitude, longitude, increment)
+    else:
+        add_weights({(latitude, longitude): increment})
+
+
+def assign_cells(batch_size=5000):
+    """
+    격자 셀 번호가 없는 행(셀 번호 추가 이전에 저장된 행)에 셀 번호를 채웁니다.
+    :return: 갱신한 행 수
+    """
+    updated = 0
+    while True:
+        rows = list(
+            RoadStructure.objects.filter(cell__isnull=True).only(
+                "pk", "latitude", "longitude"
+            )[:batch_size]
+        )
+        if not rows:
+            return updated
+        for row in rows:
+            row.cell = grid_cell(row.latitude, row.longitude)
+        RoadStructure.objects.bulk_update(rows, ["cell"])
+        updated += len(rows)
+
+
+def merge_nearby(radius_m=None, batch_size=5000):
+    """
+    radius_m(m) 이내에 모여 있는 위험 구조물을 현재 위험도가 가장 높은 행 하나로 합칩니다.
+    (합쳐진 행의 위험도와 현재 시각까지 감쇠한 제보 점수는 더하고,
+    나머지 속성은 남는 행의 값을 유지)
+    :param radius_m: 병합 반경 (m, 디폴트: REPORT["MERGE_RADIUS"])
+    :return: 삭제한 행 수
+    """
+    if radius_m is None:
+        radius_m = REPORT["MERGE_RADIUS"]
+    if radius_m <= 0:
+        return 0
+
+    now = time.time()
+    rate = decay_rate(REPORT["SCORE_HALF_LIFE"])
+    kept = {}  # 셀 번호 -> [(pk, 위도, 경도), ...]
+    added = {}  # 남는 행 pk -> [더할 위험도, 더할 제보 점수]
+    removed = []
+    for pk, latitude, longitude, weight, current_weight in (
+        RoadStructure.objects.with_current_weight(now)
+        .order_by("-current_weight", "pk")
+        .values_list("pk", "latitude", "longitude", "weight", "current_weight")
+    ):
+        target, nearest = None, radius_m
+        for cell in neighbor_cells(latitude, longitude, radius_m):
+            for other_pk, other_latitude, other_longitude in kept.get(cell, ()):
+                distance = distance_between(
+                    latitude, longitude, other_latitude, other_longitude
+                )
+                if distance <= nearest:
+                    target, nearest = other_pk, distance
+        if target is None:
+            kept.setdefault(grid_cell(latitude, longitude), []).append(
+                (pk, latitude, longitude)
+            )
+        else:
+            total = added.setdefault(target, [0.0, 0.0])
+            total[0] += weight or 0.0
+            total[1] += (current_weight or 0.0) - (weight or 0.0)
+            removed.append(pk)
+
+    if not removed:
+        return 0
+    with transaction.atomic():
+        for pk, (weight, score) in added.items():
+            RoadStructure.objects.filter(pk=pk).update(
+                weight=F("weight") + weight,
+                score=decayed_score(now, rate) + score,
+                scored_at=now,
+            )
+        for i in range(0, len(removed), batch_size):
+            RoadStructure.objects.filter(pk__in=removed[i : i + batch_size]).delete()
+        # 변경 범위가 크므로 각 워커의 스냅샷은 전체를 다시 불러오도록 기록
+        RoadStructureChange.record(RoadStructureChange.RELOAD)
+    return len(removed)
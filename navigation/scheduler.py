@@ -0,0 +1,351 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+from .metrics import Counter, Gauge, Histogram
+
+# 요청 우선순위 (값이 작을수록 먼저 전송)
+PRIORITY_HIGH = 0  # 사용자에게 바로 보여줄 요청 (최단 경로)
+PRIORITY_LOW = 1  # 추측성 요청 (경유지 경로)
+
+# 비동기 요청이 전송 차례를 확인하는 최대 간격 (초)
+ASYNC_POLL_INTERVAL = 0.01
+
+queue_depth = Gauge(
+    "navigation_scheduler_queue_depth",
+    "전송 한도(RATE_LIMIT) 때문에 대기 중인 외부 API 요청 수",
+    labels=("client",),
+)
+queue_wait_seconds = Histogram(
+    "navigation_scheduler_wait_seconds",
+    "외부 API 요청의 전송 대기 시간 (priority: 0 최단 경로, 1 경유지 경로)",
+    labels=("client", "priority"),
+)
+coalesced_requests = Counter(
+    "navigation_coalesced_requests_total",
+    "같은 요청이 진행 중이어서 보내지 않고 결과를 공유한 요청 수",
+    labels=("client",),
+)
+queue_timeouts = Counter(
+    "navigation_scheduler_timeouts_total",
+    "대기 시간 상한(QUEUE_TIMEOUT)이 지나 보내지 않은 외부 API 요청 수",
+    labels=("client",),
+)
+
+
+class QueueTimeout(Exception):
+    """
+    전송 대기 시간 상한이 지남
+    """
+
+
+class RequestCancelled(Exception):
+    """
+    공유 중인 요청을 보내던 요청이 취소됨 (기다리던 요청 중 하나가 다시 보냄)
+    """
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 채워지고 최대 burst개까지 쌓이는 토큰 버킷
+    (스레드 안전하지 않음, RequestScheduler의 lock 안에서 사용)
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def wait_time(self):
+        """
+        :return: 토큰 하나를 쓸 수 있을 때까지 남은 시간 (초, 지금 쓸 수 있으면 0)
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RequestScheduler:
+    """
+    외부 API 요청 스케줄러 (워커 프로세스 당 하나)
+    - single-flight: 같은 키의 요청이 진행 중이면 새로 보내지 않고 그 결과를 공유
+    - 토큰 버킷: 초당 rate개(연속 최대 burst개)까지만 보내고, 나머지는 우선순위 순으로 대기
+    """
+
+    def __init__(self, name, rate=0.0, burst=1, queue_timeout=None, coalesce=True):
+        """
+        :param name: 메트릭 레이블 (client)
+        :param rate: 초당 최대 요청 수 (0이면 제한 없음)
+        :param burst: 연속으로 보낼 수 있는 최대 요청 수
+        :param queue_timeout: 최대 대기 시간 (초, None이면 제한 없음)
+        :param coalesce: 같은 키의 진행 중인 요청 결과를 공유
+        """
+        self.name = name
+        self.coalesce = coalesce
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.queue_timeout = queue_timeout
+        self._inflight = {}  # 키 -> Future (진행 중인 요청의 결과)
+        self._queue = []  # (우선순위, 순번) 힙
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _join(self, key, coalesce):
+        """
+        :return: (결과 Future, 직접 요청을 보내야 하면 True)
+        """
+        if not (coalesce and self.coalesce):
+            return Future(), True
+        with self._cond:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                coalesced_requests.inc(self.name)
+                return flight, False
+            flight = self._inflight[key] = Future()
+            return flight, True
+
+    def _finish(self, key, flight, result, error=None):
+        """
+        진행 중인 요청을 끝내고 기다리던 요청들에 결과(error가 있으면 예외)를 전달합니다.
+        """
+        with self._cond:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(result)
+
+    def _enqueue(self, priority):
+        ticket = (priority, next(self._seq))
+        heapq.heappush(self._queue, ticket)
+        queue_depth.set(len(self._queue), self.name)
+        self._cond.notify_all()
+        return ticket
+
+    def _dequeue(self, ticket):
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        queue_depth.set(len(self._queue), self.name)
+        # 다음 요청이 차례를 확인하도록 깨움
+        self._cond.notify_all()
+
+    def _poll(self, ticket, deadline):
+        """
+        대기열 맨 앞이고 토큰이 있으면 전송 차례를 가져옵니다. (lock 안에서 호출)
+        :return: 다시 확인할 때까지 기다릴 시간 (초, 차례를 가져왔으면 0, 알 수 없으면 None)
+        """
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            self._dequeue(ticket)
+            queue_timeouts.inc(self.name)
+            raise QueueTimeout(f"{self.name} request queue timeout")
+
+        wait = None
+        if self._queue[0] == ticket:
+            wait = self.bucket.wait_time()
+            if wait <= 0:
+                self.bucket.take()
+                self._dequeue(ticket)
+                return 0.0
+        if deadline is not None:
+            wait = deadline - now if wait is None else min(wait, deadline - now)
+        return wait
+
+    def _deadline(self):
+        if not self.queue_timeout:
+            return None
+        return time.monotonic() + self.queue_timeout
+
+    def acquire(self, priority=PRIORITY_LOW):
+        """
+        전송 차례가 될 때까지 기다립니다.
+        :raise QueueTimeout: queue_timeout이 지남
+        """
+        if self.bucket is None:
+            return
+        started = time.monotonic()
+        deadline = self._deadline()
+        with self._cond:
+            ticket = self._enqueue(priority)
+            while True:
+                wait = self._poll(ticket, deadline)
+                if wait == 0:
+                    break
+                self._cond.wait(wait)
+        queue_wait_seconds.observe(time.monotonic() - started, self.name, str(priority))
+
+    async def aacquire(self, priority=PRIORITY_LOW):
+        """
+        acquire의 비동기 버전 (이벤트 루프를 막지 않도록 짧은 간격으로 차례 확인)
+        """
+        if self.bucket is None:
+            return
+        started = time.monotonic()
+        deadline = self._deadline()
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._poll(ticket, deadline)
+                if wait == 0:
+                    break
+                await asyncio.sleep(
+                    ASYNC_POLL_INTERVAL
+                    if wait is None
+                    else min(wait, ASYNC_POLL_INTERVAL)
+                )
+        except asyncio.CancelledError:
+            with self._cond:
+                if ticket in self._queue:
+                    self._dequeue(ticket)
+            raise
+        queue_wait_seconds.observe(time.monotonic() - started, self.name, str(priority))
+
+    def call(self, key, func, *args, priority=PRIORITY_LOW, coalesce=True):
+        """
+        func(*args)로 요청을 보냅니다.
+        :param key: 같은 요청을 구분하는 키
+        :param priority: PRIORITY_HIGH 또는 PRIORITY_LOW
+        :param coalesce: False이면 같은 요청이 진행 중이어도 새로 보냄 (hedged request)
+        :return: func의 반환값 (대기 시간 상한이 지나면 None)
+        """
+        while True:
+            flight, leader = self._join(key, coalesce)
+            if leader:
+                break
+            try:
+                return flight.result()
+            except RequestCancelled:
+                # 공유 중인 요청이 취소되면 다시 요청
+                continue
+        result, error = None, None
+        try:
+            self.acquire(priority)
+            result = func(*args)
+        except QueueTimeout as e:
+            print(f"Error occurred: {str(e)}")
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            error = RequestCancelled(f"{self.name} request cancelled")
+            raise
+        finally:
+            self._finish(key, flight, result, error)
+        return result
+
+    async def acall(self, key, func, *args, priority=PRIORITY_LOW, coalesce=True):
+        """
+        call의 비동기 버전 (func는 코루틴 함수)
+        동기 요청과 진행 중인 요청을 공유합니다.
+        (요청을 보내던 코루틴이 취소되면 기다리던 요청 중 하나가 다시 보냄)
+        """
+        while True:
+            flight, leader = self._join(key, coalesce)
+            if leader:
+                break
+            try:
+                # 기다리던 요청이 취소되어도 공유 중인 요청은 취소하지 않음
+                return await asyncio.shield(asyncio.wrap_future(flight))
+            except RequestCancelled:
+                continue
+        result, error = None, None
+        try:
+            await self.aacquire(priority)
+            result = await func(*args)
+        except QueueTimeout as e:
+            print(f"Error occurred: {str(e)}")
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            error = RequestCancelled(f"{self.name} request cancelled")
+            raise
+        finally:
+            self._finish(key, flight, result, error)
+        return result
+
+
+class PriorityExecutor:
+    """
+    우선순위가 높은(값이 작은) 작업부터 실행하는 스레드 풀
+    (같은 우선순위는 제출 순서대로, 스레드는 필요할 때 max_workers개까지 생성)
+    """
+
+    def __init__(self, max_workers, thread_name_prefix="worker"):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._queue = []  # (우선순위, 순번, Future, 함수, args, kwargs) 힙
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = 0
+        self._idle = 0
+        self._running = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        ThreadPoolExecutor.submit과 같음 (우선순위: PRIORITY_LOW)
+        """
+        return self.submit_with_priority(PRIORITY_LOW, fn, *args, **kwargs)
+
+    def submit_with_priority(self, priority, fn, *args, **kwargs):
+        """
+        :return: concurrent.futures.Future
+        """
+        future = Future()
+        with self._cond:
+            heapq.heappush(
+                self._queue, (priority, next(self._seq), future, fn, args, kwargs)
+            )
+            # 대기 중인 스레드보다 작업이 많으면 스레드 추가
+            if len(self._queue) > self._idle and self._threads < self.max_workers:
+                self._threads += 1
+                threading.Thread(
+                    target=self._worker,
+                    name=f"{self.thread_name_prefix}_{self._threads}",
+                    daemon=True,
+                ).start()
+            self._cond.notify()
+        return future
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._idle += 1
+                while not self._queue:
+                    self._cond.wait()
+                self._idle -= 1
+                _, _, future, fn, args, kwargs = heapq.heappop(self._queue)
+                self._running += 1
+            try:
+                # 취소된 작업은 실행하지 않음
+                if future.set_running_or_notify_cancel():
+                    try:
+                        result = fn(*args, **kwargs)
+                    except BaseException as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(result)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """
+        대기 중이거나 실행 중인 작업이 없을 때까지 기다립니다.
+        :return: 모든 작업이 끝났으면 True
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._running, timeout
+            )
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import RoadStructure, RoadStructureChange
+from .snapshot import peek_snapshot
+
+
+@receiver(post_save, sender=RoadStructure)
+def road_structure_saved(sender, instance, **kwargs):
+    # 다른 워커가 폴링할 수 있도록 같은 트랜잭션 안에서 변경 이력 기록
+    RoadStructureChange.record(instance.pk)
+    # 이 워커의 스냅샷에는 커밋 이후 바로 반영
+    snapshot = peek_snapshot()
+    if snapshot is not None:
+        transaction.on_commit(lambda: snapshot.apply_local(instance))
+
+
+@receiver(post_delete, sender=RoadStructure)
+def road_structure_deleted(sender, instance, **kwargs):
+    RoadStructureChange.record(instance.pk)
+    snapshot = peek_snapshot()
+    if snapshot is not None:
+        transaction.on_commit(lambda: snapshot.apply_local(instance, deleted=True))
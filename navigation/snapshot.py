@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models import Max
+from django.utils import timezone
+
+from backend.settings import REPORT, SPATIAL_INDEX
+from .metrics import timer
+from .models import RoadStructure, RoadStructureChange
+from .spatial import ATTRIBUTES, GridIndex, decay_rate
+
+# 스냅샷에 불러오는 RoadStructure 필드
+FIELDS = ("pk", "longitude", "latitude", "weight", "score", "scored_at", *ATTRIBUTES)
+
+# 변경 이력 id에 빈 번호가 생겼을 때(진행 중이거나 롤백된 트랜잭션) 기다리는 시간 (초)
+GAP_TIMEOUT = 30.0
+
+
+class RoadStructureSnapshot:
+    """
+    위험 구조물(RoadStructure)의 워커 프로세스 내부 스냅샷
+    최초 1회 전체를 불러온 뒤에는 변경분만 반영합니다.
+    - 같은 워커의 변경: post_save/post_delete 시그널 (apply_local)
+    - 다른 워커의 변경: RoadStructureChange 이력 폴링 (refresh)
+    """
+
+    def __init__(self, cell_size=0.005, half_life=0.0):
+        """
+        :param cell_size: 격자 셀 한 변의 크기 (단위: 도)
+        :param half_life: 제보 점수 반감기 (초, 0이면 감쇠하지 않음)
+        """
+        self.index = GridIndex(cell_size=cell_size, decay_rate=decay_rate(half_life))
+        # 마지막으로 반영한 RoadStructureChange id
+        self.version = 0
+        # 스냅샷 내용이 바뀔 때마다 증가 (같은 워커의 변경 포함)
+        self.revision = 0
+        self.loaded = False
+        self.lock = threading.RLock()
+        self._gaps = {}  # 빈 변경 이력 id -> 처음 발견한 시각
+
+    def load(self):
+        """
+        DB에서 전체 위험 구조물을 불러옵니다.
+        """
+        with timer("db"):
+            # 전체를 읽기 전에 버전을 먼저 기록하여, 읽는 동안의 변경분은 다음 폴링에서 반영
+            version = RoadStructureChange.objects.aggregate(v=Max("id"))["v"] or 0
+            index = GridIndex(
+                cell_size=self.index.cell_size, decay_rate=self.index.decay_rate
+            )
+            rows = RoadStructure.objects.values_list(*FIELDS).iterator(chunk_size=10000)
+            for pk, x, y, weight, score, scored_at, *attributes in rows:
+                index.add(
+                    x,
+                    y,
+                    weight,
+                    key=pk,
+                    score=score,
+                    scored_at=scored_at,
+                    **dict(zip(ATTRIBUTES, attributes)),
+                )
+        with self.lock:
+            self.index = index
+            self.version = version
+            self.revision += 1
+            self._gaps.clear()
+            self.loaded = True
+
+    def apply(self, rows, deleted=()):
+        """
+        변경된 위험 구조물을 스냅샷에 반영합니다.
+        :param rows: [(pk, x, y, weight, score, scored_at, braille_block,
+            audio_signal, bollard), ...] 추가/수정된 행 (FIELDS 순서)
+        :param deleted: 삭제된 pk 목록
+        """
+        with self.lock:
+            for pk, x, y, weight, score, scored_at, *attributes in rows:
+                self.index.upsert(
+                    pk,
+                    x,
+                    y,
+                    weight,
+                    score=score,
+                    scored_at=scored_at,
+                    **dict(zip(ATTRIBUTES, attributes)),
+                )
+            for pk in deleted:
+                self.index.remove(pk)
+            self.revision += 1
+
+    def apply_local(self, instance, deleted=False):
+        """
+        같은 워커에서 저장/삭제된 RoadStructure 인스턴스를 반영합니다.
+        """
+        if not self.loaded:
+            return
+        if deleted:
+            self.apply([], deleted=[instance.pk])
+        else:
+            self.apply([tuple(getattr(instance, field) for field in FIELDS)])
+
+    def refresh(self, batch_size=1000):
+        """
+        현재 버전 이후의 변경 이력을 DB에서 읽어 반영합니다.
+        :return: 반영한 변경 이력 개수
+        """
+        changes = list(
+            RoadStructureChange.objects.filter(id__gt=self.version)
+            .order_by("id")
+            .values_list("id", "road_structure_id")[:batch_size]
+        )
+        if not changes:
+            return 0
+        # 대량 변경 후에는 변경분 대신 전체를 다시 불러옴
+        if any(pk == RoadStructureChange.RELOAD for _, pk in changes):
+            self.load()
+            return len(changes)
+
+        pks = {pk for _, pk in changes}
+        rows = list(RoadStructure.objects.filter(pk__in=pks).values_list(*FIELDS))
+        deleted = pks - {row[0] for row in rows}
+
+        with self.lock:
+            self.apply(rows, deleted)
+            # 연속된 id까지만 버전을 올리고, 빈 번호는 GAP_TIMEOUT 동안 기다림
+            version = self.version
+            now = time.monotonic()
+            for change_id, _ in changes:
+                if change_id != version + 1:
+                    first_seen = self._gaps.setdefault(version + 1, now)
+                    if now - first_seen < GAP_TIMEOUT:
+                        break
+                version = change_id
+            self.version = version
+            self._gaps = {k: v for k, v in self._gaps.items() if k > version}
+        return len(changes)
+
+    def arrays(self):
+        """
+        스냅샷 전체를 NumPy 배열로 복사합니다. (weights는 현재 시각 기준 가중치)
+        :return: {"xs", "ys", "weights", "braille_block", "audio_signal", "bollard"}
+        """
+        with self.lock:
+            index = self.index
+            columns = {"xs": index.xs, "ys": index.ys, **index.attributes}
+            arrays = {name: np.array(column) for name, column in columns.items()}
+            arrays["weights"] = index.current_weights()
+            return arrays
+
+    def query_circle(self, center, radius):
+        """
+        원 내부의 위험 구조물을 반환합니다.
+        :return: [(x, y, 현재 가중치), ...]
+        """
+        with self.lock:
+            return self.index.query_circle(center, radius)
+
+    def query_ellipse(self, focus1, focus2, max_distance):
+        """
+        두 초점까지의 거리 합이 max_distance(m) 이하인 타원 내부의 위험 구조물을 반환합니다.
+        :return: [(x, y, 현재 가중치), ...]
+        """
+        with self.lock:
+            return self.index.query_ellipse(focus1, focus2, max_distance)
+
+    def query_bbox(self, min_x, min_y, max_x, max_y):
+        """
+        사각형 영역 내부의 위험 구조물을 반환합니다.
+        :return: [(x, y, 현재 가중치), ...]
+        """
+        with self.lock:
+            return self.index.query_bbox(min_x, min_y, max_x, max_y)
+
+
+def prune_changes(retention=None):
+    """
+    보관 기간이 지난 변경 이력을 삭제합니다.
+    :param retention: 보관 기간 (초, 디폴트: SPATIAL_INDEX["CHANGE_RETENTION"])
+    """
+    if retention is None:
+        retention = SPATIAL_INDEX["CHANGE_RETENTION"]
+    RoadStructureChange.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=retention)
+    ).delete()
+
+
+def _poll(snapshot, interval):
+    last_pruned = time.monotonic()
+    while True:
+        time.sleep(interval)
+        try:
+            close_old_connections()
+            snapshot.refresh()
+            if time.monotonic() - last_pruned > SPATIAL_INDEX["CHANGE_RETENTION"] / 10:
+                prune_changes()
+                last_pruned = time.monotonic()
+        except Exception as e:
+            print(f"RoadStructure snapshot refresh failed: {str(e)}")
+
+
+_snapshot = None
+_snapshot_pid = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    """
+    워커 프로세스의 위험 구조물 스냅샷을 반환합니다.
+    최초 호출 시 DB에서 불러오고, 변경 이력을 주기적으로 확인하는 스레드를 시작합니다.
+    :return: RoadStructureSnapshot
+    """
+    global _snapshot, _snapshot_pid
+    snapshot = _snapshot
+    if snapshot is not None and _snapshot_pid == os.getpid():
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot_pid != os.getpid():
+            snapshot = RoadStructureSnapshot(
+                cell_size=SPATIAL_INDEX["CELL_SIZE"],
+                half_life=REPORT["SCORE_HALF_LIFE"],
+            )
+            snapshot.load()
+            if SPATIAL_INDEX["POLL_INTERVAL"] > 0:
+                threading.Thread(
+                    target=_poll,
+                    args=(snapshot, SPATIAL_INDEX["POLL_INTERVAL"]),
+                    name="road-structure-snapshot",
+                    daemon=True,
+                ).start()
+            _snapshot, _snapshot_pid = snapshot, os.getpid()
+        return _snapshot
+
+
+def peek_snapshot():
+    """
+    이미 불러온 스냅샷을 반환합니다. (없으면 None, DB 조회 안 함)
+    """
+    if _snapshot_pid != os.getpid():
+        return None
+    return _snapshot
+
+
+async def aget_snapshot():
+    """
+    get_snapshot의 비동기 버전 (최초 1회 DB 조회는 스레드에서 실행)
+    :return: RoadStructureSnapshot
+    """
+    snapshot = peek_snapshot()
+    if snapshot is not None:
+        return snapshot
+    return await sync_to_async(get_snapshot)()
@@ -0,0 +1,338 @@
+import math
+import time
+from array import array
+
+import numpy as np
+
+# 점마다 함께 저장하는 위험 구조물 속성
+ATTRIBUTES = ("braille_block", "audio_signal", "bollard")
+
+# DB에 저장하는 격자 셀 번호(RoadStructure.cell)의 셀 한 변의 크기 (단위: 도, 약 11m)
+DB_CELL_SIZE = 0.0001
+# 격자 셀 번호 = 셀 y × DB_CELL_STRIDE + 셀 x
+DB_CELL_STRIDE = 1 << 32
+# 위도 1도의 거리 (m, function.EARTH_RADIUS 기준)
+METERS_PER_DEGREE = math.radians(1.0) * 6371000.0
+# 제보 점수 감쇠 지수의 하한 (이보다 오래된 점수는 0, PostgreSQL exp() 언더플로 오류 방지)
+MIN_DECAY_EXPONENT = -700.0
+
+
+def decay_rate(half_life):
+    """
+    반감기로부터 제보 점수의 감쇠율을 계산합니다.
+    (현재 점수 = score × exp(-감쇠율 × (현재 시각 - scored_at)))
+    :param half_life: 반감기 (초, 0이면 감쇠하지 않음)
+    :return: 감쇠율 (1/초)
+    """
+    return math.log(2) / half_life if half_life > 0 else 0.0
+
+
+def grid_cell(latitude, longitude):
+    """
+    좌표가 속한 격자 셀 번호를 반환합니다. (RoadStructure.cell 인덱스 조회용)
+    """
+    return math.floor(latitude / DB_CELL_SIZE) * DB_CELL_STRIDE + math.floor(
+        longitude / DB_CELL_SIZE
+    )
+
+
+def neighbor_cells(latitude, longitude, radius_m):
+    """
+    좌표에서 radius_m(m) 이내의 점이 속할 수 있는 격자 셀 번호 목록을 반환합니다.
+    (경도 방향 셀 수는 위도에 따라 늘어남)
+    """
+    dy = radius_m / METERS_PER_DEGREE
+    dx = dy / max(math.cos(math.radians(latitude)), 1e-6)
+    rows = range(
+        math.floor((latitude - dy) / DB_CELL_SIZE),
+        math.floor((latitude + dy) / DB_CELL_SIZE) + 1,
+    )
+    columns = range(
+        math.floor((longitude - dx) / DB_CELL_SIZE),
+        math.floor((longitude + dx) / DB_CELL_SIZE) + 1,
+    )
+    return [row * DB_CELL_STRIDE + column for row in rows for column in columns]
+
+
+def distance_between(latitude1, longitude1, latitude2, longitude2):
+    """
+    두 좌표 사이의 거리 (m, 짧은 거리용 equirectangular 근사)
+    """
+    dx = (longitude2 - longitude1) * math.cos(math.radians((latitude1 + latitude2) / 2))
+    return math.hypot(dx, latitude2 - latitude1) * METERS_PER_DEGREE
+
+
+def ellipse_bbox(focus1, focus2, max_distance):
+    """
+    두 초점까지의 거리 합이 max_distance(m) 이하인 타원을 감싸는 사각형을 계산합니다.
+    (초점의 중간 위도 기준 equirectangular 근사, 타원이 기울어진 방향을 고려)
+    :param focus1: 초점 좌표 (x, y)
+    :param focus2: 초점 좌표 (x, y)
+    :param max_distance: 두 초점까지 거리 합의 최대값 (m)
+    :return: (min_x, min_y, max_x, max_y) (단위: 도, 두 초점 사이 거리가 더 길면 None)
+    """
+    cos_lat = max(math.cos(math.radians((focus1[1] + focus2[1]) / 2)), 1e-6)
+    dx = (focus2[0] - focus1[0]) * cos_lat * METERS_PER_DEGREE
+    dy = (focus2[1] - focus1[1]) * METERS_PER_DEGREE
+    focal = math.hypot(dx, dy)
+    if focal > max_distance:
+        return None
+    # 긴 반지름 a, 짧은 반지름 b, 긴 축 방향 (ux, uy)
+    a = max_distance / 2
+    b = math.sqrt(a * a - focal * focal / 4)
+    ux, uy = (dx / focal, dy / focal) if focal > 0 else (1.0, 0.0)
+    half_x = math.hypot(a * ux, b * uy) / (cos_lat * METERS_PER_DEGREE)
+    half_y = math.hypot(a * uy, b * ux) / METERS_PER_DEGREE
+    cx = (focus1[0] + focus2[0]) / 2
+    cy = (focus1[1] + focus2[1]) / 2
+    return cx - half_x, cy - half_y, cx + half_x, cy + half_y
+
+
+class GridIndex:
+    """
+    균일 격자(uniform grid) 기반 공간 인덱스
+    좌표와 가중치는 연속된 배열(array)에 저장하고, 각 격자 셀에는 점의 번호만 보관합니다.
+    점의 가중치는 기본 가중치와 시간에 따라 감쇠하는 제보 점수의 합으로, 조회할 때 계산합니다.
+    """
+
+    def __init__(self, cell_size=0.005, decay_rate=0.0):
+        """
+        :param cell_size: 격자 셀 한 변의 크기 (단위: 도)
+        :param decay_rate: 제보 점수 감쇠율 (1/초, spatial.decay_rate)
+        """
+        self.cell_size = cell_size
+        self.decay_rate = decay_rate
+        self.xs = array("d")  # 경도
+        self.ys = array("d")  # 위도
+        self.weights = array("d")  # 기본 가중치
+        self.scores = array("d")  # 마지막 갱신 시각 기준 제보 점수
+        self.scored_at = array("d")  # 제보 점수 갱신 시각 (Unix timestamp)
+        self.keys = array("q")  # 점 식별자 (RoadStructure pk)
+        self.attributes = {name: array("h") for name in ATTRIBUTES}
+        self.positions = {}  # 식별자 -> 점 번호
+        self.cells = {}  # (셀 x, 셀 y) -> array("q") 점 번호 목록
+
+    @classmethod
+    def from_points(cls, points, cell_size=0.005):
+        """
+        점 목록으로부터 인덱스를 생성합니다.
+        :param points: [(x, y, weight), ...]
+        :param cell_size: 격자 셀 한 변의 크기 (단위: 도)
+        :return: GridIndex
+        """
+        index = cls(cell_size=cell_size)
+        for x, y, weight in points:
+            index.add(x, y, weight)
+        return index
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def add(self, x, y, weight, key=None, score=0.0, scored_at=0.0, **attributes):
+        """
+        점을 인덱스에 추가합니다.
+        :param x: 경도
+        :param y: 위도
+        :param weight: 기본 가중치
+        :param key: 점 식별자 (디폴트: 점 번호)
+        :param score: 제보 점수 (scored_at 기준)
+        :param scored_at: 제보 점수 갱신 시각 (Unix timestamp)
+        :param attributes: 위험 구조물 속성 (braille_block, audio_signal, bollard)
+        :return: 추가된 점의 번호
+        """
+        i = len(self.xs)
+        if key is None:
+            key = i
+        self.xs.append(x)
+        self.ys.append(y)
+        self.weights.append(weight or 0.0)
+        self.scores.append(score or 0.0)
+        self.scored_at.append(scored_at or 0.0)
+        self.keys.append(key)
+        for name, column in self.attributes.items():
+            column.append(attributes.get(name) or 0)
+        self.positions[key] = i
+        self.cells.setdefault(self._cell(x, y), array("q")).append(i)
+        return i
+
+    def upsert(self, key, x, y, weight, score=0.0, scored_at=0.0, **attributes):
+        """
+        식별자가 key인 점을 추가하거나 좌표/가중치/속성을 갱신합니다.
+        :return: 점의 번호
+        """
+        i = self.positions.get(key)
+        if i is None:
+            return self.add(
+                x, y, weight, key=key, score=score, scored_at=scored_at, **attributes
+            )
+        cell = self._cell(self.xs[i], self.ys[i])
+        new_cell = self._cell(x, y)
+        if cell != new_cell:
+            self._unlink(cell, i)
+            self.cells.setdefault(new_cell, array("q")).append(i)
+        self.xs[i] = x
+        self.ys[i] = y
+        self.weights[i] = weight or 0.0
+        self.scores[i] = score or 0.0
+        self.scored_at[i] = scored_at or 0.0
+        for name, column in self.attributes.items():
+            column[i] = attributes.get(name) or 0
+        return i
+
+    def remove(self, key):
+        """
+        식별자가 key인 점을 삭제합니다. (마지막 점을 빈 자리로 옮겨 배열을 연속적으로 유지)
+        :return: 삭제 여부
+        """
+        i = self.positions.pop(key, None)
+        if i is None:
+            return False
+        self._unlink(self._cell(self.xs[i], self.ys[i]), i)
+        last = len(self.xs) - 1
+        if i != last:
+            last_cell = self._cell(self.xs[last], self.ys[last])
+            bucket = self.cells[last_cell]
+            bucket[bucket.index(last)] = i
+            self.xs[i] = self.xs[last]
+            self.ys[i] = self.ys[last]
+            self.weights[i] = self.weights[last]
+            self.scores[i] = self.scores[last]
+            self.scored_at[i] = self.scored_at[last]
+            self.keys[i] = self.keys[last]
+            for column in self.attributes.values():
+                column[i] = column[last]
+            self.positions[self.keys[i]] = i
+        for column in (
+            self.xs,
+            self.ys,
+            self.weights,
+            self.scores,
+            self.scored_at,
+            self.keys,
+        ):
+            column.pop()
+        for column in self.attributes.values():
+            column.pop()
+        return True
+
+    def _unlink(self, cell, i):
+        bucket = self.cells[cell]
+        bucket.remove(i)
+        if not bucket:
+            del self.cells[cell]
+
+    def _candidate_ids(self, min_x, min_y, max_x, max_y):
+        """
+        사각형 영역과 겹치는 셀에 속한 점 번호들을 반환합니다.
+        """
+        min_cx, min_cy = self._cell(min_x, min_y)
+        max_cx, max_cy = self._cell(max_x, max_y)
+        n_cells = (max_cx - min_cx + 1) * (max_cy - min_cy + 1)
+
+        ids = []
+        if n_cells > len(self.cells):
+            # 영역이 매우 넓으면 비어있는 셀까지 순회하지 않도록 존재하는 셀만 확인
+            for (cx, cy), bucket in self.cells.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    ids.extend(bucket)
+        else:
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    bucket = self.cells.get((cx, cy))
+                    if bucket:
+                        ids.extend(bucket)
+        # 입력 순서를 유지하여 선형 탐색과 동일한 결과를 보장
+        ids.sort()
+        return ids
+
+    def current_weights(self, ids=None, now=None):
+        """
+        점들의 현재 가중치를 계산합니다. (기본 가중치 + 시간에 따라 감쇠한 제보 점수)
+        :param ids: 점 번호 목록 (디폴트: 모든 점)
+        :param now: 기준 시각 (Unix timestamp, 디폴트: 현재 시각)
+        :return: float64 배열
+        """
+        if not len(self.xs):
+            return np.zeros(0)
+        weights = np.frombuffer(self.weights)
+        scores = np.frombuffer(self.scores)
+        scored_at = np.frombuffer(self.scored_at)
+        if ids is not None:
+            ids = np.asarray(ids, dtype=np.intp)
+            weights, scores, scored_at = weights[ids], scores[ids], scored_at[ids]
+        if self.decay_rate > 0:
+            if now is None:
+                now = time.time()
+            # 다른 서버의 시계가 앞선 경우에도 점수가 늘어나지 않도록 0 이하로 제한
+            exponent = np.minimum(self.decay_rate * (scored_at - now), 0.0)
+            scores = scores * np.exp(exponent)
+        return weights + scores
+
+    def _with_weights(self, ids):
+        xs, ys = self.xs, self.ys
+        return [
+            (xs[i], ys[i], weight)
+            for i, weight in zip(ids, self.current_weights(ids).tolist())
+        ]
+
+    def query_bbox(self, min_x, min_y, max_x, max_y):
+        """
+        사각형 영역 내부의 점들을 반환합니다.
+        :return: [(x, y, 현재 가중치), ...]
+        """
+        xs, ys = self.xs, self.ys
+        return self._with_weights(
+            [
+                i
+                for i in self._candidate_ids(min_x, min_y, max_x, max_y)
+                if min_x <= xs[i] <= max_x and min_y <= ys[i] <= max_y
+            ]
+        )
+
+    def query_ellipse(self, focus1, focus2, max_distance):
+        """
+        두 초점까지의 거리 합이 max_distance(m) 이하인 타원 내부의 점들을 반환합니다.
+        (출발지/목적지를 초점으로 하면 경유해도 우회 거리 이내인 점들)
+        타원을 감싸는 사각형과 겹치는 셀의 점만 골라 실제 거리를 계산합니다.
+        :param focus1: 초점 좌표 (x, y)
+        :param focus2: 초점 좌표 (x, y)
+        :param max_distance: 두 초점까지 거리 합의 최대값 (m)
+        :return: [(x, y, 현재 가중치), ...]
+        """
+        bbox = ellipse_bbox(focus1, focus2, max_distance)
+        if bbox is None:
+            return []
+        ids = np.asarray(self._candidate_ids(*bbox), dtype=np.intp)
+        if not len(ids):
+            return []
+        xs = np.frombuffer(self.xs)[ids]
+        ys = np.frombuffer(self.ys)[ids]
+        cos_lat = math.cos(math.radians((focus1[1] + focus2[1]) / 2))
+        total = np.hypot((xs - focus1[0]) * cos_lat, ys - focus1[1]) + np.hypot(
+            (xs - focus2[0]) * cos_lat, ys - focus2[1]
+        )
+        return self._with_weights(
+            ids[total * METERS_PER_DEGREE <= max_distance].tolist()
+        )
+
+    def query_circle(self, center, radius):
+        """
+        원 내부의 점들을 반환합니다. (거리 계산은 points_within_circle과 동일)
+        :param center: 원의 중심 좌표 (x, y)
+        :param radius: 원의 반지름 (단위: 도)
+        :return: [(x, y, 현재 가중치), ...]
+        """
+        cx, cy = center
+        xs, ys = self.xs, self.ys
+        return self._with_weights(
+            [
+                i
+                for i in self._candidate_ids(
+                    cx - radius, cy - radius, cx + radius, cy + radius
+                )
+                if ((xs[i] - cx) ** 2 + (ys[i] - cy) ** 2) ** 0.5 <= radius
+            ]
+        )
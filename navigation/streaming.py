@@ -0,0 +1,111 @@
+import json
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+
+from .compact import compact_route
+
+# 스트리밍 응답 형식 (?stream=) -> Content-Type
+STREAM_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def encode_event(stream, event, data):
+    """
+    이벤트 하나를 스트리밍 응답 형식으로 변환합니다.
+    - ndjson: {"event": 이벤트, ...data} 한 줄
+    - sse: "event: 이벤트" + "data: {...}" (Server-Sent Events)
+    """
+    body = json.dumps({"event": event, **data}, ensure_ascii=False)
+    if stream == "sse":
+        return f"event: {event}\ndata: {body}\n\n".encode()
+    return (body + "\n").encode()
+
+
+def encode_step(stream, step, route, shortest=None, fields=None):
+    """
+    경로 탐색 단계(iter_optimal_route)를 이벤트로 변환합니다.
+    - shortest: 최단 경로 {"route": ...}
+    - optimal: 최적 경로 {"route": ...} (최단 경로와 같으면 {"same_as_shortest": true})
+    - error: 경로를 찾지 못함 {"status": 404, "error": ...}
+    :param shortest: 이미 전송한 최단 경로
+    :param fields: compact 형식 필드 (None이면 TMap 응답 그대로)
+    """
+    if not route:
+        return encode_event(
+            stream, "error", {"status": 404, "error": "Route not found"}
+        )
+    if route is shortest:
+        return encode_event(stream, step, {"same_as_shortest": True})
+    if fields:
+        route = compact_route(route, fields)
+    return encode_event(stream, step, {"route": route})
+
+
+def stream_route(steps, stream, fields=None):
+    """
+    :param steps: iter_optimal_route의 (단계, 경로) 이터레이터
+    :return: 이벤트 이터레이터
+    """
+    shortest = None
+    for step, route in steps:
+        yield encode_step(stream, step, route, shortest, fields)
+        if not route:
+            return
+        if step == "shortest":
+            shortest = route
+
+
+async def astream_route(steps, stream, fields=None):
+    """
+    stream_route의 비동기 버전 (steps: aiter_optimal_route)
+    """
+    shortest = None
+    async for step, route in steps:
+        yield encode_step(stream, step, route, shortest, fields)
+        if not route:
+            return
+        if step == "shortest":
+            shortest = route
+
+
+def _gzip_events(events):
+    # 이벤트마다 압축 스트림을 flush하여 바로 전송 (GZipMiddleware는 버퍼링함)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for event in events:
+        yield compressor.compress(event) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+async def _agzip_events(events):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for event in events:
+        yield compressor.compress(event) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def streaming_response(request, events, stream):
+    """
+    이벤트 스트림 응답을 생성합니다. (gzip을 지원하는 클라이언트에는 이벤트 단위로 압축)
+    :param events: stream_route 또는 astream_route의 이벤트 이터레이터
+    :param stream: "ndjson" 또는 "sse"
+    """
+    gzip = re_accepts_gzip.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if gzip:
+        events = (
+            _agzip_events(events)
+            if hasattr(events, "__aiter__")
+            else _gzip_events(events)
+        )
+    response = StreamingHttpResponse(events, content_type=STREAM_CONTENT_TYPES[stream])
+    response["Cache-Control"] = "no-cache"
+    # 프록시(nginx)가 응답을 모아서 보내지 않도록 설정
+    response["X-Accel-Buffering"] = "no"
+    if gzip:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
@@ -1,3 +1,1839 @@
-from django.test import TestCase
+import asyncio
+import heapq
+import io
+import json
+import math
+import os
+import random
+import threading
+import tempfile
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import close_old_connections, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from backend.settings import IMAGE_CAPTION, REPORT, ROUTING, TMAP
+from . import client, engine
+from .cache import CaptionCache, CountingCache, DjangoCache, LocalCache
+from .client import AsyncHttpClient, CircuitBreaker, HttpClient
+from .compact import COMPACT_FIELDS, compact_route, encode_polyline, parse_fields
+from .corridors import (
+    CorridorRoutes,
+    corridor_key,
+    mine_corridors,
+    precompute_routes,
+)
+from .engine import LocalRouter, PedestrianGraph
+from .fakes import (
+    FakeCaptionServer,
+    FakeTMapServer,
+    fake_route_response,
+    fake_tmap,
+)
+from .function import (
+    CIRCLE_RADIUS_FACTOR,
+    EARTH_RADIUS,
+    acalculate_path_response,
+    afind_optimal_route,
+    calculate_path_response,
+    fetch_path_responses,
+    find_optimal_route,
+    plan_pass_lists,
+    points_within_circle,
+    points_within_distance,
+    route_cache,
+    route_cache_key,
+    select_highest_safety_points,
+    select_optimal_route,
+    tmap_executor,
+    top_k_indices,
+)
+from .imaging import (
+    ImageRejected,
+    MultipartBody,
+    check_content_length,
+    lookup_caption,
+    prepare_caption_image,
+)
+from .ingest import import_hazards, read_geojson
+from .metrics import log_query, metrics_allowed
+from .models import PrecomputedRoute, RoadStructure, RoadStructureChange
+from .reports import add_weights, report
+from .scheduler import RequestScheduler
+from .snapshot import GAP_TIMEOUT, RoadStructureSnapshot
+from .spatial import METERS_PER_DEGREE, GridIndex, ellipse_bbox
+from .streaming import astream_route, stream_route
+from .views import FindRouteView
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    name = "test-breaker"
+
+    def setUp(self):
+        self.breaker = client._breakers[self.name] = CircuitBreaker(1, 0.05)
+
+    def tearDown(self):
+        client._breakers.pop(self.name, None)
+
+    def open_until_half_open(self):
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "open")
+        time.sleep(0.06)
+        self.assertEqual(self.breaker.state, "half_open")
+
+    def test_half_open_allows_one_probe(self):
+        self.open_until_half_open()
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_cancelled_probe_releases_breaker(self):
+        import httpx
+
+        async def hang(request):
+            await asyncio.sleep(10)
+
+        async def cancel_probe():
+            http = AsyncHttpClient(self.name)
+            http.client = httpx.AsyncClient(transport=httpx.MockTransport(hang))
+            task = asyncio.create_task(http.get("http://upstream.test/"))
+            await asyncio.sleep(0.01)
+            self.assertFalse(self.breaker.allow())
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await http.aclose()
+
+        self.open_until_half_open()
+        asyncio.run(cancel_probe())
+        # 취소된 요청은 성공/실패로 기록하지 않고 다음 시험 요청을 허용
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertTrue(self.breaker.allow())
+
+
+class FindOptimalRouteTests(TestCase):
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+    candidates = [(126.9850, 37.5690, 1.0), (126.9880, 37.5672, 0.5)]
+    alpha = 2.0
+
+    def setUp(self):
+        route_cache.clear()
+
+    def tearDown(self):
+        # deadline 이후에도 진행 중인 요청이 다음 테스트의 요청과 합쳐지지 않도록 기다림
+        tmap_executor.wait_idle()
+
+    def test_concurrent_requests_match_sequential(self):
+        pass_lists, scores = plan_pass_lists(
+            self.start, self.end, self.candidates, self.alpha
+        )
+        with fake_tmap(latency=0.05):
+            # 경유지 조합을 하나씩 요청하던 기존 방식 (비교 기준)
+            sequential = [
+                calculate_path_response(self.start, self.end, p)
+                for p in [None] + pass_lists
+            ]
+            route_cache.clear()
+            concurrent = fetch_path_responses(self.start, self.end, [None] + pass_lists)
+            route_cache.clear()
+            route = find_optimal_route(
+                self.start, self.end, self.candidates, self.alpha
+            )
+            route_cache.clear()
+            async_route = asyncio.run(
+                afind_optimal_route(self.start, self.end, self.candidates, self.alpha)
+            )
+
+        expected = select_optimal_route(
+            sequential[0], sequential[1:], self.alpha, scores
+        )
+        self.assertGreater(len(pass_lists), 1)
+        self.assertEqual(concurrent, sequential)
+        self.assertIsNotNone(expected)
+        self.assertEqual(route, expected)
+        self.assertEqual(async_route, expected)
+
+    def test_deadline_returns_received_shortest_route(self):
+        with fake_tmap() as server:
+            shortest = calculate_path_response(self.start, self.end)
+            server.latency = 1.0
+            started = time.monotonic()
+            route = find_optimal_route(
+                self.start,
+                self.end,
+                self.candidates,
+                self.alpha,
+                deadline=started + 0.2,
+            )
+            elapsed = time.monotonic() - started
+
+        # 경유지 경로를 기다리지 않고 캐시된 최단 경로 반환
+        self.assertEqual(route, shortest)
+        self.assertLess(elapsed, 1.0)
+
+    def test_deadline_falls_back_to_precomputed_route(self):
+        precomputed = {"type": "FeatureCollection", "features": []}
+        # 경유지 후보가 바뀐 구간 경로 (평소에는 사용하지 않고 대체 경로로만 사용)
+        PrecomputedRoute.objects.create(
+            key=corridor_key(self.start, self.end),
+            start_x=self.start[0],
+            start_y=self.start[1],
+            end_x=self.end[0],
+            end_y=self.end[1],
+            route=precomputed,
+            candidates=[list(self.candidates[0])],
+            version=-1,
+        )
+        routes = CorridorRoutes()
+        routes.load()
+
+        with (
+            fake_tmap(latency=1.0),
+            mock.patch.dict(ROUTING, {"DEADLINE": 0.2}),
+            mock.patch("navigation.views.get_corridor_routes", return_value=routes),
+        ):
+            started = time.monotonic()
+            route = FindRouteView().find_route(*self.start, *self.end)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(route, precomputed)
+        self.assertLess(elapsed, 1.0)
+
+
+class PointFilterTests(SimpleTestCase):
+    """
+    NumPy로 바꾼 후보 필터링/상위 k개 선택이 기존 반복문과 같은 결과를 반환하는지 확인
+    """
+
+    center = (126.985, 37.568)
+
+    def setUp(self):
+        rng = random.Random(0)
+        # 가중치가 같은 점이 많도록 정수 가중치 사용
+        self.points = [
+            (
+                self.center[0] + rng.uniform(-0.02, 0.02),
+                self.center[1] + rng.uniform(-0.02, 0.02),
+                float(rng.randint(0, 5)),
+            )
+            for _ in range(500)
+        ]
+
+    def test_points_within_circle(self):
+        radius = 0.01
+        expected = []
+        for point in self.points:
+            distance = (
+                (point[0] - self.center[0]) ** 2 + (point[1] - self.center[1]) ** 2
+            ) ** 0.5
+            if distance <= radius * CIRCLE_RADIUS_FACTOR:
+                expected.append(point)
+        self.assertEqual(
+            points_within_circle(self.points, self.center, radius), expected
+        )
+        self.assertEqual(points_within_circle([], self.center, radius), [])
+
+    def test_points_within_distance(self):
+        radius_m = 1000
+        cos_lat = math.cos(math.radians(self.center[1]))
+        expected = [
+            point
+            for point in self.points
+            if math.hypot(
+                math.radians(point[0] - self.center[0]) * cos_lat,
+                math.radians(point[1] - self.center[1]),
+            )
+            * EARTH_RADIUS
+            <= radius_m
+        ]
+        self.assertTrue(0 < len(expected) < len(self.points))
+        self.assertEqual(
+            points_within_distance(self.points, self.center, radius_m), expected
+        )
+        self.assertEqual(points_within_distance([], self.center, radius_m), [])
+
+    def test_top_k_matches_stable_sort(self):
+        weights = np.array([point[2] for point in self.points])
+        for k in (1, 2, 3, 10, 499, 500, 600):
+            expected = sorted(
+                range(len(weights)), key=lambda i: weights[i], reverse=True
+            )[:k]
+            self.assertEqual(top_k_indices(weights, k).tolist(), expected)
+            # 기존 select_highest_safety_points (sorted 후 상위 k개)
+            self.assertEqual(
+                select_highest_safety_points(self.points, k),
+                sorted(self.points, key=lambda p: p[2], reverse=True)[:k],
+            )
+
+    def test_top_k_ties_keep_input_order(self):
+        weights = np.array([1.0, 3.0, 3.0, 2.0, 3.0])
+        self.assertEqual(top_k_indices(weights, 2).tolist(), [1, 2])
+        self.assertEqual(top_k_indices(weights, 4).tolist(), [1, 2, 4, 3])
+        self.assertEqual(top_k_indices(np.zeros(0), 2).tolist(), [])
+        self.assertEqual(select_highest_safety_points([]), [])
+
+
+class AddWeightsTests(TestCase):
+    """
+    INSERT ... ON CONFLICT로 제보 점수를 증가시키는 경우 (_upsert)
+    """
+
+    location = (37.5665, 126.9780)
+    half_life = 3600.0
+
+    def setUp(self):
+        patcher = mock.patch.dict(
+            REPORT, {"SCORE_HALF_LIFE": self.half_life, "MERGE_RADIUS": 10.0}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertCurrentWeight(self, expected, now=None):
+        row = RoadStructure.objects.with_current_weight(now).get()
+        self.assertAlmostEqual(row.current_weight, expected, places=3)
+
+    def test_reports_accumulate_in_one_row(self):
+        add_weights({self.location: 1.0})
+        add_weights({self.location: 1.0})
+        self.assertEqual(RoadStructure.objects.count(), 1)
+        self.assertCurrentWeight(2.0)
+
+    def test_nearby_report_merges_into_existing_structure(self):
+        RoadStructure.objects.create(
+            latitude=self.location[0], longitude=self.location[1], weight=1.0
+        )
+        # 약 5m 떨어진 위치
+        add_weights({(self.location[0] + 0.000045, self.location[1]): 0.5})
+        self.assertEqual(RoadStructure.objects.count(), 1)
+        self.assertCurrentWeight(1.5)
+
+        # 약 20m 떨어진 위치는 새 위험 구조물로 추가
+        add_weights({(self.location[0] + 0.00018, self.location[1]): 0.5})
+        self.assertEqual(RoadStructure.objects.count(), 2)
+
+    def test_score_decays_before_increment(self):
+        add_weights({self.location: 2.0})
+        # 마지막 제보가 반감기 1번 전에 있었던 것으로 변경
+        RoadStructure.objects.update(scored_at=time.time() - self.half_life)
+        self.assertCurrentWeight(1.0)
+
+        add_weights({self.location: 0.5})
+        self.assertCurrentWeight(1.5)
+        self.assertCurrentWeight(0.75, now=time.time() + self.half_life)
+
+    def test_old_score_decays_to_zero(self):
+        add_weights({self.location: 2.0})
+        RoadStructure.objects.update(scored_at=time.time() - 1000 * self.half_life)
+        self.assertCurrentWeight(0.0)
+        add_weights({self.location: 0.5})
+        self.assertCurrentWeight(0.5)
+
+
+class UpdateOrCreateAddWeightsTests(AddWeightsTests):
+    """
+    ON CONFLICT를 지원하지 않는 DB의 경우 (_update_or_create)
+    """
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch("navigation.reports.UPSERT_VENDORS", ())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+# SQLite는 동시에 쓰는 트랜잭션을 기다리지 않고 실패시키므로 PostgreSQL에서만 실행
+@skipUnless(connection.vendor == "postgresql", "requires concurrent writers")
+class ConcurrentReportTests(TransactionTestCase):
+    location = (37.5665, 126.9780)
+    reporters = 2
+
+    def report_concurrently(self):
+        barrier = threading.Barrier(self.reporters)
+        errors = []
+
+        def run():
+            try:
+                barrier.wait()
+                report(*self.location)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=run) for _ in range(self.reporters)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertReported(self):
+        row = RoadStructure.objects.with_current_weight().get()
+        self.assertAlmostEqual(row.current_weight, float(self.reporters), places=3)
+
+    @mock.patch.dict(REPORT, {"WEIGHT_INCREMENT": 1.0, "BUFFER": False})
+    def test_concurrent_reports_upsert(self):
+        self.report_concurrently()
+        self.assertReported()
+
+    @mock.patch.dict(REPORT, {"WEIGHT_INCREMENT": 1.0, "BUFFER": False})
+    @mock.patch("navigation.reports.UPSERT_VENDORS", ())
+    def test_concurrent_reports_update_or_create(self):
+        self.report_concurrently()
+        self.assertReported()
+
+
+class RequestSchedulerTests(SimpleTestCase):
+    callers = 5
+
+    def setUp(self):
+        self.scheduler = RequestScheduler("test")
+        self.sent = 0
+
+    def fetch(self, value):
+        self.sent += 1
+        time.sleep(0.05)
+        return value
+
+    async def afetch(self, value):
+        self.sent += 1
+        await asyncio.sleep(0.05)
+        return value
+
+    def test_identical_calls_send_one_request(self):
+        results = []
+
+        def run():
+            results.append(self.scheduler.call("key", self.fetch, "route"))
+
+        threads = [threading.Thread(target=run) for _ in range(self.callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.sent, 1)
+        self.assertEqual(results, ["route"] * self.callers)
+
+    def test_identical_async_calls_send_one_request(self):
+        async def run():
+            return await asyncio.gather(
+                *(
+                    self.scheduler.acall("key", self.afetch, "route")
+                    for _ in range(self.callers)
+                )
+            )
+
+        self.assertEqual(asyncio.run(run()), ["route"] * self.callers)
+        self.assertEqual(self.sent, 1)
+
+    def test_cancelled_leader_hands_off_request(self):
+        async def run():
+            leader = asyncio.create_task(
+                self.scheduler.acall("key", self.afetch, "route")
+            )
+            await asyncio.sleep(0.01)
+            followers = [
+                asyncio.create_task(self.scheduler.acall("key", self.afetch, "route"))
+                for _ in range(self.callers - 1)
+            ]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await asyncio.gather(*followers)
+
+        # 기다리던 요청 중 하나가 다시 보내고 나머지는 그 결과를 공유
+        self.assertEqual(asyncio.run(run()), ["route"] * (self.callers - 1))
+        self.assertEqual(self.sent, 2)
+
+    def test_leader_error_is_shared(self):
+        def fail():
+            time.sleep(0.05)
+            raise ValueError("upstream error")
+
+        errors = []
+
+        def run():
+            try:
+                self.scheduler.call("key", fail)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(self.callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), self.callers)
+
+
+class AsyncCallImageCaptionViewTests(SimpleTestCase):
+    def setUp(self):
+        self.url = reverse("navigation:async_call_image_caption")
+
+    async def test_missing_image(self):
+        response = await self.async_client.patch(
+            self.url,
+            b"--boundary--\r\n",
+            content_type="multipart/form-data; boundary=boundary",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid input arguments"})
+
+    async def test_not_multipart(self):
+        response = await self.async_client.patch(
+            self.url, b"{}", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid input arguments"})
+
+
+class MetricsTests(SimpleTestCase):
+    def test_metrics_allowed_addresses(self):
+        allowed = ["127.0.0.1", "::1", "10.0.0.0/8"]
+        self.assertTrue(metrics_allowed("127.0.0.1", allowed))
+        self.assertTrue(metrics_allowed("::1", allowed))
+        self.assertTrue(metrics_allowed("10.1.2.3", allowed))
+        self.assertFalse(metrics_allowed("192.168.0.1", allowed))
+        self.assertFalse(metrics_allowed(None, allowed))
+
+    def test_metrics_view_rejects_other_clients(self):
+        url = reverse("navigation:metrics")
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url, REMOTE_ADDR="203.0.113.1")
+        self.assertEqual(response.status_code, 403)
+
+    def test_logged_coordinates_are_rounded(self):
+        query = {
+            "start_x": "126.978012345",
+            "start_y": "37.566498765",
+            "end_x": "126.99204",
+            "end_y": "abc",
+            "format": "compact",
+        }
+        self.assertEqual(
+            log_query(query, precision=4),
+            {
+                "start_x": 126.978,
+                "start_y": 37.5665,
+                "end_x": 126.992,
+                "format": "compact",
+            },
+        )
+
+    def test_mine_corridors_reads_rounded_log(self):
+        query = {
+            "start_x": "126.978012345",
+            "start_y": "37.566498765",
+            "end_x": "126.992012345",
+            "end_y": "37.570012345",
+        }
+        record = {
+            "view": "navigation:find_path",
+            "status": 200,
+            "query": log_query(query),
+        }
+        line = json.dumps(record)
+        self.assertEqual(
+            mine_corridors([line, line], min_count=2),
+            [((126.978, 37.5665), (126.992, 37.57))],
+        )
+
+
+class DjangoCacheTests(SimpleTestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_clear_keeps_other_keys(self):
+        routes = DjangoCache(prefix="route:")
+        captions = DjangoCache(prefix="caption:")
+        cache.set("session", "value")
+        routes.set("a", 1)
+        routes.set("b", 2)
+        routes.delete("b")
+        captions.set("a", "caption")
+
+        routes.clear()
+        self.assertIsNone(routes.get("a"))
+        self.assertEqual(captions.get("a"), "caption")
+        self.assertEqual(cache.get("session"), "value")
+
+    def test_expired_keys_are_forgotten(self):
+        routes = DjangoCache(timeout=0.01, prefix="route:")
+        routes.set("a", 1)
+        time.sleep(0.02)
+        routes.set("b", 2)
+        self.assertEqual(list(routes._keys), ["b"])
+
+    def test_async_route_lookup_does_not_block_event_loop(self):
+        backend = DjangoCache(prefix="route:")
+        routes = CountingCache(backend)
+        start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+        loop_calls = []
+
+        def off_loop(method):
+            def call(*args, **kwargs):
+                # 이벤트 루프 스레드에서 캐시 백엔드를 호출하면 기록
+                try:
+                    asyncio.get_running_loop()
+                    loop_calls.append(method.__name__)
+                except RuntimeError:
+                    pass
+                return method(*args, **kwargs)
+
+            return call
+
+        with (
+            mock.patch("navigation.function.route_cache", routes),
+            mock.patch.multiple(
+                backend._cache,
+                get=off_loop(backend._cache.get),
+                set=off_loop(backend._cache.set),
+            ),
+            fake_tmap() as server,
+        ):
+            first = asyncio.run(acalculate_path_response(start, end))
+            second = asyncio.run(acalculate_path_response(start, end))
+        self.assertEqual(loop_calls, [])
+        self.assertEqual(first, second)
+        self.assertEqual(server.request_count, 1)
+        self.assertEqual((routes.hits, routes.misses), (1, 1))
+        self.assertEqual(list(backend._keys), [route_cache_key(start, end, None)])
+
+
+class BenchReportTests(TransactionTestCase):
+    # SQLite는 동시에 쓰는 트랜잭션을 실패시키므로 스레드 1개로 실행
+    concurrency = 4 if connection.vendor == "postgresql" else 1
+
+    def test_atomic_reports_are_not_lost(self):
+        from .benchmarks import bench_report
+
+        results = bench_report(
+            repeat=1, concurrency=self.concurrency, reports=5, spots=2
+        )
+        self.assertEqual(results["upsert lost"], 0)
+        self.assertEqual(results["buffer lost"], 0)
+
+
+class HttpClientRetryTests(SimpleTestCase):
+    def post(self, server, **kwargs):
+        http = HttpClient("test-retry", backoff_factor=0, **kwargs)
+        try:
+            return http.post(server.url, files={"image": b"image"})
+        finally:
+            http.close()
+
+    def test_post_is_not_resent_after_server_error(self):
+        with FakeCaptionServer(error_rate=1.0) as server:
+            server.error_status = 503
+            self.assertEqual(self.post(server, retries=2).status_code, 503)
+            self.assertEqual(server.request_count, 1)
+
+            response = self.post(server, retries=2, retry_methods=("POST",))
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(server.request_count, 4)
+
+    def test_post_is_not_resent_after_read_timeout(self):
+        import requests
+
+        with FakeCaptionServer(latency=0.3) as server:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.post(server, retries=2, read_timeout=0.1)
+            time.sleep(0.3)
+            self.assertEqual(server.request_count, 1)
+
+
+class FindRouteBatchViewTests(TestCase):
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+
+    def setUp(self):
+        self.url = reverse("navigation:find_path_batch")
+        route_cache.clear()
+        # 미리 계산된 구간 경로 없음 (DB를 읽는 스레드를 시작하지 않음)
+        patcher = mock.patch(
+            "navigation.views.get_corridor_routes", return_value=CorridorRoutes()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        tmap_executor.wait_idle()
+
+    def trip(self, start=None, end=None):
+        start, end = start or self.start, end or self.end
+        return {
+            "start_x": start[0],
+            "start_y": start[1],
+            "end_x": end[0],
+            "end_y": end[1],
+        }
+
+    def post(self, trips):
+        return self.client.post(
+            self.url, {"routes": trips}, content_type="application/json"
+        )
+
+    def test_status_per_pair(self):
+        with fake_tmap():
+            response = self.post([self.trip(), {"start_x": "abc"}])
+        self.assertEqual(response.status_code, 200)
+        ok, invalid = response.json()["results"]
+        self.assertEqual(ok["status"], 200)
+        self.assertEqual(ok["route"]["type"], "FeatureCollection")
+        self.assertEqual(invalid["status"], 400)
+
+    def test_identical_pairs_share_requests(self):
+        other = (126.9850, 37.5690)
+        with fake_tmap() as server:
+            response = self.post([self.trip(), self.trip(), self.trip(end=other)])
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [200, 200, 200])
+        self.assertEqual(results[0]["route"], results[1]["route"])
+        # 위험 구조물이 없으므로 쌍 별 최단 경로 요청만 (같은 쌍은 1번)
+        self.assertEqual(server.request_count, 2)
+
+    @mock.patch.dict(ROUTING, {"BATCH_MAX_SIZE": 2})
+    def test_batch_size_limit(self):
+        self.assertEqual(self.post([self.trip()] * 3).status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post("routes").status_code, 400)
+
+    @mock.patch.dict(ROUTING, {"DEADLINE": 0.2})
+    def test_deadline_exceeded(self):
+        with fake_tmap(latency=1.0):
+            started = time.monotonic()
+            response = self.post([self.trip()])
+            elapsed = time.monotonic() - started
+        self.assertEqual(response.json()["results"][0]["status"], 504)
+        self.assertLess(elapsed, 1.0)
+
+
+class CorridorRoutesTests(TestCase):
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+    candidates = [(126.9850, 37.5690, 1.0)]
+    route = {"type": "FeatureCollection", "features": []}
+
+    def setUp(self):
+        self.snapshot = RoadStructureSnapshot()
+        self.snapshot.version = 5
+        patcher = mock.patch(
+            "navigation.corridors.get_snapshot", return_value=self.snapshot
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.find_candidates = mock.Mock(return_value=list(self.candidates))
+
+    def save_route(self, version=5):
+        PrecomputedRoute.objects.create(
+            key=corridor_key(self.start, self.end),
+            start_x=self.start[0],
+            start_y=self.start[1],
+            end_x=self.end[0],
+            end_y=self.end[1],
+            route=self.route,
+            candidates=[list(point) for point in self.candidates],
+            version=version,
+        )
+        routes = CorridorRoutes()
+        routes.load()
+        return routes
+
+    def test_hit_without_candidate_query(self):
+        routes = self.save_route()
+        self.assertEqual(
+            routes.get(self.start, self.end, self.find_candidates), self.route
+        )
+        self.find_candidates.assert_not_called()
+        self.assertEqual(routes.stats()["hits"], 1)
+
+    def test_changed_snapshot_checks_candidates_once_per_revision(self):
+        routes = self.save_route()
+        self.snapshot.version, self.snapshot.revision = 6, 1
+        for _ in range(3):
+            route = routes.get(self.start, self.end, self.find_candidates)
+            self.assertEqual(route, self.route)
+        self.assertEqual(self.find_candidates.call_count, 1)
+
+        self.snapshot.revision = 2
+        routes.get(self.start, self.end, self.find_candidates)
+        self.assertEqual(self.find_candidates.call_count, 2)
+
+    def test_stale_when_candidates_change(self):
+        routes = self.save_route()
+        self.snapshot.version, self.snapshot.revision = 6, 1
+        self.find_candidates.return_value = [(126.9880, 37.5672, 0.5)]
+        self.assertIsNone(routes.get(self.start, self.end, self.find_candidates))
+        self.assertIsNone(routes.get(self.start, self.end, self.find_candidates))
+        self.assertEqual(self.find_candidates.call_count, 1)
+        self.assertEqual(routes.stats()["stale"], 2)
+        # TMap 장애 시 대체 경로로는 사용
+        self.assertEqual(routes.fallback(self.start, self.end), self.route)
+
+    def test_expired(self):
+        self.save_route()
+        routes = CorridorRoutes(max_age=-1)
+        routes.load()
+        self.assertIsNone(routes.get(self.start, self.end, self.find_candidates))
+        self.assertEqual(routes.stats()["stale"], 1)
+
+    def test_miss(self):
+        routes = self.save_route()
+        self.assertIsNone(routes.get(self.start, (127.0, 37.6), self.find_candidates))
+        self.assertEqual(routes.stats()["misses"], 1)
+
+    def test_precompute_routes(self):
+        route_cache.clear()
+        other = ((126.9850, 37.5690), self.end)
+        with fake_tmap() as server:
+            stats = precompute_routes(
+                [(self.start, self.end), (self.start, self.end), other],
+                self.find_candidates,
+                alpha=1.5,
+            )
+            self.assertEqual(stats["corridors"], 2)
+            self.assertEqual(stats["computed"], 2)
+            row = PrecomputedRoute.objects.get(key=corridor_key(self.start, self.end))
+            self.assertEqual(row.version, 5)
+            self.assertEqual(row.route["type"], "FeatureCollection")
+
+            # 경유지 후보가 그대로인 구간은 다시 계산하지 않음
+            requests = server.request_count
+            stats = precompute_routes(
+                [(self.start, self.end), other], self.find_candidates, 1.5
+            )
+            self.assertEqual((stats["computed"], stats["unchanged"]), (0, 2))
+            self.assertEqual(server.request_count, requests)
+
+            # 목록에서 빠진 구간은 삭제
+            stats = precompute_routes([other], self.find_candidates, 1.5, force=True)
+            self.assertEqual((stats["computed"], stats["removed"]), (1, 1))
+        self.assertEqual(PrecomputedRoute.objects.count(), 1)
+
+
+class GridIndexTests(SimpleTestCase):
+    cell_size = 0.01
+
+    def setUp(self):
+        rng = random.Random(0)
+        # 셀 경계 위/근처의 점과 음수 좌표를 포함
+        borders = [-0.02, -0.01, 0.0, 0.01, 0.02]
+        coordinates = [
+            (x + dx, y + dy)
+            for x in borders
+            for y in borders
+            for dx, dy in ((0, 0), (1e-9, -1e-9), (-1e-9, 1e-9))
+        ]
+        coordinates += [
+            (rng.uniform(-0.03, 0.03), rng.uniform(-0.03, 0.03)) for _ in range(200)
+        ]
+        self.index = GridIndex(cell_size=self.cell_size)
+        self.points = {}  # key -> (x, y, weight), 비교용 선형 탐색 대상
+        for key, (x, y) in enumerate(coordinates):
+            self.upsert(key, x, y, rng.uniform(0, 5))
+        self.rng = rng
+
+    def upsert(self, key, x, y, weight):
+        self.index.upsert(key, x, y, weight)
+        self.points[key] = (x, y, weight)
+
+    def remove(self, key):
+        self.assertTrue(self.index.remove(key))
+        del self.points[key]
+
+    def assertMatchesScan(self, result, contains):
+        self.assertEqual(
+            sorted(result), sorted(p for p in self.points.values() if contains(p))
+        )
+
+    def check_queries(self):
+        boxes = [
+            (-0.01, -0.01, 0.01, 0.01),  # 셀 경계와 일치
+            (-0.025, -0.005, -0.005, 0.015),
+            (0.0, 0.0, 0.0, 0.0),
+            (-1.0, -1.0, 1.0, 1.0),  # 셀 수가 점보다 많은 넓은 영역
+        ]
+        for _ in range(20):
+            x1, x2 = sorted(self.rng.uniform(-0.03, 0.03) for _ in range(2))
+            y1, y2 = sorted(self.rng.uniform(-0.03, 0.03) for _ in range(2))
+            boxes.append((x1, y1, x2, y2))
+        for min_x, min_y, max_x, max_y in boxes:
+            self.assertMatchesScan(
+                self.index.query_bbox(min_x, min_y, max_x, max_y),
+                lambda p: min_x <= p[0] <= max_x and min_y <= p[1] <= max_y,
+            )
+
+        circles = [((0.0, 0.0), 0.01), ((-0.01, -0.01), 0.015), ((0.02, -0.02), 0.0)]
+        for _ in range(20):
+            center = (self.rng.uniform(-0.03, 0.03), self.rng.uniform(-0.03, 0.03))
+            circles.append((center, self.rng.uniform(0, 0.02)))
+        for (cx, cy), radius in circles:
+            self.assertMatchesScan(
+                self.index.query_circle((cx, cy), radius),
+                lambda p: ((p[0] - cx) ** 2 + (p[1] - cy) ** 2) ** 0.5 <= radius,
+            )
+
+    def test_queries_match_linear_scan(self):
+        self.check_queries()
+
+    def test_queries_after_upsert_and_remove(self):
+        keys = list(self.points)
+        # 셀을 옮기는 갱신, 같은 셀 안의 갱신, 새 점 추가
+        for key in keys[:30]:
+            x, y, weight = self.points[key]
+            self.upsert(key, -x, y + self.cell_size / 2, weight + 1)
+        self.upsert(keys[30], *self.points[keys[30]][:2], 0.5)
+        self.upsert(10_000, -0.015, -0.015, 2.0)
+        # 마지막 점이 빈 자리로 옮겨지는 삭제와 마지막 점 자체의 삭제
+        self.remove(keys[0])
+        self.remove(10_000)
+        for key in self.rng.sample(keys[1:], 60):
+            self.remove(key)
+        self.assertFalse(self.index.remove(keys[0]))
+
+        self.assertEqual(len(self.index), len(self.points))
+        for key, (x, y, weight) in self.points.items():
+            i = self.index.positions[key]
+            self.assertEqual(self.index.keys[i], key)
+            self.assertEqual((self.index.xs[i], self.index.ys[i]), (x, y))
+            self.assertEqual(self.index.weights[i], weight)
+        self.check_queries()
+
+    def test_remove_all(self):
+        for key in list(self.points):
+            self.remove(key)
+        self.assertEqual(self.index.cells, {})
+        self.assertEqual(self.index.query_bbox(-1, -1, 1, 1), [])
+
+
+class EllipseQueryTests(SimpleTestCase):
+    # 서울 부근 (cos(위도) 보정 확인)
+    origin = (126.98, 37.56)
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.index = GridIndex(cell_size=0.002)
+        self.points = []
+        for _ in range(2000):
+            x = self.origin[0] + rng.uniform(-0.03, 0.03)
+            y = self.origin[1] + rng.uniform(-0.03, 0.03)
+            self.points.append((x, y, rng.uniform(0, 5)))
+            self.index.add(*self.points[-1])
+
+    def ellipse_distance(self, point, focus1, focus2):
+        cos_lat = math.cos(math.radians((focus1[1] + focus2[1]) / 2))
+        return sum(
+            math.hypot((point[0] - f[0]) * cos_lat, point[1] - f[1]) * METERS_PER_DEGREE
+            for f in (focus1, focus2)
+        )
+
+    def boundary_points(self, focus1, focus2, max_distance, scale):
+        """
+        타원 둘레를 scale 배 한 곡선 위의 점들 (scale < 1이면 내부, > 1이면 외부)
+        """
+        cos_lat = math.cos(math.radians((focus1[1] + focus2[1]) / 2))
+        dx = (focus2[0] - focus1[0]) * cos_lat * METERS_PER_DEGREE
+        dy = (focus2[1] - focus1[1]) * METERS_PER_DEGREE
+        focal = math.hypot(dx, dy)
+        a = max_distance / 2
+        b = math.sqrt(a * a - focal * focal / 4)
+        ux, uy = (dx / focal, dy / focal) if focal else (1.0, 0.0)
+        cx, cy = (focus1[0] + focus2[0]) / 2, (focus1[1] + focus2[1]) / 2
+        points = []
+        for i in range(72):
+            theta = math.radians(i * 5)
+            u, v = a * scale * math.cos(theta), b * scale * math.sin(theta)
+            points.append(
+                (
+                    cx + (u * ux - v * uy) / (cos_lat * METERS_PER_DEGREE),
+                    cy + (u * uy + v * ux) / METERS_PER_DEGREE,
+                )
+            )
+        return points
+
+    def ellipses(self):
+        x, y = self.origin
+        return [
+            ((x - 0.01, y), (x + 0.01, y), 2500),  # 동서 방향
+            ((x, y - 0.01), (x, y + 0.01), 2600),  # 남북 방향
+            ((x - 0.01, y - 0.01), (x + 0.01, y + 0.008), 3500),  # 기울어진 타원
+            ((x, y), (x, y), 1000),  # 원
+        ]
+
+    def test_bbox_contains_ellipse(self):
+        for focus1, focus2, max_distance in self.ellipses():
+            min_x, min_y, max_x, max_y = ellipse_bbox(focus1, focus2, max_distance)
+            boundary = self.boundary_points(focus1, focus2, max_distance, 1.0)
+            for px, py in boundary:
+                self.assertAlmostEqual(
+                    self.ellipse_distance((px, py), focus1, focus2), max_distance
+                )
+                self.assertTrue(min_x - 1e-9 <= px <= max_x + 1e-9)
+                self.assertTrue(min_y - 1e-9 <= py <= max_y + 1e-9)
+            # 사각형이 타원에 딱 맞음 (각 변에 닿는 둘레 점이 있음)
+            xs, ys = [p[0] for p in boundary], [p[1] for p in boundary]
+            self.assertLess(min(xs) - min_x, (max_x - min_x) * 0.01)
+            self.assertLess(max_y - max(ys), (max_y - min_y) * 0.01)
+        x, y = self.origin
+        self.assertIsNone(ellipse_bbox((x - 0.01, y), (x + 0.01, y), 1000))
+
+    def test_query_matches_linear_scan(self):
+        for focus1, focus2, max_distance in self.ellipses():
+            expected = [
+                p
+                for p in self.points
+                if self.ellipse_distance(p, focus1, focus2) <= max_distance
+            ]
+            self.assertGreater(len(expected), 0)
+            self.assertLess(len(expected), len(self.points))
+            self.assertEqual(
+                self.index.query_ellipse(focus1, focus2, max_distance), expected
+            )
+
+    def test_boundary_points(self):
+        for focus1, focus2, max_distance in self.ellipses():
+            index = GridIndex(cell_size=0.002)
+            inside = self.boundary_points(focus1, focus2, max_distance, 0.999)
+            outside = self.boundary_points(focus1, focus2, max_distance, 1.001)
+            for x, y in inside + outside:
+                index.add(x, y, 1.0)
+            # 타원 안쪽 둘레의 점은 모두 포함하고, 바깥쪽 둘레의 점은 모두 제외
+            self.assertEqual(
+                [
+                    (x, y)
+                    for x, y, _ in index.query_ellipse(focus1, focus2, max_distance)
+                ],
+                inside,
+            )
+        x, y = self.origin
+        self.assertEqual(self.index.query_ellipse((x - 0.1, y), (x + 0.1, y), 10), [])
+
+
+class RoadStructureSnapshotTests(TestCase):
+    def setUp(self):
+        self.first = RoadStructure.objects.create(
+            longitude=126.9780, latitude=37.5665, weight=1.0
+        )
+        self.snapshot = RoadStructureSnapshot()
+        self.snapshot.load()
+
+    def points(self):
+        return sorted(self.snapshot.query_bbox(-180, -90, 180, 90))
+
+    def latest_change(self):
+        return RoadStructureChange.objects.latest("id").id
+
+    def test_load(self):
+        self.assertTrue(self.snapshot.loaded)
+        self.assertEqual(self.snapshot.version, self.latest_change())
+        self.assertEqual(self.points(), [(126.9780, 37.5665, 1.0)])
+
+    def test_apply(self):
+        revision = self.snapshot.revision
+        self.snapshot.apply(
+            [(self.first.pk, 126.9790, 37.5665, 2.0, 0.0, 0.0, 0, 0, 1)]
+            + [(10_000, 126.9800, 37.5670, 0.5, 0.0, 0.0, 0, 0, 0)]
+        )
+        self.assertEqual(
+            self.points(), [(126.9790, 37.5665, 2.0), (126.9800, 37.5670, 0.5)]
+        )
+        self.snapshot.apply([], deleted=[self.first.pk])
+        self.assertEqual(self.points(), [(126.9800, 37.5670, 0.5)])
+        self.assertEqual(self.snapshot.revision, revision + 2)
+        # 변경 이력은 읽지 않았으므로 버전은 그대로
+        self.assertEqual(self.snapshot.version, self.latest_change())
+
+    def test_refresh(self):
+        self.assertEqual(self.snapshot.refresh(), 0)
+        second = RoadStructure.objects.create(
+            longitude=126.9800, latitude=37.5670, weight=0.5
+        )
+        self.first.weight = 3.0
+        self.first.save()
+        self.assertEqual(self.snapshot.refresh(), 2)
+        self.assertEqual(
+            self.points(), [(126.9780, 37.5665, 3.0), (126.9800, 37.5670, 0.5)]
+        )
+        self.assertEqual(self.snapshot.version, self.latest_change())
+
+        second.delete()
+        self.assertEqual(self.snapshot.refresh(), 1)
+        self.assertEqual(self.points(), [(126.9780, 37.5665, 3.0)])
+        self.assertEqual(self.snapshot.version, self.latest_change())
+
+    def test_gap_waits_for_missing_change(self):
+        version = self.snapshot.version
+        second = RoadStructure.objects.bulk_create(
+            [RoadStructure(longitude=126.9800, latitude=37.5670, weight=0.5)]
+        )[0]
+        # version + 1은 아직 커밋되지 않은 트랜잭션의 변경 이력
+        RoadStructureChange.objects.create(id=version + 2, road_structure_id=second.pk)
+
+        self.assertEqual(self.snapshot.refresh(), 1)
+        self.assertIn((126.9800, 37.5670, 0.5), self.points())
+        self.assertEqual(self.snapshot.version, version)
+
+        # 늦게 커밋된 변경 이력도 읽은 뒤 버전을 올림
+        RoadStructure.objects.filter(pk=self.first.pk).update(weight=4.0)
+        RoadStructureChange.objects.create(
+            id=version + 1, road_structure_id=self.first.pk
+        )
+        self.assertEqual(self.snapshot.refresh(), 2)
+        self.assertIn((126.9780, 37.5665, 4.0), self.points())
+        self.assertEqual(self.snapshot.version, version + 2)
+        self.assertEqual(self.snapshot._gaps, {})
+
+    def test_gap_times_out(self):
+        version = self.snapshot.version
+        RoadStructureChange.objects.create(
+            id=version + 2, road_structure_id=self.first.pk
+        )
+        self.snapshot.refresh()
+        self.assertEqual(self.snapshot.version, version)
+
+        # 롤백된 트랜잭션의 빈 번호는 GAP_TIMEOUT 이후 건너뜀
+        now = time.monotonic() + GAP_TIMEOUT + 1
+        with mock.patch("navigation.snapshot.time.monotonic", return_value=now):
+            self.snapshot.refresh()
+        self.assertEqual(self.snapshot.version, version + 2)
+        self.assertEqual(self.snapshot._gaps, {})
+
+    def test_reload_change_reloads_everything(self):
+        # 시그널 없이 저장된 대량 변경
+        RoadStructure.objects.bulk_create(
+            [
+                RoadStructure(longitude=126.98 + i * 0.001, latitude=37.57, weight=i)
+                for i in range(3)
+            ]
+        )
+        RoadStructureChange.record(RoadStructureChange.RELOAD)
+        revision = self.snapshot.revision
+
+        with mock.patch.object(self.snapshot, "load", wraps=self.snapshot.load) as load:
+            self.assertEqual(self.snapshot.refresh(), 1)
+        load.assert_called_once_with()
+        self.assertEqual(len(self.points()), 4)
+        self.assertEqual(self.snapshot.version, self.latest_change())
+        self.assertEqual(self.snapshot.revision, revision + 1)
+
+
+class PedestrianGraphTests(SimpleTestCase):
+    def dijkstra(self, graph, source, target, costs):
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if node == target:
+                return cost
+            if cost > best[node]:
+                continue
+            for e in range(graph.indptr[node], graph.indptr[node + 1]):
+                neighbor = int(graph.indices[e])
+                if cost + costs[e] < best.get(neighbor, math.inf):
+                    best[neighbor] = cost + costs[e]
+                    heapq.heappush(heap, (best[neighbor], neighbor))
+        return None
+
+    def path_cost(self, graph, path, costs):
+        total = 0.0
+        for a, b in zip(path, path[1:]):
+            edges = range(graph.indptr[a], graph.indptr[a + 1])
+            total += min(costs[e] for e in edges if graph.indices[e] == b)
+        return total
+
+    def test_a_star_matches_dijkstra(self):
+        rng = random.Random(0)
+        # 일부 간선이 빠진 격자 (교차로 사이 약 50m)
+        step = 0.0005
+        lines = []
+        for i in range(8):
+            for j in range(8):
+                x, y = 127.0 + i * step, 37.5 + j * step
+                if i < 7 and rng.random() < 0.85:
+                    lines.append([(x, y), (x + step, y)])
+                if j < 7 and rng.random() < 0.85:
+                    lines.append([(x, y), (x, y + step)])
+                if i < 7 and j < 7 and rng.random() < 0.2:
+                    lines.append([(x, y), (x + step, y + step)])
+        graph = PedestrianGraph.from_lines(lines)
+        penalties = np.array([rng.choice([0.0, 0.0, 0.5, 2.0]) for _ in graph.xs])
+        for costs in (graph.lengths.tolist(), graph.edge_costs(penalties).tolist()):
+            for _ in range(30):
+                source, target = rng.randrange(len(graph)), rng.randrange(len(graph))
+                expected = self.dijkstra(graph, source, target, costs)
+                path = graph.shortest_path(source, target, costs)
+                if expected is None:
+                    self.assertIsNone(path)
+                    continue
+                self.assertEqual((path[0], path[-1]), (source, target))
+                self.assertAlmostEqual(self.path_cost(graph, path, costs), expected)
+
+    def test_hazard_reroutes(self):
+        # A -> M -> B (약 176m)와 북쪽으로 돌아가는 A -> N -> B (약 208m)
+        a, m, b, n = (127.0, 37.5), (127.001, 37.5), (127.002, 37.5), (127.001, 37.5005)
+        graph = PedestrianGraph.from_lines([[a, m, b], [a, n, b]])
+        snapshot = RoadStructureSnapshot()
+        router = LocalRouter(graph, snapshot=snapshot)
+
+        def route_coordinates():
+            router.refresh_costs(force=True)
+            route = router.route(a, b)
+            return [tuple(c) for c in route["features"][1]["geometry"]["coordinates"]]
+
+        self.assertEqual(route_coordinates(), [a, m, b])
+        # M에 위험 구조물이 있으면 돌아가는 경로 선택
+        snapshot.apply([(1, *m, 5.0, 0.0, 0.0, 0, 0, 0)])
+        self.assertEqual(route_coordinates(), [a, n, b])
+        penalties = graph.hazard_penalties(
+            snapshot.arrays(), ROUTING["COSTS"], ROUTING["HAZARD_RADIUS"]
+        )
+        self.assertEqual(np.flatnonzero(penalties).tolist(), [1])
+
+
+class GetRouterTests(TestCase):
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+
+    def setUp(self):
+        for name in ("_router", "_router_failed_at"):
+            patcher = mock.patch.object(engine, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        route_cache.clear()
+        patcher = mock.patch(
+            "navigation.views.get_corridor_routes", return_value=CorridorRoutes()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        tmap_executor.wait_idle()
+
+    def test_missing_graph_falls_back_to_tmap(self):
+        with (
+            mock.patch.dict(
+                ROUTING, {"BACKEND": "local", "GRAPH_PATH": "/nonexistent/graph.npz"}
+            ),
+            mock.patch("builtins.print"),
+            fake_tmap() as server,
+        ):
+            response = self.client.get(
+                reverse("navigation:find_path"),
+                {
+                    "start_x": self.start[0],
+                    "start_y": self.start[1],
+                    "end_x": self.end[0],
+                    "end_y": self.end[1],
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(server.request_count, 0)
+        self.assertIsNotNone(engine._router_failed_at)
+
+    def test_unreadable_graph_is_retried_after_interval(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".geojson") as f:
+            f.write("not json")
+            f.flush()
+            with (
+                mock.patch.dict(ROUTING, {"GRAPH_PATH": f.name}),
+                mock.patch("builtins.print"),
+                mock.patch.object(
+                    PedestrianGraph, "load", wraps=PedestrianGraph.load
+                ) as load,
+            ):
+                self.assertIsNone(engine.get_router())
+                self.assertIsNone(engine.get_router())
+                self.assertEqual(load.call_count, 1)
+
+                # LOAD_RETRY_INTERVAL 이후 다시 불러옴
+                engine._router_failed_at -= engine.LOAD_RETRY_INTERVAL
+                self.assertIsNone(engine.get_router())
+                self.assertEqual(load.call_count, 2)
+
+
+def image_upload(size, format="JPEG", name="photo.jpg", color=(200, 80, 40)):
+    """
+    테스트용 업로드 이미지 파일을 생성합니다.
+    """
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format=format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class PrepareCaptionImageTests(SimpleTestCase):
+    def test_content_length_limit(self):
+        limit = IMAGE_CAPTION["MAX_UPLOAD_SIZE"]
+        check_content_length({"CONTENT_LENGTH": str(limit)})
+        check_content_length({"CONTENT_LENGTH": "abc"})
+        with self.assertRaises(ImageRejected) as raised:
+            check_content_length({"CONTENT_LENGTH": str(limit * 2)})
+        self.assertEqual(raised.exception.status_code, 413)
+
+    def assertRejected(self, image, status_code, **config):
+        with self.assertRaises(ImageRejected) as raised:
+            prepare_caption_image(image, {**IMAGE_CAPTION, **config})
+        self.assertEqual(raised.exception.status_code, status_code)
+
+    def test_limits(self):
+        self.assertRejected(image_upload((64, 64)), 413, MAX_UPLOAD_SIZE=100)
+        self.assertRejected(image_upload((100, 100)), 413, MAX_PIXELS=9999)
+        self.assertRejected(SimpleUploadedFile("photo.jpg", b"not an image"), 415)
+
+    def test_small_image_is_passed_through(self):
+        image = image_upload((300, 200))
+        original = image.read()
+        image.read()  # 파일 위치가 끝에 있어도 처음부터 전송
+        name, fileobj, content_type = prepare_caption_image(image)
+        self.assertIs(fileobj, image)
+        self.assertEqual((name, content_type), ("photo.jpg", "image/jpeg"))
+        self.assertEqual(fileobj.read(), original)
+
+    def test_large_or_unsupported_image_is_reencoded(self):
+        from PIL import Image
+
+        cases = [
+            (image_upload((1200, 800), "PNG", "photo.png"), (384, 256)),
+            (image_upload((100, 50), "BMP", "photo.bmp"), (100, 50)),
+        ]
+        for image, size in cases:
+            name, fileobj, content_type = prepare_caption_image(image)
+            self.assertIsNot(fileobj, image)
+            self.assertEqual((name, content_type), (image.name, "image/jpeg"))
+            encoded = Image.open(fileobj)
+            self.assertEqual((encoded.format, encoded.size), ("JPEG", size))
+
+    def test_multipart_body_rewinds_on_retry(self):
+        image = image_upload((300, 200))
+        content = image.read()
+        body = MultipartBody("image", "photo.jpg", image, "image/jpeg")
+        # 전송 도중 실패한 경우
+        next(iter(body))
+        first = b"".join(body)
+        self.assertEqual(first, b"".join(body))
+        self.assertEqual(len(first), len(body))
+        self.assertIn(content, first)
+
+        class FlakyCaptionServer(FakeCaptionServer):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.bodies = []
+
+            def respond(self, count, headers, request_body):
+                self.bodies.append(request_body)
+                if count == 1:
+                    return 503, {"error": "busy"}
+                return super().respond(count, headers, request_body)
+
+        http = HttpClient("test-multipart", backoff_factor=0, retry_methods=("POST",))
+        try:
+            with FlakyCaptionServer() as server:
+                response = http.post(
+                    server.url,
+                    data=body,
+                    headers={"Content-Type": body.content_type},
+                )
+        finally:
+            http.close()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(server.bodies, [first, first])
+
+
+def pattern_image(seed, side=256):
+    """
+    지각 해시 비교용 무늬가 있는 이미지를 생성합니다.
+    """
+    from PIL import Image
+
+    pixels = np.random.default_rng(seed).integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    return Image.fromarray(pixels).resize((side, side), Image.Resampling.NEAREST)
+
+
+def pattern_upload(seed, side=256, format="JPEG", name="photo.jpg", **options):
+    buffer = io.BytesIO()
+    pattern_image(seed, side).save(buffer, format=format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class CaptionCacheTests(SimpleTestCase):
+    phash = 0x0123_4567_89AB_CDEF
+
+    def setUp(self):
+        self.cache = CaptionCache(LocalCache(), max_distance=4)
+
+    def flip(self, *bits):
+        phash = self.phash
+        for bit in bits:
+            phash ^= 1 << bit
+        return phash
+
+    def test_exact_and_near_duplicate_lookup(self):
+        self.cache.set(("normalized", "original"), self.phash, "caption")
+        self.assertEqual(self.cache.peek("original"), "caption")
+        self.assertEqual(self.cache.get("normalized"), "caption")
+        # 구간(13비트)마다 1비트씩 다른 해시: 한 구간은 그대로 같음
+        self.assertEqual(self.cache.get("other", self.flip(0, 13, 26, 39)), "caption")
+        self.assertEqual(self.cache.get("other", self.flip(60, 61, 62, 63)), "caption")
+        # 해밍 거리가 max_distance를 넘거나 지각 해시가 없으면 실패
+        self.assertIsNone(self.cache.get("other", self.flip(0, 13, 26, 39, 52)))
+        self.assertIsNone(self.cache.get("other", self.flip(0, 1, 2, 3, 4)))
+        self.assertIsNone(self.cache.get("other"))
+        self.assertIsNone(self.cache.peek("other"))
+        self.assertEqual(
+            self.cache.stats(),
+            {"hits": 2, "near_hits": 2, "misses": 3, "hit_ratio": 4 / 7},
+        )
+
+    def test_nearest_image_wins(self):
+        self.cache.set(("far",), self.flip(0, 1, 2), "far")
+        self.cache.set(("near",), self.flip(0), "near")
+        self.assertEqual(self.cache.get("other", self.phash), "near")
+        # 같은 이미지를 다시 저장해도 구간에 중복 저장하지 않음
+        self.cache.set(("near",), self.flip(0), "near")
+        for key in self.cache._band_keys(self.phash):
+            entries = [digest for _, digest in self.cache.backend.get(key) or ()]
+            self.assertEqual(len(entries), len(set(entries)))
+
+    def test_near_lookup_disabled(self):
+        cache = CaptionCache(LocalCache(), max_distance=-1)
+        cache.set(("image",), self.phash, "caption")
+        self.assertIsNone(cache.get("other", self.phash))
+        self.assertEqual(cache.get("image", self.phash), "caption")
+
+
+class LookupCaptionTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = CaptionCache(LocalCache(), max_distance=4)
+        patcher = mock.patch("navigation.imaging.caption_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_upload_skips_decoding(self):
+        image = pattern_upload(0, side=1024, format="PNG", name="photo.png")
+        caption, prepared, keys = lookup_caption(image)
+        self.assertIsNone(caption)
+        self.assertEqual(prepared[2], "image/jpeg")
+        # 변환한 이미지와 원본의 내용 해시를 모두 저장
+        digests, phash = keys
+        self.assertEqual(len(digests), 2)
+        self.cache.set(*keys, "caption")
+
+        image = pattern_upload(0, side=1024, format="PNG", name="photo.png")
+        with mock.patch("navigation.imaging.prepare_caption_image") as prepare:
+            self.assertEqual(lookup_caption(image), ("caption", None, None))
+        prepare.assert_not_called()
+
+    def test_near_duplicate_upload(self):
+        caption, _, keys = lookup_caption(pattern_upload(1, quality=95))
+        self.assertIsNone(caption)
+        self.cache.set(*keys, "caption")
+
+        # 다른 크기/압축률로 저장한 같은 사진
+        caption, prepared, _ = lookup_caption(pattern_upload(1, side=200, quality=60))
+        self.assertEqual(caption, "caption")
+        self.assertIsNotNone(prepared)
+        caption, _, _ = lookup_caption(pattern_upload(2))
+        self.assertIsNone(caption)
+        self.assertEqual(self.cache.near_hits, 1)
+
+
+class ImportHazardsTests(TestCase):
+    csv = (
+        "위도,경도,위험도,점자블록,bollard\n"
+        "37.5665,126.9780,1.5,2,0\n"
+        "37.5670,126.9800,,1,\n"
+        "abc,126.9800,1,0,0\n"  # 숫자가 아닌 위도
+        "95.0,126.9800,1,0,0\n"  # 좌표 범위 초과
+        "37.5680,126.9810,1,0,3\n"  # 허용하지 않는 볼라드 값
+        "37.5665,126.9780,2.5,,\n"  # 같은 위치: 나중 행의 값 사용
+    )
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [126.9780, 37.5665]},
+                "properties": {"weight": 1.0, "audio_signal": 1},
+            },
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [126.9800, 37.5670]},
+                "properties": None,
+            },
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "LineString",
+                    "coordinates": [[126.97, 37.56], [126.98, 37.57]],
+                },
+                "properties": {},
+            },
+            {"type": "Feature", "geometry": None, "properties": {}},
+        ],
+    }
+
+    def write(self, suffix, content):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, encoding="utf-8", delete=False
+        )
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def run_command(self, path, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("import_hazards", path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def rows(self):
+        return list(
+            RoadStructure.objects.order_by("latitude").values_list(
+                "latitude",
+                "longitude",
+                "weight",
+                "braille_block",
+                "audio_signal",
+                "bollard",
+            )
+        )
+
+    def test_csv(self):
+        stdout, stderr = self.run_command(self.write(".csv", self.csv))
+        self.assertIn("read: 6, invalid: 3, written: 2", stdout)
+        self.assertEqual(len(stderr.splitlines()), 3)
+        self.assertIn("invalid line 4: latitude", stderr)
+        self.assertEqual(
+            self.rows(),
+            [(37.5665, 126.9780, 2.5, 2, 0, 0), (37.5670, 126.9800, 0.0, 1, 0, 0)],
+        )
+        # 격자 셀 번호도 함께 저장
+        self.assertFalse(RoadStructure.objects.filter(cell=None).exists())
+        # 각 워커의 스냅샷이 전체를 다시 불러오도록 마지막에 기록
+        self.assertEqual(
+            RoadStructureChange.objects.latest("id").road_structure_id,
+            RoadStructureChange.RELOAD,
+        )
+
+    def test_import_twice_updates_in_place(self):
+        for vendors in (("postgresql", "sqlite"), ()):
+            RoadStructure.objects.all().delete()
+            with mock.patch("navigation.ingest.UPSERT_VENDORS", vendors):
+                path = self.write(".csv", self.csv)
+                self.run_command(path)
+                self.run_command(path, "--batch-size", "1")
+                self.assertEqual(len(self.rows()), 2)
+
+                # 입력된 필드만 덮어씀
+                self.run_command(
+                    self.write(".csv", "lat,lon,weight\n37.5670,126.98,4\n")
+                )
+                self.assertEqual(
+                    self.rows(),
+                    [
+                        (37.5665, 126.9780, 2.5, 2, 0, 0),
+                        (37.5670, 126.9800, 4.0, 1, 0, 0),
+                    ],
+                )
+
+    def test_geojson(self):
+        content = json.dumps(self.geojson)
+        path = self.write(".geojson", content)
+        stdout, stderr = self.run_command(path)
+        self.assertIn("read: 4, invalid: 2, written: 2", stdout)
+        self.assertIn("feature 2: Point geometry", stderr)
+        self.assertEqual(
+            self.rows(),
+            [(37.5665, 126.9780, 1.0, 0, 1, 0), (37.5670, 126.9800, 0.0, 0, 0, 0)],
+        )
+
+        # Feature가 읽는 단위(chunk)의 경계에 걸쳐도 같은 결과
+        features = [
+            feature for _, feature in read_geojson(io.StringIO(content), chunk_size=7)
+        ]
+        self.assertEqual(features, self.geojson["features"])
+
+    def test_geojson_lines(self):
+        lines = "\n".join(json.dumps(f) for f in self.geojson["features"][:2])
+        stats = import_hazards(io.StringIO(lines + "\n\n"), "geojsonl")
+        self.assertEqual((stats["read"], stats["invalid"], stats["written"]), (2, 0, 2))
+
+    def test_nothing_written(self):
+        stats = import_hazards(io.StringIO("lat,lon\nabc,1\n"), "csv")
+        self.assertEqual((stats["invalid"], stats["written"]), (1, 0))
+        self.assertFalse(RoadStructureChange.objects.exists())
+        with self.assertRaises(CommandError):
+            self.run_command(self.write(".txt", ""))
+        with self.assertRaises(CommandError):
+            self.run_command("-")
+
+
+class PlanPassListsTests(SimpleTestCase):
+    start, end = (127.0, 37.5), (127.01, 37.5)
+    a = (127.003, 37.5001, 1.0)
+    b = (127.007, 37.5001, 2.0)
+    c = (127.005, 37.4999, 3.0)
+    # 약 2.2km 떨어진 후보: 경유하면 최단 경로의 alpha 배를 넘음
+    far = (127.005, 37.52, 5.0)
+
+    def setUp(self):
+        route_cache.clear()
+
+    def tearDown(self):
+        tmap_executor.wait_idle()
+
+    def test_prunes_over_budget_and_slower_orders(self):
+        pass_lists, scores = plan_pass_lists(
+            self.start, self.end, [self.far, self.b, self.a], alpha=2.0, max_plans=10
+        )
+        # 멀리 있는 후보를 지나는 조합과 같은 후보를 더 오래 걸리는 순서로 지나는 조합은 제외
+        self.assertEqual(pass_lists, [[self.a, self.b], [self.b], [self.a]])
+        self.assertEqual(scores, [3.0, 2.0, 1.0])
+
+        # alpha를 충분히 크게 하면 멀리 있는 후보도 포함
+        pass_lists, _ = plan_pass_lists(
+            self.start, self.end, [self.far, self.b, self.a], alpha=10.0, max_plans=10
+        )
+        self.assertIn([self.far], pass_lists)
+
+    def test_keeps_single_waypoint_fallback(self):
+        candidates = [self.a, self.b, self.c]
+        pass_lists, scores = plan_pass_lists(
+            self.start, self.end, candidates, alpha=2.0, max_plans=2
+        )
+        self.assertEqual(pass_lists, [[self.c, self.b], [self.c]])
+        self.assertEqual(scores, [5.0, 3.0])
+        pass_lists, _ = plan_pass_lists(
+            self.start, self.end, candidates, alpha=2.0, max_plans=1
+        )
+        self.assertEqual(pass_lists, [[self.c, self.b]])
+        self.assertEqual(plan_pass_lists(self.start, self.end, [], alpha=2.0), ([], []))
+
+    def test_only_surviving_plans_reach_tmap(self):
+        candidates = [self.far, self.b, self.a]
+        pass_lists, _ = plan_pass_lists(
+            self.start, self.end, candidates, alpha=2.0, max_plans=10
+        )
+        with (
+            mock.patch.dict(ROUTING, {"MAX_WAYPOINTS": 2, "MAX_PLANS": 10}),
+            fake_tmap() as server,
+        ):
+            route = find_optimal_route(self.start, self.end, candidates, alpha=2.0)
+        self.assertIsNotNone(route)
+        # 최단 경로 1개 + 남은 조합만 요청 (모든 순열이면 1 + 3 + 6개)
+        self.assertEqual(server.request_count, 1 + len(pass_lists))
+        self.assertEqual(server.request_count, 4)
+
+
+def decode_polyline(polyline, precision=5):
+    """
+    Google encoded polyline을 [(x, y), ...] (경도, 위도)로 변환합니다.
+    """
+    values, value, shift = [], 0, 0
+    for char in polyline:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    latitude = longitude = 0
+    coordinates = []
+    for dy, dx in zip(values[::2], values[1::2]):
+        latitude, longitude = latitude + dy, longitude + dx
+        coordinates.append((longitude / 10**precision, latitude / 10**precision))
+    return coordinates
+
+
+class CompactRouteTests(SimpleTestCase):
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+    waypoint = (126.9850, 37.5690)
+
+    def test_encode_polyline_known_vectors(self):
+        # Google Maps 문서의 예시 (위도/경도 순으로 인코딩)
+        coordinates = [(-120.2, 38.5), (-120.95, 40.7), (-126.453, 43.252)]
+        self.assertEqual(encode_polyline(coordinates), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+        self.assertEqual(encode_polyline([(0.0, 0.0)]), "??")
+        self.assertEqual(encode_polyline([]), "")
+
+    def test_encode_polyline_round_trip(self):
+        rng = random.Random(0)
+        coordinates = [
+            (rng.uniform(-180, 180), rng.uniform(-90, 90)) for _ in range(200)
+        ]
+        coordinates += [coordinates[-1], (0.0, 0.0), (-0.000004, 0.000006)]
+        decoded = decode_polyline(encode_polyline(coordinates))
+        self.assertEqual(len(decoded), len(coordinates))
+        for (x, y), (dx, dy) in zip(coordinates, decoded):
+            self.assertAlmostEqual(x, dx, delta=0.5e-5 + 1e-12)
+            self.assertAlmostEqual(y, dy, delta=0.5e-5 + 1e-12)
+
+    def route(self):
+        return fake_route_response(
+            {
+                "startX": self.start[0],
+                "startY": self.start[1],
+                "endX": self.end[0],
+                "endY": self.end[1],
+                "passList": "{},{}".format(*self.waypoint),
+            }
+        )
+
+    def test_compact_route(self):
+        route = self.route()
+        index = GridIndex()
+        # 경로 진행 순서와 반대로 추가
+        index.add(126.9915, 37.5699, 2.0)  # 도착지 근처
+        index.add(126.9790, 37.5667, 1.0)  # 출발지 근처
+        index.add(126.9850, 37.5750, 5.0)  # 경로에서 약 600m
+        data = compact_route(route, index=index)
+
+        self.assertEqual(list(data), list(COMPACT_FIELDS))
+        properties = route["features"][0]["properties"]
+        self.assertEqual(data["distance"], properties["totalDistance"])
+        self.assertEqual(data["time"], properties["totalTime"])
+        coordinates = decode_polyline(data["polyline"])
+        self.assertEqual(
+            [coordinates[i["index"]] for i in data["instructions"]],
+            [self.start, self.waypoint, self.end],
+        )
+        self.assertEqual(
+            [i["point_type"] for i in data["instructions"]], ["SP", "PP", "EP"]
+        )
+        self.assertEqual(
+            data["hazards"], [[126.9790, 37.5667, 1.0], [126.9915, 37.5699, 2.0]]
+        )
+
+    def test_fields(self):
+        self.assertIsNone(parse_fields("json", "polyline"))
+        self.assertEqual(parse_fields("compact", None), COMPACT_FIELDS)
+        self.assertEqual(
+            parse_fields("compact", "time, polyline"), ("time", "polyline")
+        )
+        with self.assertRaises(ValueError):
+            parse_fields("compact", "polyline,geometry")
+        data = compact_route(self.route(), ("time", "polyline"), index=GridIndex())
+        self.assertEqual(list(data), ["time", "polyline"])
+
+
+class SlowWaypointTMapServer(FakeTMapServer):
+    """
+    경유지 경로 요청만 늦게 응답하는 TMap 서버
+    """
+
+    waypoint_latency = 0.3
+
+    def respond(self, count, headers, body):
+        if json.loads(body).get("passList"):
+            time.sleep(self.waypoint_latency)
+        return super().respond(count, headers, body)
+
+
+class StreamRouteTests(TestCase):
+    start, end = (126.9780, 37.5665), (126.9920, 37.5700)
+    candidates = [(126.9850, 37.5690, 1.0), (126.9880, 37.5672, 0.5)]
+    shortest = {"type": "FeatureCollection", "features": [], "name": "shortest"}
+    optimal = {"type": "FeatureCollection", "features": [], "name": "optimal"}
+
+    def setUp(self):
+        route_cache.clear()
+        for patcher in (
+            mock.patch(
+                "navigation.views.get_corridor_routes", return_value=CorridorRoutes()
+            ),
+            mock.patch.object(
+                FindRouteView, "find_candidates", return_value=self.candidates
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        tmap_executor.wait_idle()
+
+    def events(self, chunks):
+        return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+    def test_ndjson_events(self):
+        steps = [("shortest", self.shortest), ("optimal", self.optimal)]
+        self.assertEqual(
+            self.events(stream_route(iter(steps), "ndjson")),
+            [
+                {"event": "shortest", "route": self.shortest},
+                {"event": "optimal", "route": self.optimal},
+            ],
+        )
+        # 최적 경로가 최단 경로와 같으면 경로를 다시 보내지 않음
+        steps = [("shortest", self.shortest), ("optimal", self.shortest)]
+        self.assertEqual(
+            self.events(stream_route(iter(steps), "ndjson"))[1],
+            {"event": "optimal", "same_as_shortest": True},
+        )
+        # 경로를 찾지 못하면 오류 이벤트 후 종료
+        steps = [("optimal", None), ("optimal", self.optimal)]
+        self.assertEqual(
+            self.events(stream_route(iter(steps), "ndjson")),
+            [{"event": "error", "status": 404, "error": "Route not found"}],
+        )
+
+    def test_sse_events(self):
+        async def steps():
+            yield "shortest", self.shortest
+            yield "optimal", self.optimal
+
+        async def collect():
+            return [event async for event in astream_route(steps(), "sse")]
+
+        events = asyncio.run(collect())
+        self.assertEqual(len(events), 2)
+        for event, (name, route) in zip(
+            events, [("shortest", self.shortest), ("optimal", self.optimal)]
+        ):
+            header, data, blank, end = event.decode().split("\n")
+            self.assertEqual((header, blank, end), (f"event: {name}", "", ""))
+            self.assertEqual(
+                json.loads(data.removeprefix("data: ")),
+                {"event": name, "route": route},
+            )
+
+    def test_shortest_route_is_sent_before_waypoint_routes(self):
+        api_url, app_key = TMAP["API_URL"], TMAP["APP_KEY"]
+        self.addCleanup(TMAP.update, API_URL=api_url, APP_KEY=app_key)
+        with SlowWaypointTMapServer() as server:
+            TMAP["API_URL"], TMAP["APP_KEY"] = server.url, "fake"
+            response = self.client.get(
+                reverse("navigation:find_path"),
+                {
+                    "start_x": self.start[0],
+                    "start_y": self.start[1],
+                    "end_x": self.end[0],
+                    "end_y": self.end[1],
+                    "stream": "ndjson",
+                },
+            )
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            started = time.monotonic()
+            chunks = iter(response.streaming_content)
+            first = json.loads(next(chunks))
+            first_at = time.monotonic() - started
+            rest = [json.loads(chunk) for chunk in chunks]
+            total = time.monotonic() - started
+
+        def point_types(route):
+            return [
+                f["properties"]["pointType"]
+                for f in route["features"]
+                if f["geometry"]["type"] == "Point"
+            ]
+
+        self.assertEqual(first["event"], "shortest")
+        self.assertEqual(point_types(first["route"]), ["SP", "EP"])
+        # 최적 경로는 경유지를 지나는 경로 (경유지 응답을 기다린 뒤 전송)
+        self.assertEqual([event["event"] for event in rest], ["optimal"])
+        self.assertIn("PP", point_types(rest[0]["route"]))
+        self.assertLess(first_at, server.waypoint_latency)
+        self.assertGreaterEqual(total, server.waypoint_latency)
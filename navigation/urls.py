@@ -1,10 +1,26 @@
 from django.urls import path
-from .views import FindRouteView, ReportView, CallImageCaptionView
+from .async_views import AsyncFindRouteView, AsyncCallImageCaptionView
+from .views import (
+    FindRouteView,
+    FindRouteBatchView,
+    ReportView,
+    CallImageCaptionView,
+    metrics,
+)
 
 app_name = "navigation"
 
 urlpatterns = [
     path("find_path/", FindRouteView.as_view(), name="find_path"),
+    path("find_path/batch/", FindRouteBatchView.as_view(), name="find_path_batch"),
     path("report/", ReportView.as_view(), name="report"),
     path("call_image_caption/", CallImageCaptionView.as_view(), name="call_image_caption"),
+    path("metrics/", metrics, name="metrics"),
+    # 비동기(ASGI) 버전
+    path("async/find_path/", AsyncFindRouteView.as_view(), name="async_find_path"),
+    path(
+        "async/call_image_caption/",
+        AsyncCallImageCaptionView.as_view(),
+        name="async_call_image_caption",
+    ),
 ]
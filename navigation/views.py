@@ -1,18 +1,74 @@
-import io
+import os
 
+from django.http import HttpResponse, HttpResponseForbidden
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from backend.settings import AI_URL
-from .models import RoadStructure
-from .function import *
+from rest_framework.settings import api_settings
+from backend.settings import AI_URL, ROUTING
+from .client import CircuitOpenError, get_client
+from .compact import CompactRouteRenderer, compact_route, parse_fields
+from .corridors import get_corridor_routes
+from .imaging import (
+    ImageRejected,
+    MultipartBody,
+    caption_cache,
+    check_content_length,
+    lookup_caption,
+)
+from .function import (
+    detour_distance,
+    find_optimal_route,
+    find_optimal_routes,
+    route_deadline,
+    iter_optimal_route,
+    select_highest_safety_points,
+)
+from .metrics import CONTENT_TYPE, metrics_allowed, render_metrics, timer
+from .reports import report
+from .snapshot import get_snapshot
+from .streaming import STREAM_CONTENT_TYPES, stream_route, streaming_response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-import requests
-from PIL import Image
+
+# 최단 경로 대비 허용 배수
+ROUTE_ALPHA = 1.5
+
+# OpenAPI 스키마 형식 (swagger.json, swagger.yaml) -> Content-Type
+SCHEMA_CONTENT_TYPES = {
+    ".json": "application/json",
+    ".yaml": "application/yaml",
+}
+
+# 경로 응답 형식 파라미터 (?format=compact&fields=polyline,time)
+ROUTE_FORMAT_PARAMETERS = [
+    openapi.Parameter(
+        "format",
+        openapi.IN_QUERY,
+        description="응답 형식 (compact: 모바일용 간략 형식)",
+        type=openapi.TYPE_STRING,
+        enum=["compact"],
+    ),
+    openapi.Parameter(
+        "fields",
+        openapi.IN_QUERY,
+        description="compact 형식에 포함할 필드 (쉼표로 구분, 디폴트: 전체)",
+        type=openapi.TYPE_STRING,
+    ),
+]
+
+
+def parse_caption(text):
+    """
+    AI 서버 응답에서 캡션 문자열을 추출합니다.
+    """
+    return text.strip("[]\\\"")
 
 
 class FindRouteView(APIView):
+    # ?format=compact 요청은 CompactRouteRenderer가 선택됨
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CompactRouteRenderer]
+
     @swagger_auto_schema(
         operation_summary="경로 탐색 요청",
         operation_description="Find route to the destination",
@@ -41,6 +97,15 @@ class FindRouteView(APIView):
                 description="목적지 위도",
                 type=openapi.TYPE_STRING,
             ),
+            *ROUTE_FORMAT_PARAMETERS,
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                description="스트리밍 응답 (최단 경로를 먼저 보내고 최적 경로를 이어서 전송,"
+                " ndjson: 한 줄에 이벤트 하나, sse: Server-Sent Events)",
+                type=openapi.TYPE_STRING,
+                enum=sorted(STREAM_CONTENT_TYPES),
+            ),
         ],
         responses={
             200: "OK",
@@ -57,6 +122,23 @@ class FindRouteView(APIView):
             return Response(
                 {"error": "Invalid input arguments"}, status=status.HTTP_400_BAD_REQUEST
             )
+        stream = request.query_params.get("stream")
+        try:
+            fields = parse_fields(
+                request.accepted_renderer.format, request.query_params.get("fields")
+            )
+            if stream is not None and stream not in STREAM_CONTENT_TYPES:
+                raise ValueError(f"알 수 없는 스트리밍 형식입니다: {stream}")
+        except ValueError:
+            return Response(
+                {"error": "Invalid input arguments"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if stream:
+            steps = self.iter_route(start_x, start_y, end_x, end_y)
+            return streaming_response(
+                request, stream_route(steps, stream, fields), stream
+            )
 
         route = self.find_route(start_x, start_y, end_x, end_y)
         if not route:
@@ -64,6 +146,8 @@ class FindRouteView(APIView):
                 {"error": "Route not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
+        if fields:
+            route = compact_route(route, fields)
         return Response(route, status=status.HTTP_200_OK)
 
     def find_route(self, start_x, start_y, end_x, end_y):
@@ -71,22 +155,166 @@ class FindRouteView(APIView):
         start = (float(start_x), float(start_y))
         end = (float(end_x), float(end_y))
 
-        # PostgreSQL에서 후보 좌표들 가져오기
-        locations = RoadStructure.objects.all()  # 전체 좌표를 가져옴
-        candidates = [
-            (loc.longitude, loc.latitude, loc.weight) for loc in locations
-        ]  # safety_score는 weight에 해당
-
-        # 출발점과 목적점을 포함하는 일정 크기의 원 내에서 경유지 후보 필터링
-        midpoint, radius = calculate_midpoint_and_circle(start, end)
-        filtered_candidates = points_within_circle(candidates, midpoint, radius)
-        optimal_filtered_candidates = select_highest_safety_points(filtered_candidates)
+        # 자주 요청되는 구간은 미리 계산된 경로 사용
+        with timer("corridor"):
+            route = get_corridor_routes().get(start, end, self.find_candidates)
+        if route:
+            return route
 
         # 최적 경로 계산
         optimal_route = find_optimal_route(
-            start, end, optimal_filtered_candidates, alpha=1.5
+            start, end, self.find_candidates(start, end), alpha=ROUTE_ALPHA
         )
-        return optimal_route
+        # TMap 장애 시 위험 구조물이 바뀌기 전에 계산된 구간 경로라도 반환
+        return optimal_route or get_corridor_routes().fallback(start, end)
+
+    def iter_route(self, start_x, start_y, end_x, end_y):
+        """
+        find_route의 결과를 단계적으로 반환합니다. (iter_optimal_route 참고)
+        :return: (단계, TMap API 응답 데이터) 이터레이터
+        """
+        start = (float(start_x), float(start_y))
+        end = (float(end_x), float(end_y))
+
+        # 미리 계산된 구간 경로는 최적 경로이므로 바로 반환
+        with timer("corridor"):
+            route = get_corridor_routes().get(start, end, self.find_candidates)
+        if route:
+            return iter([("optimal", route)])
+
+        # 경유지 후보는 응답 전송을 시작하기 전에 계산
+        steps = iter_optimal_route(
+            start, end, self.find_candidates(start, end), alpha=ROUTE_ALPHA
+        )
+        return self.with_fallback(steps, start, end)
+
+    @staticmethod
+    def with_fallback(steps, start, end):
+        # 최적 경로를 찾지 못하면 미리 계산된 구간 경로로 대체 (find_route 참고)
+        for step, route in steps:
+            if step == "optimal" and not route:
+                route = get_corridor_routes().fallback(start, end)
+            yield step, route
+
+    @staticmethod
+    def find_candidates(start, end):
+        # 출발점과 목적점을 초점으로 하는 타원 내에서 경유지 후보 필터링
+        # (경유해도 우회 허용 거리(ROUTE_ALPHA 배) 이내인 위험 구조물만 후보로 사용)
+        # (메모리의 위험 구조물 스냅샷에서 조회, safety_score는 weight에 해당)
+        with timer("snapshot"):
+            snapshot = get_snapshot()
+        with timer("filter"):
+            filtered_candidates = snapshot.query_ellipse(
+                start, end, detour_distance(start, end, ROUTE_ALPHA)
+            )
+            return select_highest_safety_points(
+                filtered_candidates, k=ROUTING["WAYPOINT_CANDIDATES"]
+            )
+
+
+class FindRouteBatchView(APIView):
+    renderer_classes = FindRouteView.renderer_classes
+
+    @swagger_auto_schema(
+        operation_summary="일괄 경로 탐색 요청",
+        operation_description="Find routes for multiple origin/destination pairs",
+        manual_parameters=ROUTE_FORMAT_PARAMETERS,
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "routes": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "start_x": openapi.Schema(type=openapi.TYPE_NUMBER),
+                            "start_y": openapi.Schema(type=openapi.TYPE_NUMBER),
+                            "end_x": openapi.Schema(type=openapi.TYPE_NUMBER),
+                            "end_y": openapi.Schema(type=openapi.TYPE_NUMBER),
+                        },
+                    ),
+                ),
+            },
+        ),
+        responses={
+            200: "OK (각 쌍의 결과는 results[i].status 참고)",
+            400: "Invalid input arguments",
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        trips = request.data.get("routes") if isinstance(request.data, dict) else None
+        if (
+            not isinstance(trips, list)
+            or not trips
+            or len(trips) > ROUTING["BATCH_MAX_SIZE"]
+        ):
+            return Response(
+                {"error": "Invalid input arguments"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            fields = parse_fields(
+                request.accepted_renderer.format, request.query_params.get("fields")
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid input arguments"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 쌍 별 좌표 검증
+        results = [None] * len(trips)
+        valid_trips = []  # (i, start, end)
+        for i, trip in enumerate(trips):
+            try:
+                start = (float(trip["start_x"]), float(trip["start_y"]))
+                end = (float(trip["end_x"]), float(trip["end_y"]))
+            except (TypeError, KeyError, ValueError):
+                results[i] = {
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "error": "Invalid input arguments",
+                }
+                continue
+            valid_trips.append((i, start, end))
+
+        # 미리 계산된 구간 경로가 없는 쌍만 TMap 요청을 중복 제거 후 동시에 계산
+        # (ROUTING["DEADLINE"]까지 받은 경로 중에서 선택)
+        corridor_routes = get_corridor_routes()
+        with timer("corridor"):
+            routes = [
+                corridor_routes.get(start, end, FindRouteView.find_candidates)
+                for _, start, end in valid_trips
+            ]
+        misses = [j for j, route in enumerate(routes) if not route]
+        live_routes, pending = find_optimal_routes(
+            [
+                (start, end, FindRouteView.find_candidates(start, end))
+                for _, start, end in (valid_trips[j] for j in misses)
+            ],
+            alpha=ROUTE_ALPHA,
+            deadline=route_deadline(),
+        )
+        timed_out = set()
+        for k, (j, route) in enumerate(zip(misses, live_routes)):
+            _, start, end = valid_trips[j]
+            routes[j] = route or corridor_routes.fallback(start, end)
+            if not routes[j] and k in pending:
+                timed_out.add(j)
+        for j, ((i, _, _), route) in enumerate(zip(valid_trips, routes)):
+            if route:
+                if fields:
+                    route = compact_route(route, fields)
+                results[i] = {"status": status.HTTP_200_OK, "route": route}
+            elif j in timed_out:
+                # deadline까지 TMap 응답을 받지 못함
+                results[i] = {
+                    "status": status.HTTP_504_GATEWAY_TIMEOUT,
+                    "error": "Route timed out",
+                }
+            else:
+                results[i] = {
+                    "status": status.HTTP_404_NOT_FOUND,
+                    "error": "Route not found",
+                }
+        return Response({"results": results}, status=status.HTTP_200_OK)
 
 
 class ReportView(APIView):
@@ -107,24 +335,16 @@ class ReportView(APIView):
     )
     def patch(self, request, *args, **kwargs):
         try:
-            latitude = request.data["latitude"]
-            longitude = request.data["longitude"]
-        except KeyError:
+            latitude = float(request.data["latitude"])
+            longitude = float(request.data["longitude"])
+        except (KeyError, TypeError, ValueError):
             return Response(
                 {"error": "Invalid input arguments"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 이미 존재하는 구조물이면 DB 업데이트(weight 증가), 없으면 새로 추가
-        try:
-            road_structure = RoadStructure.objects.get(
-                latitude=latitude, longitude=longitude
-            )
-            road_structure.weight += 0.5
-            road_structure.save()
-        except RoadStructure.DoesNotExist:
-            RoadStructure.objects.create(
-                latitude=latitude, longitude=longitude, weight=0.5
-            )
+        # 이미 존재하는 구조물이면 제보 점수 증가, 없으면 새로 추가 (단일 upsert 쿼리)
+        with timer("db"):
+            report(latitude, longitude)
 
         return Response(status=status.HTTP_200_OK)
 
@@ -143,36 +363,38 @@ class CallImageCaptionView(APIView):
             200: "OK",
             400: "Invalid input arguments",
             404: "Failed to generate caption",
+            413: "Image too large",
+            415: "Invalid image file",
             500: "Internal server error",
         },
     )
     def patch(self, request, *args, **kwargs):
         try:
-            # Pillow로 이미지 파일 열기
+            # 본문을 읽기 전에 업로드 크기 확인
+            check_content_length(request.META)
             image = request.FILES["image"]
-            image_file = Image.open(image)
-            buffer = io.BytesIO()
-
-            # 이미지 파일 형식 변환
-            if image_file.format == "BMP":  # Bitmap 파일은 JPEG로 변환
-                image_file = image_file.convert("RGB")
-                image_file.save(buffer, format="JPEG")
-                mime_type = "image/jpeg"
-            else:  # 그 외 파일은 원래 형식 유지
-                image_file.save(buffer, format=image_file.format)
-                mime_type = image.content_type
-            buffer.seek(0)
-            files = {"image": (image.name, buffer, mime_type)}
-
-            # AI 서버로 이미지 전송
-            caption = requests.post(AI_URL, files=files)
+
+            # 같은 이미지 또는 비슷한 이미지의 캡션이 캐시에 있으면 바로 반환
+            with timer("image"):
+                cached, prepared, keys = lookup_caption(image)
+            if cached is not None:
+                return Response(cached, status=status.HTTP_200_OK)
+            body = MultipartBody("image", *prepared)
+
+            # AI 서버로 이미지 전송 (파일을 나누어 읽으면서 스트리밍)
+            with timer("ai"):
+                caption = get_client("ai").post(
+                    AI_URL, data=body, headers={"Content-Type": body.content_type}
+                )
             if caption.status_code != 200:
                 return Response(
                     {"error": "Failed to generate caption"},
                     status=status.HTTP_404_NOT_FOUND,
                 )
             caption.encoding = "utf-8"
-            caption = caption.text.strip("[]\\\"")
+            caption = parse_caption(caption.text)
+            if caption:
+                caption_cache.set(*keys, caption)
             return Response(caption, status=status.HTTP_200_OK)
 
         # request에 이미지 파일이 없는 경우
@@ -181,9 +403,51 @@ class CallImageCaptionView(APIView):
                 {"error": "Invalid input arguments"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        # 이미지 크기 제한 초과 또는 이미지가 아닌 파일
+        except ImageRejected as e:
+            return Response({"error": str(e)}, status=e.status_code)
+
+        # 최근 AI Image Captioning 서버 요청이 연속으로 실패하여 차단됨
+        except CircuitOpenError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
         # AI Image Captioning 서버와 통신 실패
         except Exception as e:
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+def metrics(request):
+    """
+    Prometheus 형식 메트릭 (요청/구간 처리 시간 히스토그램, 캐시 적중, 외부 API 오류)
+    워커 프로세스마다 따로 집계되므로 워커 별로 수집해야 합니다.
+    METRICS["ALLOWED_IPS"]의 주소에서만 접근할 수 있습니다.
+    """
+    if not metrics_allowed(request.META.get("REMOTE_ADDR")):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
+
+
+def schema_file_view(path, fallback):
+    """
+    미리 생성한 OpenAPI 스키마 파일을 반환하는 뷰를 생성합니다. (파일은 뷰 생성 시 한 번만 읽음)
+    파일이 없거나 요청한 형식과 다르면 fallback 뷰가 요청 시 스키마를 생성합니다.
+    :param path: 스키마 파일 경로 (manage.py generate_swagger 출력, .json 또는 .yaml)
+    :param fallback: 요청 시 스키마를 생성하는 뷰 (schema_view.without_ui())
+    """
+    extension = os.path.splitext(path)[1].replace(".yml", ".yaml")
+    content = None
+    if os.path.exists(path):
+        with open(path, "rb") as file:
+            content = file.read()
+
+    def view(request, format=None):
+        if content is None or format != extension:
+            return fallback(request, format=format)
+        return HttpResponse(content, content_type=SCHEMA_CONTENT_TYPES[extension])
+
+    return view
@@ -0,0 +1,117 @@
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+from django.urls import get_resolver
+
+from backend.settings import AI_URL, ROUTING, STARTUP, TMAP
+from .client import get_async_client, get_client
+from .corridors import get_corridor_routes
+from .engine import get_router
+from .snapshot import get_snapshot
+
+# 연결을 미리 열 때 응답 대기 시간 (초, 응답 내용은 사용하지 않음)
+CONNECT_TIMEOUT = 1.0
+
+
+def client_origins():
+    """
+    연결을 미리 열 외부 API 서버 주소를 반환합니다. (주소가 설정된 클라이언트만)
+    :return: [(클라이언트 이름, "scheme://host/"), ...]
+    """
+    urls = {"tmap": TMAP["API_URL"], "ai": AI_URL}
+    origins = []
+    for name, url in urls.items():
+        if url:
+            parts = urlsplit(url)
+            origins.append((name, f"{parts.scheme}://{parts.netloc}/"))
+    return origins
+
+
+def _timed(timings, step, func):
+    started = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        print(f"Warm-up {step} failed: {str(e)}")
+    timings[step] = time.perf_counter() - started
+
+
+def load_hazards():
+    """
+    위험 구조물 스냅샷과 미리 계산된 구간 경로를 불러옵니다.
+    """
+    get_snapshot()
+    get_corridor_routes().load()
+
+
+def open_connections():
+    """
+    외부 API 서버에 HEAD 요청을 보내 연결(TLS 핸드셰이크 포함)을 연결 풀에 남겨 둡니다.
+    (메트릭/circuit breaker에 기록하지 않도록 세션으로 직접 요청)
+    """
+    for name, origin in client_origins():
+        try:
+            get_client(name).session.head(origin, timeout=CONNECT_TIMEOUT)
+        except Exception as e:
+            print(f"Warm-up connection failed: {name} {str(e)}")
+
+
+async def aopen_connections():
+    """
+    open_connections의 비동기 버전 (현재 이벤트 루프의 AsyncHttpClient 연결 풀)
+    """
+    for name, origin in client_origins():
+        try:
+            await get_async_client(name).client.head(origin, timeout=CONNECT_TIMEOUT)
+        except Exception as e:
+            print(f"Warm-up connection failed: {name} {str(e)}")
+
+
+def warm_up():
+    """
+    워커가 요청을 받기 전에 첫 요청에서 하던 준비 작업을 미리 실행합니다.
+    각 단계가 실패해도 워커는 시작하고, 해당 작업은 첫 요청에서 다시 시도합니다.
+    - urls: URLconf와 뷰 모듈 import
+    - db: DB 연결 (DATABASES CONN_MAX_AGE가 0이면 첫 요청에서 다시 연결)
+    - hazards: 위험 구조물 스냅샷과 미리 계산된 구간 경로 불러오기
+    - router: 로컬 보행자 그래프 불러오기 (ROUTING["BACKEND"]가 local인 경우)
+    - connections: 외부 API(TMap, AI 서버) 연결 열기 (비동기 뷰는 aopen_connections 사용)
+    :return: {단계: 소요 시간(초)}
+    """
+    timings = {}
+    _timed(timings, "urls", lambda: get_resolver().url_patterns)
+    _timed(timings, "db", connection.ensure_connection)
+    _timed(timings, "hazards", load_hazards)
+    if ROUTING["BACKEND"] == "local":
+        _timed(timings, "router", get_router)
+    _timed(timings, "connections", open_connections)
+    # 요청 처리 중이 아닐 때 연결 유지 시간(CONN_MAX_AGE)이 지난 연결은 닫음
+    close_old_connections()
+    return timings
+
+
+def with_warm_up(app):
+    """
+    ASGI 앱에 lifespan 이벤트 처리를 추가합니다. (Django ASGI 핸들러는 lifespan 미지원)
+    서버(uvicorn)는 startup 이벤트 처리가 끝난 뒤에 요청을 받습니다.
+    (uvicorn은 이벤트 루프 안에서 앱을 불러오므로 모듈을 불러올 때는 DB에 접근할 수 없음)
+    :param app: Django ASGI 앱 (get_asgi_application())
+    """
+
+    async def application(scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await app(scope, receive, send)
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if STARTUP["WARMUP"]:
+                    await sync_to_async(warm_up)()
+                    await aopen_connections()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    return application